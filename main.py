@@ -1,20 +1,124 @@
-import sys 
-from scripts.runtime import main_loop
+import time
+started = time.perf_counter()
+interpreter_cpu = time.process_time()  # CPU spent before main.py started running
+import sys, os, sqlite3
+from scripts.core import PROFILES, DEFAULT_PROFILE, open_database, database_file, attach_database, session_trace
+core_imported = time.perf_counter()
 Errors = {
     "1001": "No Database Selected",
-    "1002": "More Than One Argument Passed"
+    "1002": "More Than One Argument Passed",
+    "1003": "Unknown Profile"
 }
 
+# Launch-to-first-paint budget checked by --startup-profile
+STARTUP_BUDGET_MS = 250
+
+def report_startup(marks):
+    """Print the time spent between startup marks to stderr"""
+    print("Startup profile:", file=sys.stderr)
+    print(f"  {'interpreter (cpu)':<20} {interpreter_cpu * 1000:8.1f} ms", file=sys.stderr)
+    for (_, previous), (label, at) in zip(marks, marks[1:]):
+        print(f"  {label:<20} {(at - previous) * 1000:8.1f} ms", file=sys.stderr)
+    total = (marks[-1][1] - marks[0][1]) * 1000
+    verdict = "within" if total <= STARTUP_BUDGET_MS else "OVER"
+    print(f"  {'total':<20} {total:8.1f} ms ({verdict} budget of {STARTUP_BUDGET_MS} ms)", file=sys.stderr)
+
+def pop_option(args, flag, default=None):
+    """Remove "flag value" from args and return the value"""
+    if flag not in args:
+        return default
+    i = args.index(flag)
+    value = args[i + 1] if i + 1 < len(args) else ""
+    del args[i:i + 2]
+    return value
+
+def attach_specs(args):
+    """Remove every "--attach [alias=]database" from args; returns [(path, alias)].
+
+    A database given without an extension is a name, like the main database.
+    """
+    specs = []
+    while "--attach" in args:
+        spec = pop_option(args, "--attach")
+        alias, _, name = spec.rpartition("=")
+        path = name if os.path.splitext(name)[1] else database_file(name)
+        specs.append((path, alias or None))
+    return specs
+
+def write_traces(trace_file, slow_log):
+    if trace_file:
+        count = session_trace.dump(trace_file)
+        print(f"Wrote {count} traced statements to {trace_file}", file=sys.stderr)
+    if slow_log:
+        count = session_trace.dump(slow_log, slow_only=True)
+        print(f"Wrote {count} statements slower than {session_trace.slow_ms} ms to {slow_log}", file=sys.stderr)
+
 def main():
-    if len(sys.argv) < 2:
-        print(f"{Errors["1001"]}")
-    elif len(sys.argv) > 2:
-        print(f"{Errors["1002"]}")
+    args = sys.argv[1:]
+    profile = pop_option(args, "--profile", DEFAULT_PROFILE)
+    trace_file = pop_option(args, "--trace")
+    slow_log = pop_option(args, "--slow-log")
+    slow_ms = pop_option(args, "--slow-ms")
+    if slow_ms:
+        session_trace.slow_ms = float(slow_ms)
+    # Record statements with their bound values when they are written out
+    session_trace.verbose = bool(trace_file or slow_log)
+    attach = attach_specs(args)
+    maintenance = "--maintenance" in args
+    if maintenance:
+        args.remove("--maintenance")
+    startup = None
+    if "--startup-profile" in args:
+        args.remove("--startup-profile")
+        startup = [("start", started), ("core imports", core_imported)]
+
+    if args and args[0] in ("-h", "--help"):
+        from scripts.cli import build_parser
+        build_parser().print_help()
+    elif profile not in PROFILES:
+        print(f"{Errors['1003']}: choose one of {', '.join(PROFILES)}")
+    elif len(args) < 1:
+        print(f"{Errors['1001']}")
+    elif len(args) > 1:
+        # Headless subcommand: parse the rest and never load the TUI
+        from scripts.cli import COMMANDS, build_parser, run_command
+        if startup is not None:
+            startup.append(("cli imports", time.perf_counter()))
+        if args[1] not in COMMANDS:
+            print(f"{Errors['1002']}")
+            return
+        command = build_parser().parse_args(args[1:])
+        conn, _ = open_database(args[0], profile)
+        try:
+            try:
+                for path, alias in attach:
+                    attach_database(conn, path, alias)
+            except (sqlite3.Error, ValueError) as e:
+                print(f"Error: cannot attach {path}: {e}", file=sys.stderr)
+                code = 1
+            else:
+                code = run_command(conn, command)
+        finally:
+            conn.close()
+            write_traces(trace_file, slow_log)
+        if startup is not None:
+            startup.append(("command", time.perf_counter()))
+            report_startup(startup)
+        sys.exit(code)
     else:
-        variable = sys.argv[1]
-        print(f"Database Selected: {variable}")
+        # The TUI (Rich, readchar) is only loaded for interactive sessions
+        from scripts.runtime import main_loop
+        if startup is not None:
+            startup.append(("tui imports", time.perf_counter()))
+        variable = args[0]
+        print(f"Database Selected: {variable} (profile: {profile})")
 
-        main_loop(variable) # main loop
+        try:
+            main_loop(variable, profile, startup, maintenance, attach) # main loop
+        finally:
+            write_traces(trace_file, slow_log)
+        if startup is not None:
+            report_startup(startup)
 
 
-main()        
\ No newline at end of file
+main()
@@ -0,0 +1,350 @@
+"""Reproducible benchmarks for PoleDB's core operations.
+
+    python -m scripts.benchmark --rows 200000 --schema wide --output after.json --baseline before.json
+
+A synthetic database is generated from a fixed seed. Then each operation is
+timed over several iterations, each operation in a fresh worker process so
+that its peak RSS is its own. The report shows latency percentiles,
+throughput and peak RSS. Results can be saved as JSON and compared against
+an earlier run.
+"""
+import argparse, json, os, platform, random, shutil, sqlite3, string, sys, tempfile, time
+from scripts.core import (
+    RESULT_PAGE_ROWS, bulk_import_csv, infer_csv_types, create_csv_table, export_table, get_catalog, release_catalog, QueryWorker,
+    RowCounter, TablePager, profile_table,
+)
+
+# Column definitions after "id INTEGER PRIMARY KEY, name TEXT"
+SCHEMAS = {
+    "narrow": ["k INTEGER", "score REAL"],
+    "wide": ([f"i{n} INTEGER" for n in range(20)] + [f"r{n} REAL" for n in range(10)]
+             + [f"s{n} TEXT" for n in range(10)]),
+    "text": ["body TEXT", "tags TEXT"],
+    "blob": ["data BLOB"],
+}
+
+PAGES_PER_ITERATION = 200
+
+def _word(rng, low=3, high=10):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+def _row(schema, rng, row_id):
+    name = _word(rng)
+    if schema == "narrow":
+        return (row_id, name, rng.randint(0, 1000000), rng.random() * 1000)
+    if schema == "wide":
+        return ((row_id, name) + tuple(rng.randint(0, 1 << 40) for _ in range(20))
+                + tuple(rng.random() for _ in range(10)) + tuple(_word(rng, 5, 30) for _ in range(10)))
+    if schema == "text":
+        body = " ".join(_word(rng) for _ in range(rng.randint(30, 300)))
+        return (row_id, name, body, ",".join(_word(rng, 3, 6) for _ in range(rng.randint(1, 5))))
+    return (row_id, name, rng.randbytes(rng.randint(1024, 16 * 1024)))
+
+def generate_database(path, schema, rows, seed=42):
+    """Create a table t with rows synthetic rows of the given schema shape"""
+    rng = random.Random(seed)
+    columns = ["id INTEGER PRIMARY KEY", "name TEXT"] + SCHEMAS[schema]
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE t ({', '.join(columns)})")
+    sql = f"INSERT INTO t VALUES ({','.join('?' for _ in columns)})"
+    for start in range(1, rows + 1, 10000):
+        batch = [_row(schema, rng, row_id) for row_id in range(start, min(start + 10000, rows + 1))]
+        conn.executemany(sql, batch)
+        conn.commit()
+    conn.execute("CREATE INDEX t_name ON t(name)")
+    conn.commit()
+    conn.close()
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(int(round(p / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+def _timed(action):
+    start = time.perf_counter()
+    items = action()
+    return time.perf_counter() - start, items
+
+# Each bench_* runs one iteration and returns [(seconds, items processed)];
+# most return a single sample, paging one per page turned.
+
+def bench_import_csv(ctx):
+    path = os.path.join(ctx["workdir"], "import.db")
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute(ctx["create_sql"])
+    try:
+        return [_timed(lambda: bulk_import_csv(conn, "t", ctx["csv"]))]
+    finally:
+        conn.close()
+
+def bench_import_csv_typed(ctx):
+    """CSV import into a table created with inferred column types, values converted"""
+    path = os.path.join(ctx["workdir"], "import.db")
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    
+    def load():
+        headers, types = infer_csv_types(ctx["csv"])
+        create_csv_table(conn, "t", headers, types)
+        return bulk_import_csv(conn, "t", ctx["csv"], types=types)
+    try:
+        return [_timed(load)]
+    finally:
+        release_catalog(conn)
+        conn.close()
+
+def bench_import_pcol(ctx):
+    from scripts.columnar import load_pcol
+    path = os.path.join(ctx["workdir"], "import.db")
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        return [_timed(lambda: load_pcol(conn, "t", ctx["pcol"]))]
+    finally:
+        release_catalog(conn)
+        conn.close()
+
+def _bench_export(fmt):
+    def bench(ctx):
+        target = os.path.join(ctx["workdir"], f"out.{fmt}")
+        return [_timed(lambda: export_table(ctx["conn"].cursor(), "t", fmt, target))]
+    bench.__name__ = f"bench_export_{fmt}"
+    return bench
+
+def _run_worker(ctx, sql, params=(), page_size=None):
+    worker = QueryWorker(ctx["db"], sql, params, timeout=0, row_cap=0, page_size=page_size)
+    worker.run()
+    if worker.error:
+        raise worker.error
+    rows = len(worker.rows)
+    worker.close()
+    return rows
+
+def bench_search_first_page(ctx):
+    """Time until the first screen of a LIKE search is ready"""
+    return [_timed(lambda: _run_worker(ctx, "SELECT * FROM t WHERE name LIKE '%ab%'", page_size=RESULT_PAGE_ROWS))]
+
+def bench_search_full(ctx):
+    return [_timed(lambda: _run_worker(ctx, "SELECT * FROM t WHERE name LIKE '%ab%'"))]
+
+def bench_search_indexed(ctx):
+    name = ctx["conn"].execute("SELECT name FROM t WHERE id = ?", (ctx["rows"] // 2 or 1,)).fetchone()
+    return [_timed(lambda: _run_worker(ctx, "SELECT * FROM t WHERE name = ?", name))]
+
+def bench_paging(ctx):
+    pager = TablePager(ctx["conn"], "t")
+    samples = []
+    for _ in range(PAGES_PER_ITERATION):
+        if pager.at_end:
+            break
+        samples.append(_timed(lambda: (pager.next(), len(pager.rows))[1]))
+    samples.append(_timed(lambda: (pager.last(), len(pager.rows))[1]))
+    samples.append(_timed(lambda: (pager.prev(), len(pager.rows))[1]))
+    return samples
+
+def bench_table_info(ctx):
+    """Cold table_info: schema, indexes and an exact row count on a new connection"""
+    conn = sqlite3.connect(ctx["db"])
+    try:
+        def info():
+            catalog = get_catalog(conn)
+            catalog.columns("t")
+            catalog.indexes("t")
+            return RowCounter(conn).count("t")
+        return [_timed(info)]
+    finally:
+        release_catalog(conn)
+        conn.close()
+
+def bench_table_info_cached(ctx):
+    counter = RowCounter(ctx["conn"])
+    counter.count("t")
+    return [_timed(lambda: counter.count("t"))]
+
+def bench_profile(ctx):
+    """Single-pass statistics of every column of t"""
+    return [_timed(lambda: profile_table(ctx["conn"], "t")["rows"])]
+
+OPERATIONS = {
+    "import_csv": bench_import_csv,
+    "import_csv_typed": bench_import_csv_typed,
+    "import_pcol": bench_import_pcol,
+    "export_csv": _bench_export("csv"),
+    "export_json": _bench_export("json"),
+    "export_ndjson": _bench_export("ndjson"),
+    "export_markdown": _bench_export("markdown"),
+    "export_pcol": _bench_export("pcol"),
+    "search_first_page": bench_search_first_page,
+    "search_full": bench_search_full,
+    "search_indexed": bench_search_indexed,
+    "paging": bench_paging,
+    "table_info": bench_table_info,
+    "table_info_cached": bench_table_info_cached,
+    "profile": bench_profile,
+}
+
+def peak_rss_kib():
+    """Peak resident set size of this process in KiB, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def run_operation(name, setup, repeat):
+    """Run one operation repeat times (plus a warm-up) and summarize it"""
+    ctx = dict(setup)
+    ctx["conn"] = sqlite3.connect(ctx["db"])
+    rss_before = peak_rss_kib()
+    try:
+        OPERATIONS[name](ctx)  # Warm-up: page cache, imports, prepared schema
+        samples = []
+        for _ in range(repeat):
+            samples.extend(OPERATIONS[name](ctx))
+    finally:
+        release_catalog(ctx["conn"])
+        ctx["conn"].close()
+    seconds = [elapsed for elapsed, _ in samples]
+    items = sum(count for _, count in samples)
+    rss_after = peak_rss_kib()
+    return {
+        "samples": len(samples),
+        "items_per_sample": items / len(samples),
+        "min": min(seconds),
+        "mean": sum(seconds) / len(seconds),
+        "p50": percentile(seconds, 50),
+        "p95": percentile(seconds, 95),
+        "p99": percentile(seconds, 99),
+        "max": max(seconds),
+        "throughput": items / sum(seconds) if sum(seconds) else 0,
+        "peak_rss_kib": rss_after,
+        "rss_growth_kib": rss_after - rss_before if rss_after is not None else None,
+    }
+
+def _isolated(name, setup, repeat):
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_operation, name, setup, repeat).result()
+
+def prepare(workdir, schema, rows, seed):
+    """Generate the database and the import inputs; returns the setup dict"""
+    from scripts.columnar import write_pcol
+    db = os.path.join(workdir, "bench.db")
+    generate_database(db, schema, rows, seed)
+    conn = sqlite3.connect(db)
+    try:
+        create_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 't'").fetchone()[0]
+        csv_path = os.path.join(workdir, "input.csv")
+        export_table(conn.cursor(), "t", "csv", csv_path)
+        pcol_path = os.path.join(workdir, "input.pcol")
+        types = [col[2] for col in conn.execute("PRAGMA table_info(t)")]
+        write_pcol(conn.execute("SELECT * FROM t"), pcol_path, "t", types, create_sql)
+    finally:
+        conn.close()
+    return {"workdir": workdir, "db": db, "csv": csv_path, "pcol": pcol_path,
+            "create_sql": create_sql, "rows": rows}
+
+def _format_seconds(seconds):
+    return f"{seconds * 1000:.2f} ms" if seconds < 1 else f"{seconds:.3f} s"
+
+def print_report(results, baseline=None, threshold=10.0):
+    """Print a results table; returns the operations that regressed past threshold percent"""
+    regressions = []
+    header = f"{'operation':<18} {'p50':>11} {'p95':>11} {'p99':>11} {'items/s':>13} {'peak RSS':>10}"
+    if baseline:
+        header += f" {'vs baseline':>12}"
+    print(header)
+    for name, result in results.items():
+        rss = f"{result['peak_rss_kib'] / 1024:.1f} MiB" if result["peak_rss_kib"] is not None else "-"
+        line = (f"{name:<18} {_format_seconds(result['p50']):>11} {_format_seconds(result['p95']):>11} "
+                f"{_format_seconds(result['p99']):>11} {result['throughput']:>13,.0f} {rss:>10}")
+        if baseline:
+            before = baseline.get(name)
+            if before and before["p50"]:
+                change = (result["p50"] - before["p50"]) / before["p50"] * 100
+                line += f" {change:>+11.1f}%"
+                if change > threshold:
+                    line += "  REGRESSION"
+                    regressions.append(name)
+            else:
+                line += f" {'new':>12}"
+        print(line)
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m scripts.benchmark", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000, help="rows in the synthetic table (default 100000)")
+    parser.add_argument("--schema", choices=list(SCHEMAS), default="narrow",
+                        help="shape of the table: narrow, wide (42 columns), text heavy or blob heavy")
+    parser.add_argument("--repeat", type=int, default=5, help="timed iterations per operation (default 5)")
+    parser.add_argument("--ops", default=",".join(OPERATIONS),
+                        help="comma separated operations to run (default: all)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="keep generated files here instead of a temporary directory")
+    parser.add_argument("--output", help="save results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="p50 slowdown in percent reported as a regression (default 10)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="run every operation in this process (faster; peak RSS becomes cumulative)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    operations = [name.strip() for name in args.ops.split(",") if name.strip()]
+    unknown = [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        print(f"Unknown operations: {', '.join(unknown)} (choose from {', '.join(OPERATIONS)})", file=sys.stderr)
+        return 2
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline["meta"]["schema"] != args.schema or baseline["meta"]["rows"] != args.rows:
+            print(f"Warning: baseline used {baseline['meta']['rows']} {baseline['meta']['schema']} rows",
+                  file=sys.stderr)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="poledb-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        start = time.perf_counter()
+        print(f"Generating {args.rows:,} {args.schema} rows in {workdir}...", file=sys.stderr)
+        setup = prepare(workdir, args.schema, args.rows, args.seed)
+        print(f"Generated in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        results = {}
+        for name in operations:
+            print(f"Running {name}...", file=sys.stderr)
+            runner = run_operation if args.in_process else _isolated
+            results[name] = runner(name, setup, args.repeat)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = print_report(results, baseline["results"] if baseline else None, args.threshold)
+    if args.output:
+        meta = {
+            "rows": args.rows,
+            "schema": args.schema,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Saved results to {args.output}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
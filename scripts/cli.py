@@ -0,0 +1,249 @@
+"""Headless subcommands for scripts and cron jobs.
+
+Only scripts.core is used here, so running a command never imports Rich or
+readchar. Data goes to stdout (or --output), progress and summaries to stderr.
+"""
+import argparse, json, sqlite3, sys, time
+from collections import Counter
+from scripts.core import (
+    IMPORT_CHUNK_SIZE, IMPORT_SAMPLE_ROWS, EXPORT_BATCH_SIZE, EXPORT_FORMATS, COMPRESSIONS,
+    get_catalog, is_ddl, read_import_checkpoint, bulk_import_csv, write_rows, export_table, export_database,
+    table_stats, MAINTENANCE_TASKS, run_maintenance, append_maintenance_log,
+    BACKUP_STEP_PAGES, BACKUP_STEP_SLEEP, backup_database, format_bytes,
+    CSV_CONVERTERS, infer_csv_types, create_csv_table, create_indexes, profile_table,
+)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py <database> [--profile PROFILE]",
+        description="Run a PoleDB operation without the interactive browser.",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="command", required=True)
+    
+    export = commands.add_parser("export", help="stream a table to a file or stdout")
+    export.add_argument("--table", required=True)
+    export.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    export.add_argument("--output", default="-", help="output file, - for stdout (default)")
+    export.add_argument("--compression", choices=list(COMPRESSIONS), default="none")
+    export.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    
+    export_all = commands.add_parser("export-all", help="export every table to its own file, in parallel")
+    export_all.add_argument("--output-dir", required=True)
+    export_all.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    export_all.add_argument("--compression", choices=list(COMPRESSIONS), default="none")
+    export_all.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    export_all.add_argument("--no-snapshot", dest="snapshot", action="store_false",
+                            help="read the live file instead of a consistent copy")
+    
+    imp = commands.add_parser("import", help="bulk load a CSV file, or a .pcol dump, into a table")
+    imp.add_argument("--table", required=True)
+    imp.add_argument("--file", required=True, help="CSV file (existing table unless --create), or .pcol dump (table created if missing)")
+    imp.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="CSV rows per transaction")
+    imp.add_argument("--fast", action="store_true", help="synchronous=OFF, journal_mode=MEMORY during the load")
+    imp.add_argument("--resume", action="store_true", help="continue from the last committed chunk of a failed load")
+    imp.add_argument("--create", action="store_true",
+                     help="create the table from the CSV, with INTEGER/REAL/TEXT columns inferred from a sample")
+    imp.add_argument("--sample-rows", type=int, default=IMPORT_SAMPLE_ROWS, help="CSV rows read to infer column types")
+    imp.add_argument("--index", action="append", default=[], metavar="COLUMN",
+                     help="index this column once the rows are loaded (repeatable)")
+    
+    query = commands.add_parser("query", help="run SQL and stream the result")
+    query.add_argument("sql")
+    query.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    query.add_argument("--output", default="-", help="output file, - for stdout (default)")
+    query.add_argument("--compression", choices=list(COMPRESSIONS), default="none")
+    
+    stats = commands.add_parser("stats", help="row, column and index counts per table")
+    stats.add_argument("--table", action="append", help="only this table (repeatable)")
+    stats.add_argument("--json", action="store_true", help="print JSON instead of a text table")
+    stats.add_argument("--estimate", action="store_true",
+                       help="approximate row counts from sqlite_stat1 or max(rowid) instead of COUNT(*)")
+    
+    profile = commands.add_parser("profile", help="per-column nulls, distinct values, min/max, top values and lengths")
+    profile.add_argument("--table", action="append", help="only this table (repeatable, default: every table)")
+    profile.add_argument("--sample", type=int, default=0, metavar="ROWS",
+                         help="profile a random sample of this many rows per table instead of every row")
+    profile.add_argument("--json", action="store_true", help="print JSON instead of a text table")
+    
+    backup = commands.add_parser("backup", help="online copy of the whole database, indexes included")
+    backup.add_argument("--output", required=True, help="backup file (replaced once the copy is complete)")
+    backup.add_argument("--pages", type=int, default=BACKUP_STEP_PAGES, help="pages copied per step")
+    backup.add_argument("--sleep-ms", type=float, default=BACKUP_STEP_SLEEP * 1000,
+                        help="pause between steps, letting other connections write")
+    
+    maintain = commands.add_parser("maintain", help="run integrity checks, ANALYZE, optimize, checkpoint, vacuum")
+    maintain.add_argument("--task", action="append", choices=list(MAINTENANCE_TASKS),
+                          help="task to run (repeatable, default: quick_check, optimize, checkpoint)")
+    maintain.add_argument("--throttle", type=float, default=0.0,
+                          help="check table by table, sleeping this many seconds per second of checking "
+                               "(skips the whole-file freelist check)")
+    maintain.add_argument("--log", help="append results to this file as NDJSON")
+    return parser
+
+def log(message):
+    print(message, file=sys.stderr)
+
+def cmd_export(conn, args):
+    start = time.perf_counter()
+    count = export_table(conn.cursor(), args.table, args.format, args.output, args.compression, args.batch_size)
+    log(f"Exported {count} rows from {args.table} in {time.perf_counter() - start:.2f}s")
+
+def cmd_export_all(conn, args):
+    start = time.perf_counter()
+    
+    def on_table_done(result, done, total):
+        log(f"[{done}/{total}] {result['table']}: {result['rows']} rows, "
+            f"{result['bytes'] / (1024 * 1024):.1f} MiB in {result['seconds']:.2f}s "
+            f"({result['rows'] / result['seconds'] if result['seconds'] else 0:,.0f} rows/s)")
+    
+    results = export_database(conn, args.output_dir, args.format, args.compression,
+                              args.workers, args.snapshot, on_table_done=on_table_done)
+    total_rows = sum(result["rows"] for result in results)
+    log(f"Exported {len(results)} tables, {total_rows} rows to {args.output_dir} "
+        f"in {time.perf_counter() - start:.2f}s")
+
+def cmd_import(conn, args):
+    if args.file.endswith(".pcol"):
+        return _import_pcol(conn, args)
+    resume_from = read_import_checkpoint(args.file, args.table) if args.resume else 0
+    if resume_from:
+        log(f"Resuming after row {resume_from}")
+    start = time.perf_counter()
+    
+    def on_progress(rows, bytes_read, total_bytes):
+        if sys.stderr.isatty():
+            rate = (rows - resume_from) / (time.perf_counter() - start)
+            sys.stderr.write(f"\r{rows} rows, {rate:,.0f} rows/s, {100 * bytes_read / total_bytes:5.1f}%")
+            sys.stderr.flush()
+    
+    types, rejects = None, Counter()
+    if args.create:
+        types = _create_table(conn, args, resume_from)
+    
+    def on_reject(row_number, column, value):
+        if not rejects:
+            log(f"First rejected row: {row_number}, " + (f"{column} = {value!r}" if column else "wrong number of fields"))
+        rejects[column or "(field count)"] += 1
+    
+    count = bulk_import_csv(conn, args.table, args.file, chunk_size=args.chunk_size,
+                            fast_load=args.fast, resume_from=resume_from, on_progress=on_progress,
+                            types=types, on_reject=on_reject)
+    elapsed = time.perf_counter() - start
+    if sys.stderr.isatty():
+        sys.stderr.write("\n")
+    log(f"Imported {count} rows into {args.table} in {elapsed:.2f}s ({count / elapsed if elapsed else 0:,.0f} rows/s)")
+    if rejects:
+        log(f"Rejected {sum(rejects.values())} rows: " + ", ".join(f"{column} {n}" for column, n in rejects.most_common()))
+    if args.index:
+        start = time.perf_counter()
+        create_indexes(conn, args.table, args.index)
+        log(f"Indexed {', '.join(args.index)} in {time.perf_counter() - start:.2f}s")
+
+def _create_table(conn, args, resume_from):
+    """Column types for a --create import, creating the table unless resuming into it"""
+    catalog = get_catalog(conn)
+    if catalog.has_table(args.table):
+        if not resume_from:
+            raise RuntimeError(f"table {args.table} already exists")
+        return [column[2].upper() if column[2].upper() in CSV_CONVERTERS else "TEXT" for column in catalog.columns(args.table)]
+    headers, types = infer_csv_types(args.file, args.sample_rows)
+    create_csv_table(conn, args.table, headers, types)
+    log(f"Created {args.table} (" + ", ".join(f"{name} {decltype}" for name, decltype in zip(headers, types)) + ")")
+    return types
+
+def _import_pcol(conn, args):
+    from scripts.columnar import load_pcol
+    start = time.perf_counter()
+    count = load_pcol(conn, args.table, args.file, fast_load=args.fast)
+    elapsed = time.perf_counter() - start
+    log(f"Imported {count} rows into {args.table} in {elapsed:.2f}s ({count / elapsed if elapsed else 0:,.0f} rows/s)")
+
+def cmd_query(conn, args):
+    cursor = conn.execute(args.sql)
+    if cursor.description is not None:
+        count = write_rows(cursor, args.format, args.output, args.compression)
+        log(f"{count} rows")
+    else:
+        conn.commit()
+        if is_ddl(args.sql):
+            get_catalog(conn).invalidate()
+        log(f"Rows affected: {cursor.rowcount}")
+
+def cmd_stats(conn, args):
+    tables = args.table or get_catalog(conn).all_tables()
+    stats = [table_stats(conn, table, args.estimate) for table in tables]
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        print()
+        return
+    width = max([len("table")] + [len(table) for table in tables])
+    print(f"{'table':<{width}}  {'rows':>12}  {'columns':>7}  {'indexes':>7}")
+    for row in stats:
+        print(f"{row['table']:<{width}}  {row['rows']:>12}  {row['columns']:>7}  {row['indexes']:>7}")
+
+def cmd_profile(conn, args):
+    profiles = []
+    for table in args.table or get_catalog(conn).all_tables():
+        profile = profile_table(conn, table, args.sample)
+        profiles.append(profile)
+        if not args.json:
+            total = "" if profile["total_rows"] is None else f" of {'' if profile['total_exact'] else '~'}{profile['total_rows']:,}"
+            source = f"sample of {profile['rows']:,}{total} rows" if profile["sampled"] else f"{profile['rows']:,} rows"
+            print(f"{table} ({source}, {profile['seconds']:.2f}s)")
+            print(f"  {'column':<20} {'nulls':>6} {'distinct':>10}  {'min':<16} {'max':<16} top")
+            for stats in profile["columns"].values():
+                info = stats.as_dict()
+                distinct = f"{'' if info['distinct_exact'] else '~'}{info['distinct']:,}"
+                top = ", ".join(f"{value!r}×{count}" for value, count in info["top"][:3])
+                print(f"  {info['column']:<20} {info['null_ratio']:>6.1%} {distinct:>10}  "
+                      f"{str(info['min'])[:16]:<16} {str(info['max'])[:16]:<16} {top}")
+    if args.json:
+        json.dump([dict(profile, columns=[stats.as_dict() for stats in profile["columns"].values()])
+                   for profile in profiles], sys.stdout, indent=2)
+        print()
+
+def cmd_backup(conn, args):
+    last = [0.0]
+    
+    def on_progress(remaining, total, rate):
+        now = time.perf_counter()
+        if now - last[0] >= 1.0 and remaining:
+            last[0] = now
+            log(f"{total - remaining:,}/{total:,} pages, {remaining:,} remaining, {rate / (1024 * 1024):.1f} MB/s")
+    
+    stats = backup_database(conn, args.output, args.pages, args.sleep_ms / 1000, on_progress)
+    rate = stats["bytes"] / stats["seconds"] if stats["seconds"] else 0
+    log(f"Backed up {stats['pages']:,} pages ({format_bytes(stats['bytes'])}) to {stats['target']} "
+        f"in {stats['seconds']:.2f}s ({rate / (1024 * 1024):.1f} MB/s, {stats['steps']} steps)")
+
+def cmd_maintain(conn, args):
+    records = []
+    for task in args.task or ["quick_check", "optimize", "checkpoint"]:
+        record = run_maintenance(conn, task, args.throttle)
+        records.append(record)
+        log(f"{task:<18} {record['status']:<8} {record['seconds']:8.3f}s  {record['result']}")
+    if args.log:
+        append_maintenance_log(args.log, records)
+    failed = [record["task"] for record in records if record["status"] in ("problem", "error")]
+    if failed:
+        raise RuntimeError(f"maintenance failed: {', '.join(failed)}")
+
+COMMANDS = {
+    "export": cmd_export,
+    "export-all": cmd_export_all,
+    "import": cmd_import,
+    "query": cmd_query,
+    "stats": cmd_stats,
+    "profile": cmd_profile,
+    "backup": cmd_backup,
+    "maintain": cmd_maintain,
+}
+
+def run_command(conn, args):
+    """Run a parsed subcommand; returns the process exit code"""
+    try:
+        COMMANDS[args.command](conn, args)
+        return 0
+    except (sqlite3.Error, OSError, ValueError, RuntimeError) as e:
+        log(f"Error: {e}")
+        return 1
@@ -0,0 +1,248 @@
+"""PoleDB columnar dump format (.pcol).
+
+Unlike CSV and JSON, a .pcol file keeps SQLite storage classes intact.
+It loads without text parsing: numbers are read straight out of a
+memory-mapped file as typed arrays.
+
+    b"PCOL1\\n"
+    u32 header length, header as UTF-8 JSON {table, columns, types, schema, byteorder}
+    chunks, ended by a chunk of 0 rows:
+        u32 row count n
+        per column: u8 kind, u8 has_nulls, u64 payload length, payload
+
+Payload by kind. When has_nulls is set it starts with n mask bytes (1 = present):
+    N  nothing, every value is NULL
+    i  n int64                 f  n float64
+    t  n+1 int64 offsets, UTF-8 text
+    b  n+1 int64 offsets, raw BLOB bytes
+    m  n tags (N/i/f/t/b), n int64, n float64, n+1 int64 offsets, bytes
+
+Framing is little-endian; arrays use the writer's byte order, recorded in
+the header and swapped on load if it differs.
+"""
+import json, mmap, sqlite3, struct, sys, itertools, contextlib, traceback
+from array import array
+
+MAGIC = b"PCOL1\n"
+EXTENSION = ".pcol"
+_LENGTH = struct.Struct("<I")
+_COLUMN = struct.Struct("<BBQ")
+_KINDS = {int: b"i", float: b"f", str: b"t", bytes: b"b"}
+_INT, _FLOAT, _TEXT, _BLOB = b"iftb"
+
+def _offsets(parts):
+    offsets = array("q", [0])
+    offsets.extend(itertools.accumulate(map(len, parts)))
+    return offsets
+
+def _encode_column(values):
+    """Return (kind, mask, payload buffers) for one column of a chunk"""
+    kinds = set(map(type, values))
+    has_nulls = type(None) in kinds
+    kinds.discard(type(None))
+    if not kinds:
+        return b"N", b"", []
+    mask = bytes(value is not None for value in values) if has_nulls else b""
+
+    if len(kinds) > 1 or next(iter(kinds)) not in _KINDS:
+        tags = bytes(_KINDS.get(type(value), b"N")[0] for value in values)
+        ints = array("q", [value if type(value) is int else 0 for value in values])
+        floats = array("d", [value if type(value) is float else 0.0 for value in values])
+        parts = [value.encode('utf-8') if type(value) is str else value if type(value) is bytes else b""
+                 for value in values]
+        return b"m", b"", [tags, ints, floats, _offsets(parts), b"".join(parts)]
+
+    kind = _KINDS[next(iter(kinds))]
+    if kind == b"i":
+        return kind, mask, [array("q", [0 if value is None else value for value in values])]
+    if kind == b"f":
+        return kind, mask, [array("d", [0.0 if value is None else value for value in values])]
+    if kind == b"t":
+        parts = [b"" if value is None else value.encode('utf-8') for value in values]
+    else:
+        parts = [b"" if value is None else value for value in values]
+    return kind, mask, [_offsets(parts), b"".join(parts)]
+
+def write_pcol(cursor, filename, title="result", types=None, schema=None, batch_size=5000):
+    """Stream the pending result of cursor into a .pcol file; returns the row count.
+
+    filename "-" writes to standard output. schema (the CREATE TABLE
+    statement) or else types (declared column types) is used to create the
+    table if it does not exist on load.
+    """
+    columns = [desc[0] for desc in cursor.description]
+    header = json.dumps({
+        "table": title,
+        "columns": columns,
+        "types": list(types) if types else [""] * len(columns),
+        "schema": schema,
+        "byteorder": sys.byteorder,
+    }).encode('utf-8')
+
+    row_count = 0
+    f = sys.stdout.buffer if filename == "-" else open(filename, 'wb')
+    try:
+        f.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            f.write(_LENGTH.pack(len(rows)))
+            for values in zip(*rows):
+                kind, mask, payload = _encode_column(values)
+                f.write(_COLUMN.pack(kind[0], bool(mask), len(mask) + sum(memoryview(part).nbytes for part in payload)))
+                f.write(mask)
+                for part in payload:
+                    f.write(part)
+            row_count += len(rows)
+        f.write(_LENGTH.pack(0))
+    finally:
+        if f is sys.stdout.buffer:
+            f.flush()
+        else:
+            f.close()
+    return row_count
+
+def _numbers(payload, code, swap):
+    if not swap:
+        return payload.cast(code).tolist()
+    values = array(code, payload)
+    values.byteswap()
+    return values.tolist()
+
+def _strings(offsets, data, blob):
+    if blob:
+        # Slices of the mapped file; sqlite3 binds any buffer as a BLOB
+        return [data[start:end] for start, end in zip(offsets, offsets[1:])]
+    text = str(data, 'utf-8')
+    if len(text) == len(data):
+        # ASCII only: byte offsets are character offsets
+        return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+    return [str(data[start:end], 'utf-8') for start, end in zip(offsets, offsets[1:])]
+
+def _decode_column(kind, has_nulls, payload, n, swap):
+    if kind == b"N":
+        return [None] * n
+    mask = None
+    if has_nulls:
+        mask, payload = payload[:n], payload[n:]
+
+    if kind == b"i":
+        values = _numbers(payload, "q", swap)
+    elif kind == b"f":
+        values = _numbers(payload, "d", swap)
+    elif kind in (b"t", b"b"):
+        offsets = _numbers(payload[:8 * (n + 1)], "q", swap)
+        values = _strings(offsets, payload[8 * (n + 1):], kind == b"b")
+    else:
+        tags, payload = bytes(payload[:n]), payload[n:]
+        ints = _numbers(payload[:8 * n], "q", swap)
+        floats = _numbers(payload[8 * n:16 * n], "d", swap)
+        offsets = _numbers(payload[16 * n:16 * n + 8 * (n + 1)], "q", swap)
+        data = payload[16 * n + 8 * (n + 1):]
+        values = []
+        for row, tag in enumerate(tags):
+            if tag == _INT:
+                values.append(ints[row])
+            elif tag == _FLOAT:
+                values.append(floats[row])
+            elif tag == _TEXT:
+                values.append(str(data[offsets[row]:offsets[row + 1]], 'utf-8'))
+            elif tag == _BLOB:
+                values.append(data[offsets[row]:offsets[row + 1]])
+            else:
+                values.append(None)
+
+    if mask is not None:
+        values = [value if present else None for value, present in zip(values, mask)]
+    return values
+
+def read_pcol_header(filename):
+    """Header dict of a .pcol file"""
+    with open(filename, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filename} is not a .pcol file")
+        (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+        return json.loads(f.read(length))
+
+def iter_pcol_chunks(filename):
+    """Yield (header, rows, bytes_read, total_bytes) per chunk of a memory-mapped .pcol file.
+
+    Rows of a chunk are only valid until the next one is requested: BLOB
+    values point into the mapping, which is closed when iteration ends.
+    """
+    header = read_pcol_header(filename)
+    swap = header["byteorder"] != sys.byteorder
+    width = len(header["columns"])
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            pos = len(MAGIC) + _LENGTH.size + _LENGTH.unpack_from(view, len(MAGIC))[0]
+            while True:
+                (n,) = _LENGTH.unpack_from(view, pos)
+                pos += _LENGTH.size
+                if n == 0:
+                    break
+                columns = []
+                for _ in range(width):
+                    kind, has_nulls, length = _COLUMN.unpack_from(view, pos)
+                    pos += _COLUMN.size
+                    columns.append(_decode_column(bytes([kind]), has_nulls, view[pos:pos + length], n, swap))
+                    pos += length
+                rows = list(zip(*columns))
+                del columns
+                try:
+                    yield header, rows, pos, len(mapped)
+                finally:
+                    # Also when the consumer closes us mid-load, so view.release() can succeed
+                    del rows
+        finally:
+            view.release()
+
+def load_pcol(conn, table_name, filename, fast_load=False, on_progress=None):
+    """Load a .pcol file into table_name, one transaction per stored chunk.
+
+    A missing table is created from the dumped CREATE statement when the
+    names match, otherwise from the recorded column types.
+    on_progress(rows_done, bytes_read, total_bytes) is called after each
+    chunk. Returns the number of rows loaded.
+    """
+    from scripts.core import fast_load_pragmas, get_catalog
+    header = read_pcol_header(filename)
+    columns = header["columns"]
+    cursor = conn.cursor()
+    catalog = get_catalog(conn)
+    if not catalog.has_table(table_name):
+        if header.get("schema") and header["table"] == table_name:
+            cursor.execute(header["schema"])
+        else:
+            definitions = ", ".join(f"{name} {decltype}".strip() for name, decltype in zip(columns, header["types"]))
+            cursor.execute(f"CREATE TABLE {table_name} ({definitions})")
+        conn.commit()
+        catalog.invalidate()
+
+    sql = f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({','.join('?' for _ in columns)})"
+    loaded = 0
+    conn.commit()
+    with fast_load_pragmas(conn, fast_load), contextlib.closing(iter_pcol_chunks(filename)) as chunks:
+        rows = []
+        try:
+            for _, rows, bytes_read, total_bytes in chunks:
+                try:
+                    cursor.execute("BEGIN")
+                    cursor.executemany(sql, rows)
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+                loaded += len(rows)
+                rows.clear()
+                if on_progress:
+                    on_progress(loaded, bytes_read, total_bytes)
+        except BaseException as e:
+            # BLOB values point into the mapping, and the traceback keeps them
+            # alive: drop them so closing the chunks can unmap the file
+            rows.clear()
+            traceback.clear_frames(e.__traceback__)
+            raise
+    return loaded
@@ -0,0 +1,2686 @@
+"""UI-independent core of PoleDB: connections, schema metadata, import,
+export and query execution. Nothing here imports Rich or readchar, so the
+command line interface can use it without paying for the TUI."""
+import sqlite3, os, re, sys, math, heapq, itertools, time, threading, contextlib
+from collections import OrderedDict, Counter, deque
+
+IMPORT_CHUNK_SIZE = 10000
+IMPORT_SAMPLE_ROWS = 10000
+EXPORT_BATCH_SIZE = 5000
+PAGE_SIZE = 20
+PAGE_CACHE_SIZE = 32
+QUERY_TIMEOUT = 30
+QUERY_ROW_CAP = 10000
+PROGRESS_STEPS = 10000
+RESULT_PAGE_ROWS = 100
+SLOW_QUERY_MS = 100
+TRACE_HISTORY = 10000
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_SLEEP = 0.01
+POOL_SIZE = 4
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+PROFILE_TOP_N = 10
+PROFILE_KMV_SIZE = 1024
+PROFILE_SAMPLE_ROWS = 100000
+PROFILE_FULL_SCAN_ROWS = 1000000
+# Columns with at least this share of distinct values are worth an index for = and range searches
+HIGH_CARDINALITY_RATIO = 0.05
+
+# Connection tuning profiles, applied when the database is opened.
+# cache_size is in KiB when negative, mmap_size in bytes.
+PROFILES = {
+    "safe": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "read-heavy": {
+        "busy_timeout": 10000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -262144,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "bulk-load": {
+        "busy_timeout": 30000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -524288,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_PROFILE = "balanced"
+
+# Tables SQLite creates next to an FTS5 virtual table, named <index>_<suffix>
+FTS5_SHADOW_TABLES = ("data", "idx", "content", "docsize", "config")
+_FTS5_CONTENT = re.compile(r"\bcontent\s*=\s*['\"]?(\w*)", re.IGNORECASE)
+# Markers around matched terms in full-text search results
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+
+# Profile of the interactive session, also used by worker connections
+session_profile = DEFAULT_PROFILE
+
+class SchemaCatalog:
+    """Column, primary key and index metadata, loaded once per table.
+
+    Cached entries stay valid until PRAGMA schema_version of any attached
+    database moves (DDL from any connection) or invalidate() is called
+    after DDL issued by the tool. Tables of attached databases are named
+    schema.table.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._version = None
+        self._tables = {}
+        self._columns = {}
+        self._indexes = {}
+        self._full_text = None
+
+    def _check_version(self):
+        version = tuple(
+            (row[1], self.conn.execute(f"PRAGMA {row[1]}.schema_version").fetchone()[0])
+            for row in self.conn.execute("PRAGMA database_list") if row[1] != "temp"
+        )
+        if version != self._version:
+            self.invalidate()
+            self._version = version
+
+    def invalidate(self):
+        self._version = None
+        self._tables.clear()
+        self._columns.clear()
+        self._indexes.clear()
+        self._full_text = None
+
+    def databases(self):
+        """(schema, file) of the main database and every attached one"""
+        self._check_version()
+        files = {row[1]: row[2] for row in self.conn.execute("PRAGMA database_list")}
+        return [(schema, files.get(schema)) for schema, _ in self._version]
+
+    def tables(self, schema="main"):
+        """User tables of one database, without SQLite's internal sqlite_* tables or full-text indexes"""
+        self._check_version()
+        if schema not in self._tables:
+            rows = self.conn.execute(
+                f"SELECT name FROM {schema}.sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'"
+            ).fetchall()
+            hidden = set()
+            if schema == "main":
+                for index in self.full_text_indexes().values():
+                    hidden.add(index['name'].lower())
+                    hidden.update(f"{index['name']}_{suffix}".lower() for suffix in FTS5_SHADOW_TABLES)
+            prefix = "" if schema == "main" else f"{schema}."
+            self._tables[schema] = [prefix + row[0] for row in rows if row[0].lower() not in hidden]
+        return self._tables[schema]
+
+    def all_tables(self):
+        """Tables of the main database, then of each attached one"""
+        return [table for schema, _ in self.databases() for table in self.tables(schema)]
+
+    def has_table(self, table_name):
+        schema, _ = split_table_name(table_name)
+        if schema.lower() not in (name.lower() for name, _ in self.databases()):
+            return False
+        return table_name.lower() in (name.lower() for name in self.tables(schema))
+
+    def columns(self, table_name):
+        """PRAGMA table_info rows: (cid, name, type, notnull, dflt_value, pk)"""
+        self._check_version()
+        if table_name not in self._columns:
+            schema, table = split_table_name(table_name)
+            self._columns[table_name] = self.conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()
+        return self._columns[table_name]
+    def column_names(self, table_name):
+        return [col[1] for col in self.columns(table_name)]
+
+    def primary_key_columns(self, table_name):
+        pk = sorted((col[5], col[1]) for col in self.columns(table_name) if col[5])
+        return [name for _, name in pk]
+
+    def primary_key(self, table_name):
+        """First primary key column, or None"""
+        pk = self.primary_key_columns(table_name)
+        return pk[0] if pk else None
+
+    def indexes(self, table_name):
+        """List of {'name', 'unique', 'columns'} dicts for the table's indexes"""
+        self._check_version()
+        if table_name not in self._indexes:
+            schema, table = split_table_name(table_name)
+            indexes = []
+            for idx in self.conn.execute(f"PRAGMA {schema}.index_list({table})").fetchall():
+                columns = [info[2] for info in self.conn.execute(f"PRAGMA {schema}.index_info({idx[1]})").fetchall()]
+                indexes.append({'name': idx[1], 'unique': idx[2], 'columns': columns})
+            self._indexes[table_name] = indexes
+        return self._indexes[table_name]
+
+    def full_text_indexes(self):
+        """{table: {'name', 'columns'}} for FTS5 tables of the main database whose content is another table"""
+        self._check_version()
+        if self._full_text is None:
+            self._full_text = {}
+            rows = self.conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type='table' AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+            ).fetchall()
+            for name, sql in rows:
+                content = _FTS5_CONTENT.search(sql)
+                if not re.search(r"USING\s+fts5\b", sql, re.IGNORECASE) or not content or not content.group(1):
+                    continue
+                columns = [col[1] for col in self.conn.execute(f"PRAGMA table_info({name})").fetchall()]
+                self._full_text[content.group(1).lower()] = {'name': name, 'columns': columns}
+        return self._full_text
+
+    def full_text_index(self, table_name):
+        """The FTS5 index over table_name, or None"""
+        return self.full_text_indexes().get(table_name.lower())
+
+def split_table_name(table_name):
+    """(schema, table) of a possibly schema-qualified table name"""
+    schema, _, table = table_name.rpartition(".")
+    return schema or "main", table
+
+def quote_identifier(name):
+    """name as a double-quoted SQL identifier, e.g. for column names read from a file"""
+    return '"' + name.replace('"', '""') + '"'
+
+_catalogs = {}
+
+def get_catalog(conn):
+    """Shared SchemaCatalog for a connection"""
+    if conn not in _catalogs:
+        _catalogs[conn] = SchemaCatalog(conn)
+    return _catalogs[conn]
+
+def release_catalog(conn):
+    _catalogs.pop(conn, None)
+
+def is_ddl(sql):
+    return sql.lstrip().upper().startswith(("CREATE", "DROP", "ALTER"))
+
+class SessionTrace:
+    """Every statement run through PoleDB connections, with duration and rows.
+
+    Recording happens in TracedCursor, so it works without
+    set_trace_callback. With verbose on, new connections also get a trace
+    callback: statements then carry their bound values, and SQL run outside a
+    cursor (triggers, executescript) is recorded too, without timing.
+    """
+
+    def __init__(self, history=TRACE_HISTORY, slow_ms=SLOW_QUERY_MS):
+        self.records = deque(maxlen=history)
+        self.slow = deque(maxlen=history)
+        self.slow_ms = slow_ms
+        self.verbose = False
+        self.statements = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self._mark = (0, 0.0, 0)
+        # time.monotonic() of the last statement per source, e.g. for idle detection
+        self.last_seen = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def attach(self, conn, source):
+        conn.trace_source = source
+        if self.verbose:
+            conn.set_trace_callback(lambda sql: self._on_trace(sql, source))
+
+    def _on_trace(self, sql, source):
+        if getattr(self._local, "active", False):
+            # Inside a traced call: keep the first expansion, ignore executemany repeats
+            if self._local.expanded is None:
+                self._local.expanded = sql
+            return
+        with self._lock:
+            self.records.append({"ts": time.time(), "source": source, "sql": sql, "seconds": None,
+                                 "rows": None, "batch": None, "error": None})
+            self.statements += 1
+
+    @contextlib.contextmanager
+    def call(self, source, sql, batch=None):
+        """Time one execute/commit and yield its record for the caller to fill in"""
+        record = {"ts": time.time(), "source": source, "sql": sql, "seconds": 0.0,
+                  "rows": 0, "batch": batch, "error": None}
+        self._local.active, self._local.expanded = True, None
+        start = time.perf_counter()
+        try:
+            yield record
+        except sqlite3.Error as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self._local.active = False
+            if self._local.expanded and batch is None:
+                record["sql"] = self._local.expanded
+            rows, record["rows"] = record["rows"], 0
+            with self._lock:
+                self.records.append(record)
+                self.statements += 1
+                self.last_seen[source] = time.monotonic()
+                self._account(record, seconds, rows)
+
+    def add(self, record, seconds, rows=0):
+        """Account time and rows to a record, e.g. for rows fetched later"""
+        with self._lock:
+            self._account(record, seconds, rows)
+
+    def _account(self, record, seconds, rows):
+        # Caller holds the lock
+        was_slow = record["seconds"] * 1000 >= self.slow_ms
+        record["seconds"] += seconds
+        record["rows"] += rows
+        self.seconds += seconds
+        self.rows += rows
+        if not was_slow and record["seconds"] * 1000 >= self.slow_ms:
+            self.slow.append(record)
+
+    def mark(self):
+        """Start a new interval for since_mark()"""
+        self._mark = (self.statements, self.seconds, self.rows)
+
+    def since_mark(self):
+        """(statements, seconds in SQL, rows, slowest record) since the last mark"""
+        statements, seconds, rows = self._mark
+        count = self.statements - statements
+        recent = [record for record in itertools.islice(reversed(self.records), count)
+                  if record["seconds"] is not None]
+        slowest = max(recent, key=lambda record: record["seconds"], default=None)
+        return count, self.seconds - seconds, self.rows - rows, slowest
+
+    def dump(self, filename, slow_only=False):
+        """Write the recorded statements as NDJSON; returns how many were written"""
+        import json
+        records = self.slow if slow_only else self.records
+        with open(filename, 'w', encoding='utf-8') as f:
+            for record in records:
+                entry = dict(record)
+                if entry["seconds"] is not None:
+                    entry["seconds"] = round(entry["seconds"], 6)
+                entry["ts"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(entry["ts"])) + \
+                    f".{int(entry['ts'] * 1000) % 1000:03d}"
+                f.write(json.dumps(entry) + "\n")
+        return len(records)
+
+session_trace = SessionTrace()
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that reports statements, durations and fetched rows to session_trace.
+
+    Fetches are tallied on the cursor and added to the statement's record
+    once, when its rows run out, the cursor runs another statement or it is
+    closed.
+    """
+    _record = None
+    _fetch_seconds = 0.0
+    _fetch_rows = 0
+
+    def _source(self):
+        return getattr(self.connection, "trace_source", "main")
+
+    def _finish(self):
+        record, self._record = self._record, None
+        if record is not None and (self._fetch_rows or self._fetch_seconds):
+            session_trace.add(record, self._fetch_seconds, self._fetch_rows)
+        self._fetch_seconds, self._fetch_rows = 0.0, 0
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        with session_trace.call(self._source(), sql) as record:
+            self._record = record
+            super().execute(sql, parameters)
+            if self.description is None:
+                record["rows"] = max(self.rowcount, 0)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        with session_trace.call(self._source(), sql, batch=0) as record:
+            self._record = record
+            super().executemany(sql, self._counted(record, seq_of_parameters))
+            record["rows"] = max(self.rowcount, 0)
+        return self
+
+    @staticmethod
+    def _counted(record, seq_of_parameters):
+        # Streams the parameters through, so iterators are never held in memory
+        for parameters in seq_of_parameters:
+            record["batch"] += 1
+            yield parameters
+
+    def executescript(self, sql_script):
+        self._finish()
+        with session_trace.call(self._source(), sql_script) as record:
+            self._record = record
+            super().executescript(sql_script)
+        return self
+
+    def _fetched(self, start, rows, done):
+        self._fetch_seconds += time.perf_counter() - start
+        self._fetch_rows += rows
+        if done:
+            self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # e.g. conn.execute(...).fetchone(): the cursor is dropped before its rows run out
+        self._finish()
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors, commits and rollbacks are recorded in session_trace"""
+    trace_source = "main"
+    # URI that other connections open to reach an in-memory snapshot
+    uri = None
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        if not self.in_transaction:
+            return super().commit()
+        with session_trace.call(self.trace_source, "COMMIT"):
+            super().commit()
+
+    def rollback(self):
+        if not self.in_transaction:
+            return super().rollback()
+        with session_trace.call(self.trace_source, "ROLLBACK"):
+            super().rollback()
+
+def apply_profile(conn, profile, persistent=True):
+    """Apply a tuning profile to conn and return the settings now in effect.
+
+    journal_mode is stored in the database file, so it is only changed when
+    persistent is true (the main connection); worker connections only pick
+    up the per-connection settings.
+    """
+    for pragma, value in PROFILES[profile].items():
+        if pragma == "journal_mode" and not persistent:
+            continue
+        try:
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        except sqlite3.Error:
+            pass  # e.g. WAL on a read-only or in-memory database
+    return connection_settings(conn)
+
+def connection_settings(conn):
+    """Current values of the pragmas covered by the profiles"""
+    settings = {}
+    for pragma in PROFILES[DEFAULT_PROFILE]:
+        row = conn.execute(f"PRAGMA {pragma}").fetchone()
+        settings[pragma] = row[0] if row else None  # mmap_size has no value for in-memory databases
+    settings["synchronous"] = ["OFF", "NORMAL", "FULL", "EXTRA"][settings["synchronous"]]
+    settings["temp_store"] = ["DEFAULT", "FILE", "MEMORY"][settings["temp_store"]]
+    settings["journal_mode"] = settings["journal_mode"].upper()
+    return settings
+
+def format_settings(settings):
+    cache = settings["cache_size"]
+    cache = f"{-cache / 1024:.4g} MiB" if cache < 0 else f"{cache} pages"
+    return (f"{settings['journal_mode']} · synchronous {settings['synchronous']} · cache {cache} · "
+            f"mmap {(settings['mmap_size'] or 0) / (1024 * 1024):g} MiB · temp_store {settings['temp_store']} · "
+            f"busy {settings['busy_timeout']} ms")
+
+def database_file(database_name):
+    """Path of the .db file for a database name, in the current directory"""
+    return os.path.join(os.getcwd(), f"{database_name}.db")
+
+def open_database(database_name, profile=DEFAULT_PROFILE):
+    """Open a database by name with a tuning profile; returns (conn, settings)"""
+    global session_profile
+    conn = sqlite3.connect(database_file(database_name), factory=TracedConnection)
+    session_trace.attach(conn, "main")
+    session_profile = profile
+    return conn, apply_profile(conn, profile)
+
+def connect_worker(db_path):
+    """New connection for background work, tuned like the session connection
+    and with the same databases attached"""
+    conn = sqlite3.connect(db_path, check_same_thread=False, factory=TracedConnection, uri=db_path.startswith("file:"))
+    session_trace.attach(conn, "worker")
+    apply_profile(conn, session_profile, persistent=False)
+    for alias, path in attachments.get(db_path, {}).items():
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+    return conn
+
+# Databases attached to a session, by the session's database file: {alias: path}
+attachments = {}
+
+def attach_alias(path):
+    """Schema name for an attached file: its base name, made a valid identifier"""
+    alias = re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0])
+    return alias if alias and not alias[0].isdigit() else f"db_{alias}"
+
+def attach_database(conn, path, alias=None):
+    """ATTACH path to conn (and to its future worker connections); returns the alias"""
+    alias = alias or attach_alias(path)
+    if not re.fullmatch(r"[A-Za-z_]\w*", alias) or alias.lower() in ("main", "temp"):
+        raise ValueError(f"Invalid database alias: {alias}")
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        raise ValueError(f"No such database file: {path}")
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+    db_path = database_path(conn)
+    if db_path is not None:
+        attachments.setdefault(db_path, {})[alias] = path
+        pool.clear(db_path)
+    get_catalog(conn).invalidate()
+    return alias
+
+def detach_database(conn, alias):
+    conn.execute(f"DETACH DATABASE {alias}")
+    db_path = database_path(conn)
+    if db_path is not None:
+        attachments.get(db_path, {}).pop(alias, None)
+        pool.clear(db_path)
+    get_catalog(conn).invalidate()
+
+class ConnectionPool:
+    """Idle worker connections per database file, reused by background work.
+
+    Opening a connection means applying the profile and attaching the
+    workspace's databases, so QueryWorker borrows one here instead. At most
+    size idle connections are kept per database; extra ones are closed.
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, db_path):
+        with self._lock:
+            idle = self._idle.get(db_path)
+            if idle:
+                return idle.pop()
+        return connect_worker(db_path)
+
+    def release(self, conn, db_path):
+        """Return a connection; any open statement or transaction is ended first"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.set_progress_handler(None, 0)
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(db_path, [])
+            if len(idle) < self.size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def clear(self, db_path=None):
+        """Close idle connections, e.g. after the attached databases changed"""
+        with self._lock:
+            paths = [db_path] if db_path is not None else list(self._idle)
+            closing = [conn for path in paths for conn in self._idle.pop(path, [])]
+        for conn in closing:
+            conn.close()
+
+pool = ConnectionPool()
+
+def _checkpoint_path(filename, table_name):
+    return f"{filename}.{table_name}.checkpoint"
+
+def read_import_checkpoint(filename, table_name):
+    """Return rows already committed by an earlier import of this file, or 0"""
+    import json
+    try:
+        with open(_checkpoint_path(filename, table_name), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        stat = os.stat(filename)
+    except (OSError, ValueError):
+        return 0
+    # Only resume against the exact file the checkpoint was written for
+    if checkpoint.get("size") != stat.st_size or checkpoint.get("mtime") != stat.st_mtime:
+        return 0
+    return checkpoint.get("rows", 0)
+
+def _write_import_checkpoint(filename, table_name, rows):
+    import json
+    stat = os.stat(filename)
+    with open(_checkpoint_path(filename, table_name), 'w', encoding='utf-8') as f:
+        json.dump({"rows": rows, "size": stat.st_size, "mtime": stat.st_mtime}, f)
+
+@contextlib.contextmanager
+def fast_load_pragmas(conn, enabled=True):
+    """synchronous=OFF and journal_mode=MEMORY for a bulk load, restored afterwards"""
+    saved_pragmas = {}
+    try:
+        if enabled:
+            for pragma, value in (("synchronous", "OFF"), ("journal_mode", "MEMORY")):
+                saved_pragmas[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+                conn.execute(f"PRAGMA {pragma} = {value}")
+        yield
+    finally:
+        for pragma, value in saved_pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+# Text that converts to a column type without losing anything: no leading
+# zeros, so that codes such as "007" stay TEXT
+_INTEGER_TEXT = re.compile(r"[-+]?(0|[1-9][0-9]*)\Z")
+_REAL_TEXT = re.compile(r"[-+]?((0|[1-9][0-9]*)(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]+)?\Z")
+
+def _to_integer(value):
+    if not _INTEGER_TEXT.match(value):
+        raise ValueError(f"{value!r} is not an integer")
+    number = int(value)
+    if not -2 ** 63 <= number < 2 ** 63:
+        raise ValueError(f"{value} does not fit in 64 bits")
+    return number
+
+def _to_real(value):
+    if not _REAL_TEXT.match(value):
+        raise ValueError(f"{value!r} is not a number")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value} is out of range for REAL")
+    return number
+
+# Converters applied to non-empty CSV values by declared type; empty values
+# become NULL. They accept exactly what infer_csv_types() does: int() and
+# float() alone would also take "007", "1_000" or " 7 "
+CSV_CONVERTERS = {"INTEGER": _to_integer, "REAL": _to_real, "TEXT": str}
+
+def infer_csv_types(filename, sample_rows=IMPORT_SAMPLE_ROWS):
+    """Return (headers, types) for a CSV file, each type INTEGER, REAL or TEXT.
+
+    Only the first sample_rows rows are read. A column is INTEGER or REAL
+    when every non-empty sampled value is; a column with no values at all is
+    TEXT. Values further down that do not fit are rejected on import.
+    """
+    import csv
+    with open(filename, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        headers = next(reader, None)
+        if not headers:
+            raise ValueError(f"{filename} has no header row")
+        candidates = [{"INTEGER", "REAL"} for _ in headers]
+        seen = [False] * len(headers)
+        for row in itertools.islice(reader, sample_rows):
+            for i, value in enumerate(row[:len(headers)]):
+                if not value or not candidates[i]:
+                    continue
+                seen[i] = True
+                if _INTEGER_TEXT.match(value):
+                    if not -2 ** 63 <= int(value) < 2 ** 63:
+                        candidates[i].clear()  # Too long for INTEGER, and REAL would round it
+                    continue
+                candidates[i].discard("INTEGER")
+                if not _REAL_TEXT.match(value) or not math.isfinite(float(value)):
+                    candidates[i].discard("REAL")
+            if not any(candidates):
+                break
+    types = []
+    for found, possible in zip(seen, candidates):
+        if found and "INTEGER" in possible:
+            types.append("INTEGER")
+        elif found and "REAL" in possible:
+            types.append("REAL")
+        else:
+            types.append("TEXT")
+    return headers, types
+
+def create_csv_table(conn, table_name, headers, types):
+    """Create table_name with one column per CSV header, typed as inferred"""
+    definitions = ", ".join(f"{quote_identifier(name)} {decltype}" for name, decltype in zip(headers, types))
+    conn.execute(f"CREATE TABLE {table_name} ({definitions})")
+    conn.commit()
+    get_catalog(conn).invalidate()
+
+def create_indexes(conn, table_name, columns):
+    """One index per column, built after a bulk load and followed by ANALYZE.
+
+    Building an index over loaded rows is a single sort, which is much
+    cheaper than updating it for every inserted row. Returns the statements run.
+    """
+    schema, table = split_table_name(table_name)
+    prefix = "" if schema == "main" else f"{schema}."
+    statements = [f"CREATE INDEX IF NOT EXISTS {prefix}{quote_identifier(f'idx_{table}_{column}')} "
+                  f"ON {table} ({quote_identifier(column)})"
+                  for column in columns]
+    for sql in statements:
+        conn.execute(sql)
+    if statements:
+        conn.execute(f"ANALYZE {table_name}")
+    conn.commit()
+    get_catalog(conn).invalidate()
+    return statements
+
+def _convert_column(convert, values):
+    if "" not in values:
+        # No NULLs: convert in C, which is several times faster
+        if convert is str:
+            return values
+        if convert is _to_integer:
+            if not all(map(_INTEGER_TEXT.match, values)):
+                raise ValueError("not an integer")
+            numbers = list(map(int, values))
+            if numbers and not -2 ** 63 <= min(numbers) <= max(numbers) < 2 ** 63:
+                raise ValueError("integer does not fit in 64 bits")
+            return numbers
+        if convert is _to_real:
+            if not all(map(_REAL_TEXT.match, values)):
+                raise ValueError("not a number")
+            numbers = list(map(float, values))
+            if not all(map(math.isfinite, numbers)):
+                raise ValueError("number out of range for REAL")
+            return numbers
+        return list(map(convert, values))
+    return [convert(value) if value else None for value in values]
+
+def _convert_rows(rows, headers, converters, first_row, on_reject):
+    """rows with every value converted, leaving out rows that do not fit.
+
+    Values are converted a column at a time; only a chunk that has a bad
+    row is redone row by row to find it. on_reject(row_number, column,
+    value) is called per rejected row; column is None when the row has the
+    wrong number of fields.
+    """
+    width = len(headers)
+    if all(len(row) == width for row in rows):
+        try:
+            return list(zip(*[_convert_column(convert, values) for convert, values in zip(converters, zip(*rows))]))
+        except ValueError:
+            pass
+    converted = []
+    for number, row in enumerate(rows, first_row):
+        if len(row) != width:
+            on_reject(number, None, row)
+            continue
+        try:
+            converted.append(tuple(convert(value) if value else None for convert, value in zip(converters, row)))
+        except ValueError:
+            column = next(i for i, (convert, value) in enumerate(zip(converters, row))
+                          if value and not _converts(convert, value))
+            on_reject(number, headers[column], row[column])
+    return converted
+
+def _converts(convert, value):
+    try:
+        convert(value)
+    except ValueError:
+        return False
+    return True
+
+def bulk_import_csv(conn, table_name, filename, chunk_size=IMPORT_CHUNK_SIZE,
+                    fast_load=False, resume_from=0, on_progress=None, types=None, on_reject=None):
+    """Stream a CSV file into a table, one transaction per chunk of rows.
+
+    Rows are inserted with executemany and committed every chunk_size rows;
+    after each commit a checkpoint is written next to the CSV so a failed
+    load can continue with resume_from=read_import_checkpoint(...).
+    on_progress(rows_done, bytes_read, total_bytes) is called after each chunk.
+
+    With types (one of CSV_CONVERTERS per column), values are inserted as
+    numbers and NULLs instead of text. Rows that do not convert are skipped
+    and passed to on_reject(row_number, column, value).
+    Returns the number of rows imported by this call.
+    """
+    import csv
+    total_bytes = os.path.getsize(filename)
+    bytes_read = [0]
+
+    def decoded_lines(f):
+        for raw in f:
+            bytes_read[0] += len(raw)
+            yield raw.decode('utf-8')
+
+    cursor = conn.cursor()
+    conn.commit()
+    imported = 0
+    with fast_load_pragmas(conn, fast_load):
+        with open(filename, 'rb') as f:
+            reader = csv.reader(decoded_lines(f))
+            headers = next(reader)
+            sql = (f"INSERT INTO {table_name} ({','.join(map(quote_identifier, headers))}) "
+                   f"VALUES ({','.join(['?' for _ in headers])})")
+
+            converters = [CSV_CONVERTERS[decltype] for decltype in types] if types else None
+
+            # Skip rows committed by a previous run
+            for _ in itertools.islice(reader, resume_from):
+                pass
+
+            done = resume_from
+            while True:
+                chunk = list(itertools.islice(reader, chunk_size))
+                if not chunk:
+                    break
+                rows = chunk
+                if converters:
+                    rows = _convert_rows(chunk, headers, converters, done + 1, on_reject or (lambda *reject: None))
+                try:
+                    cursor.execute("BEGIN")
+                    cursor.executemany(sql, rows)
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+                imported += len(rows)
+                done += len(chunk)
+                _write_import_checkpoint(filename, table_name, done)
+                if on_progress:
+                    on_progress(done, bytes_read[0], total_bytes)
+
+    # Finished cleanly, nothing left to resume
+    try:
+        os.remove(_checkpoint_path(filename, table_name))
+    except OSError:
+        pass
+    return imported
+
+def iter_batches(cursor, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the pending result of cursor in fetchmany-sized lists"""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+def csv_chunks(columns, batches):
+    """Render CSV text one batch at a time"""
+    import csv, io
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def _json_default(value):
+    # JSON has no binary type: BLOBs are written as base64 text
+    if isinstance(value, bytes):
+        import base64
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def json_array_chunks(columns, batches):
+    """Render a pretty-printed JSON array without holding it in memory"""
+    import json
+    first = True
+    for rows in batches:
+        items = []
+        for row in rows:
+            item = json.dumps(dict(zip(columns, row)), indent=2, ensure_ascii=False, default=_json_default)
+            items.append("  " + item.replace("\n", "\n  "))
+        yield ("[\n" if first else ",\n") + ",\n".join(items)
+        first = False
+    yield "[]" if first else "\n]"
+
+def ndjson_chunks(columns, batches):
+    """Render one JSON object per line"""
+    import json
+    for rows in batches:
+        yield "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n"
+                      for row in rows)
+
+def _markdown_cell(value):
+    # A bare | or line break would end the cell or the row
+    text = str(value).replace("|", "\\|")
+    return text.replace("\r\n", "<br>").replace("\r", "<br>").replace("\n", "<br>")
+
+def markdown_chunks(table_name, columns, batches):
+    """Render a Markdown table one batch at a time"""
+    yield f"# Table: {table_name}\n\n"
+    yield "| " + " | ".join(map(_markdown_cell, columns)) + " |\n"
+    yield "| " + " | ".join(["---" for _ in columns]) + " |"
+    for rows in batches:
+        yield "".join("\n| " + " | ".join(map(_markdown_cell, row)) + " |" for row in rows)
+
+EXPORT_FORMATS = {
+    "csv": ".csv",
+    "json": ".json",
+    "ndjson": ".ndjson",
+    "markdown": ".md",
+    "pcol": ".pcol",
+}
+
+COMPRESSIONS = {
+    "none": "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+@contextlib.contextmanager
+def open_export_file(filename, compression="none"):
+    """Open a text file for writing, compressing on the fly if requested.
+
+    filename "-" writes to standard output, which is left open afterwards.
+    """
+    import io
+    with contextlib.ExitStack() as stack:
+        if filename == "-":
+            sys.stdout.flush()
+            raw = sys.stdout.buffer
+        else:
+            raw = stack.enter_context(open(filename, 'wb'))
+        if compression == "gzip":
+            import gzip
+            raw = stack.enter_context(gzip.GzipFile(fileobj=raw, mode='wb'))
+        elif compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+            raw = stack.enter_context(zstandard.ZstdCompressor().stream_writer(raw, closefd=False))
+        text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        try:
+            yield text
+        finally:
+            text.flush()
+            text.detach()
+        raw.flush()
+
+def write_rows(cursor, fmt, filename, compression="none", title="result", batch_size=EXPORT_BATCH_SIZE):
+    """Stream the pending result of cursor into filename and return the row count.
+
+    Rows are pulled with fetchmany and written batch by batch, so memory use
+    does not depend on the size of the result.
+    """
+    if fmt == "pcol":
+        return _write_pcol(cursor, filename, compression, title, batch_size=batch_size)
+    columns = [desc[0] for desc in cursor.description]
+    
+    row_count = 0
+    def counted(batches):
+        nonlocal row_count
+        for rows in batches:
+            row_count += len(rows)
+            yield rows
+    batches = counted(iter_batches(cursor, batch_size))
+    
+    if fmt == "csv":
+        chunks = csv_chunks(columns, batches)
+    elif fmt == "json":
+        chunks = json_array_chunks(columns, batches)
+    elif fmt == "ndjson":
+        chunks = ndjson_chunks(columns, batches)
+    elif fmt == "markdown":
+        chunks = markdown_chunks(title, columns, batches)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    
+    with open_export_file(filename, compression) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return row_count
+
+def _write_pcol(cursor, filename, compression, title, **options):
+    from scripts.columnar import write_pcol
+    if compression != "none":
+        raise ValueError("pcol files are memory-mapped when loaded and cannot be compressed")
+    return write_pcol(cursor, filename, title, **options)
+
+def export_table(cursor, table_name, fmt, filename, compression="none", batch_size=EXPORT_BATCH_SIZE):
+    """Stream a whole table into filename and return the number of rows written"""
+    if fmt == "pcol":
+        # Keep the declared types so the dump can recreate the table
+        conn = cursor.connection
+        types = [col[2] for col in get_catalog(conn).columns(table_name)]
+        database, table = split_table_name(table_name)
+        schema = conn.execute(f"SELECT sql FROM {database}.sqlite_master WHERE type = 'table' AND name = ?",
+                              (table,)).fetchone()
+        cursor.execute(f"SELECT * FROM {table_name}")
+        return _write_pcol(cursor, filename, compression, table_name, types=types,
+                           schema=schema[0] if schema else None, batch_size=batch_size)
+    cursor.execute(f"SELECT * FROM {table_name}")
+    return write_rows(cursor, fmt, filename, compression, table_name, batch_size)
+
+def _export_worker(task):
+    """Export one table in a pool process; returns its throughput stats"""
+    db_path, table_name, fmt, filename, compression, label = task
+    from urllib.parse import quote
+    conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True)
+    try:
+        start = time.perf_counter()
+        rows = export_table(conn.cursor(), table_name, fmt, filename, compression)
+        seconds = time.perf_counter() - start
+    finally:
+        conn.close()
+    return {
+        "table": label,
+        "file": filename,
+        "rows": rows,
+        "bytes": os.path.getsize(filename),
+        "seconds": seconds,
+    }
+
+def table_sizes(conn, schema="main"):
+    """Bytes used per table of one database (indexes excluded), or {} if dbstat is unavailable"""
+    prefix = "" if schema == "main" else f"{schema}."
+    try:
+        return {prefix + name: size for name, size in
+                conn.execute("SELECT name, SUM(pgsize) FROM dbstat(?) GROUP BY name", (schema,))}
+    except sqlite3.Error:
+        return {}
+
+def export_database(conn, out_dir, fmt="csv", compression="none", workers=None,
+                    snapshot=True, tables=None, on_table_done=None):
+    """Export every table to its own file in out_dir using a process pool.
+
+    Each worker opens its own read-only connection. With snapshot=True the
+    database (and each attached one holding exported tables) is first
+    copied with the backup API so that all tables come from one consistent
+    point in time, even if it is written meanwhile. Tables of attached
+    databases are exported as schema.table files.
+    Tables are scheduled largest first to keep the pool busy. Returns one
+    stats dict per table, in completion order.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import tempfile
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    catalog = get_catalog(conn)
+    tables = tables or catalog.all_tables()
+    schemas = sorted({split_table_name(table)[0] for table in tables})
+    sizes = {}
+    for schema in schemas:
+        sizes.update(table_sizes(conn, schema))
+    tables = sorted(tables, key=lambda table: sizes.get(table, 0), reverse=True)
+    os.makedirs(out_dir, exist_ok=True)
+    
+    with contextlib.ExitStack() as stack:
+        files = dict(catalog.databases())
+        files["main"] = database_path(conn)
+        paths = {}
+        temp_dir = None
+        for schema in schemas:
+            db_path = files.get(schema)
+            if snapshot or not db_path or db_path.startswith("file:"):
+                if temp_dir is None:
+                    temp_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="poledb-export-"))
+                db_path = os.path.join(temp_dir, f"{schema}.db")
+                copy = sqlite3.connect(db_path)
+                try:
+                    conn.backup(copy, name=schema)
+                finally:
+                    copy.close()
+            paths[schema] = db_path
+        
+        suffix = EXPORT_FORMATS[fmt] + COMPRESSIONS[compression]
+        tasks = []
+        for table in tables:
+            schema, name = split_table_name(table)
+            tasks.append((paths[schema], name, fmt, os.path.join(out_dir, table + suffix), compression, table))
+        results = []
+        if not tasks:
+            return results
+        workers = workers or min(len(tasks), os.cpu_count() or 1)
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+        futures = [executor.submit(_export_worker, task) for task in tasks]
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_table_done:
+                    on_table_done(result, len(results), len(tasks))
+        except BaseException:
+            # Don't start the remaining tables after a failure or Ctrl+C
+            executor.shutdown(cancel_futures=True)
+            raise
+    return results
+
+def backup_database(conn, target, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP, on_progress=None):
+    """Copy the live database into target with the backup API; returns a stats dict.
+
+    target is a file path or an open connection. Pages are copied a step at
+    a time, and between steps the source is unlocked for sleep seconds, so
+    other connections can keep writing (SQLite restarts the copy when they
+    do). A file target is written next to itself and renamed into place once
+    complete. on_progress(remaining, total, bytes_per_second) is called after
+    each step. Like vacuum(), it commits a pending transaction on conn first.
+    """
+    if conn.in_transaction:
+        # A stepped copy from a connection in a write transaction never completes
+        conn.commit()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    start = time.perf_counter()
+    steps = [0, 0]  # steps taken, total pages
+    
+    def progress(status, remaining, total):
+        steps[0] += 1
+        steps[1] = total
+        if on_progress:
+            elapsed = time.perf_counter() - start
+            on_progress(remaining, total, (total - remaining) * page_size / elapsed if elapsed else 0.0)
+        # Connection.backup itself only sleeps when the source is busy
+        if remaining and sleep:
+            time.sleep(sleep)
+    
+    if isinstance(target, sqlite3.Connection):
+        conn.backup(target, pages=pages, progress=progress, sleep=sleep)
+        name = getattr(target, "uri", None) or database_path(target) or ":memory:"
+    else:
+        name = os.path.abspath(target)
+        if name == database_path(conn):
+            raise ValueError("The backup target is the database itself")
+        partial = name + ".part"
+        dest = sqlite3.connect(partial)
+        try:
+            conn.backup(dest, pages=pages, progress=progress, sleep=sleep)
+        except BaseException:
+            dest.close()
+            os.remove(partial)
+            raise
+        dest.close()
+        # Journal files of an older database at the target would not match the copy
+        for suffix in ("-journal", "-wal", "-shm"):
+            if os.path.exists(name + suffix):
+                os.remove(name + suffix)
+        os.replace(partial, name)
+    return {"target": name, "pages": steps[1], "bytes": steps[1] * page_size,
+            "seconds": time.perf_counter() - start, "steps": steps[0]}
+
+_snapshot_ids = itertools.count(1)
+
+def snapshot_database(conn, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP, on_progress=None):
+    """Back the database up into a shared-cache in-memory database; returns (connection, stats).
+
+    Worker connections reach the snapshot through its URI (connection.uri)
+    for as long as the returned connection stays open.
+    """
+    uri = f"file:poledb-snapshot-{os.getpid()}-{next(_snapshot_ids)}?mode=memory&cache=shared"
+    snapshot = sqlite3.connect(uri, uri=True, factory=TracedConnection)
+    snapshot.uri = uri
+    session_trace.attach(snapshot, "snapshot")
+    try:
+        stats = backup_database(conn, snapshot, pages, sleep, on_progress)
+    except BaseException:
+        snapshot.close()
+        raise
+    return snapshot, stats
+
+def table_stats(conn, table_name, estimate=False):
+    """Row, column and index counts for a table; rows is approximate with estimate=True"""
+    catalog = get_catalog(conn)
+    counter = get_row_counter(conn)
+    rows = counter.cached(table_name)
+    if rows is None:
+        rows = counter.estimate(table_name)[0] if estimate else None
+        if rows is None:
+            rows = counter.count(table_name)
+    return {
+        "table": table_name,
+        "rows": rows,
+        "columns": len(catalog.columns(table_name)),
+        "indexes": len(catalog.indexes(table_name)),
+    }
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1024
+
+def database_size(conn):
+    """Bytes used by the main database: page_count * page_size"""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+
+def has_dbstat(conn):
+    try:
+        conn.execute("SELECT 1 FROM dbstat LIMIT 1").fetchall()
+        return True
+    except sqlite3.Error:
+        return False
+
+def _dbstat_objects(conn):
+    # Fragmentation: pages that do not directly follow the previous page of
+    # the same b-tree in traversal order, i.e. extra seeks for a full scan
+    rows = conn.execute("""
+        SELECT name, COUNT(*), SUM(pgsize), SUM(payload), SUM(unused),
+               SUM(CASE WHEN pagetype = 'leaf' THEN ncell ELSE 0 END), SUM(ncell),
+               SUM(CASE WHEN prev IS NOT NULL AND pageno != prev + 1 THEN 1 ELSE 0 END)
+        FROM (SELECT name, pageno, pagetype, ncell, payload, unused, pgsize,
+                     LAG(pageno) OVER (PARTITION BY name ORDER BY path) AS prev
+              FROM dbstat)
+        GROUP BY name
+    """).fetchall()
+    return {name: {"pages": pages, "bytes": size, "payload": payload, "unused": unused,
+                   "leaf_cells": leaf_cells, "cells": cells,
+                   "fragmentation": jumps / pages if pages > 1 else 0.0}
+            for name, pages, size, payload, unused, leaf_cells, cells, jumps in rows}
+
+def _value_size(value):
+    """Approximate bytes SQLite needs to store value in a record"""
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        magnitude = abs(value)
+        for limit, size in ((2, 0), (1 << 7, 1), (1 << 15, 2), (1 << 23, 3), (1 << 31, 4), (1 << 47, 6)):
+            if magnitude < limit:
+                return size
+        return 8
+    if isinstance(value, float):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return len(value)
+
+def _sampled_objects(conn, page_size, samples):
+    # No dbstat: size rows from a rowid sample and scale by the estimated count
+    import random
+    counter = get_row_counter(conn)
+    catalog = get_catalog(conn)
+    objects = {}
+    for table in catalog.tables():
+        rows = counter.cached(table)
+        if rows is None:
+            rows = counter.estimate(table)[0] or 0
+        columns = catalog.column_names(table)
+        sample = []
+        try:
+            low, high = conn.execute(f"SELECT min(rowid), max(rowid) FROM {table}").fetchone()
+            if low is not None:
+                for _ in range(samples):
+                    row = conn.execute(f"SELECT * FROM {table} WHERE rowid >= ? LIMIT 1",
+                                       (random.randint(low, high),)).fetchone()
+                    if row:
+                        sample.append(row)
+        except sqlite3.Error:
+            sample = conn.execute(f"SELECT * FROM {table} LIMIT {samples}").fetchall()
+        # Record header and cell overhead of roughly one byte per column plus a few per row
+        widths = [sum(map(_value_size, row)) + len(row) + 4 for row in sample]
+        avg_row = sum(widths) / len(widths) if widths else 0
+        size = avg_row * rows
+        objects[table] = {"pages": -(-int(size) // page_size), "bytes": int(size), "payload": None,
+                          "unused": None, "leaf_cells": rows, "cells": rows, "fragmentation": None}
+        for index in catalog.indexes(table):
+            positions = [columns.index(col) for col in index["columns"] if col in columns]
+            widths = [sum(_value_size(row[pos]) for pos in positions) + len(positions) + 12 for row in sample]
+            size = (sum(widths) / len(widths) if widths else 0) * rows
+            objects[index["name"]] = {"pages": -(-int(size) // page_size), "bytes": int(size), "payload": None,
+                                      "unused": None, "leaf_cells": rows, "cells": rows, "fragmentation": None}
+    return objects
+
+def storage_report(conn, samples=200):
+    """Page, size and fragmentation figures for the database and each table and index.
+
+    Uses the dbstat virtual table when SQLite was built with it; otherwise
+    sizes are estimated from a sample of rows and marked as such.
+    """
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    auto_vacuum = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}[conn.execute("PRAGMA auto_vacuum").fetchone()[0]]
+    exact = has_dbstat(conn)
+    objects = _dbstat_objects(conn) if exact else _sampled_objects(conn, page_size, samples)
+
+    owners = {name: (kind, table) for kind, name, table in
+              conn.execute("SELECT type, name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')")}
+    owners["sqlite_schema"] = owners["sqlite_master"] = ("table", "sqlite_schema")
+    report = []
+    for name, stats in objects.items():
+        kind, table = owners.get(name, ("table", name))
+        # Table rows live in leaf cells only; index entries in every cell
+        leaf_cells, cells = stats.pop("leaf_cells"), stats.pop("cells")
+        entries = leaf_cells if kind == "table" else cells
+        size = stats["payload"] if stats["payload"] is not None else stats["bytes"]
+        report.append(dict(stats, name=name, type=kind, table=table, entries=entries,
+                           avg_entry=size / entries if entries else 0,
+                           share=stats["bytes"] / (page_size * page_count) if page_count else 0))
+    report.sort(key=lambda obj: obj["bytes"], reverse=True)
+    return {
+        "page_size": page_size,
+        "page_count": page_count,
+        "size": page_size * page_count,
+        "freelist_count": freelist,
+        "freelist_ratio": freelist / page_count if page_count else 0,
+        "auto_vacuum": auto_vacuum,
+        "exact": exact,
+        "objects": report,
+    }
+
+def _track_progress(conn, on_progress, target=None):
+    # Calls on_progress(vm_steps, bytes_written) every PROGRESS_STEPS instructions
+    steps = [0]
+    def handler():
+        steps[0] += PROGRESS_STEPS
+        written = os.path.getsize(target) if target and os.path.exists(target) else None
+        on_progress(steps[0], written)
+        return 0
+    conn.set_progress_handler(handler if on_progress else None, PROGRESS_STEPS)
+
+def vacuum(conn, into=None, on_progress=None):
+    """VACUUM (or VACUUM INTO a new file); returns (bytes before, bytes after).
+
+    With into, "after" is the size of the new file and conn is unchanged.
+    """
+    conn.commit()
+    before = database_size(conn)
+    if into is not None and os.path.exists(into):
+        raise ValueError(f"{into} already exists")
+    _track_progress(conn, on_progress, into)
+    try:
+        if into is None:
+            conn.execute("VACUUM")
+        else:
+            conn.execute("VACUUM INTO ?", (into,))
+    finally:
+        conn.set_progress_handler(None, 0)
+    if into is None:
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return before, database_size(conn)
+    return before, os.path.getsize(into)
+
+def incremental_vacuum(conn, step_pages=1000, on_progress=None):
+    """Release free pages back to the file system; returns (bytes before, bytes after).
+
+    Needs auto_vacuum=INCREMENTAL. Pages are freed step_pages at a time and
+    on_progress(pages_freed, pages_to_free) is called after each step.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        raise ValueError("incremental_vacuum needs auto_vacuum=INCREMENTAL "
+                         "(set PRAGMA auto_vacuum = INCREMENTAL, then run a full VACUUM once)")
+    conn.commit()
+    before = database_size(conn)
+    total = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    freed = 0
+    while freed < total:
+        conn.execute(f"PRAGMA incremental_vacuum({step_pages})").fetchall()
+        conn.commit()
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if total - remaining <= freed:
+            break
+        freed = total - remaining
+        if on_progress:
+            on_progress(freed, total)
+    return before, database_size(conn)
+
+# Tasks of the maintenance scheduler, in menu order
+MAINTENANCE_TASKS = {
+    "quick_check": "PRAGMA quick_check: page and record structure",
+    "integrity_check": "PRAGMA integrity_check: quick_check plus index contents",
+    "analyze": "ANALYZE (sampled, analysis_limit) to refresh planner statistics",
+    "optimize": "PRAGMA optimize: re-analyze tables whose statistics are stale",
+    "checkpoint": "PRAGMA wal_checkpoint(PASSIVE): copy the WAL back into the database",
+    "incremental_vacuum": "release free pages (auto_vacuum=INCREMENTAL only)",
+}
+# Seconds between scheduled runs; tasks missing here only run on request
+MAINTENANCE_SCHEDULE = {"quick_check": 6 * 3600, "optimize": 3600, "checkpoint": 300, "incremental_vacuum": 3600}
+
+def run_maintenance(conn, task, throttle=0.0, should_stop=None):
+    """Run one maintenance task on conn; returns a log record.
+
+    The record has ts, task, seconds, status (ok, problem, skipped, error or
+    stopped) and a one-line result. Checks cover the whole file, including
+    the freelist and pages no table owns. With a throttle they go table by
+    table instead, each in its own read transaction, and sleep throttle
+    seconds per second of work in between; should_stop() returning True
+    ends them early.
+    """
+    record = {"ts": time.time(), "task": task, "seconds": 0.0, "status": "ok", "result": ""}
+    start = time.perf_counter()
+    try:
+        if task in ("quick_check", "integrity_check"):
+            problems = []
+            if not throttle:
+                problems.extend(row[0] for row in conn.execute(f"PRAGMA {task}") if row[0] != "ok")
+                summary = "ok, whole database checked"
+            else:
+                tables = [row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table' AND sql NOT LIKE 'CREATE VIRTUAL TABLE%'")]
+                checked = 0
+                for table in tables:
+                    if should_stop and should_stop():
+                        record["status"] = "stopped"
+                        break
+                    began = time.perf_counter()
+                    problems.extend(row[0] for row in conn.execute(f'PRAGMA {task}("{table}")') if row[0] != "ok")
+                    checked += 1
+                    time.sleep((time.perf_counter() - began) * throttle)
+                summary = f"ok, {checked} of {len(tables)} tables checked (freelist not checked)"
+            if problems:
+                record["status"] = "problem"
+                record["result"] = "; ".join(problems[:3]) + (f" (+{len(problems) - 3} more)" if len(problems) > 3 else "")
+            else:
+                record["result"] = summary
+        elif task in ("analyze", "optimize"):
+            # Write tasks are not throttled: sleeping would hold the write lock longer
+            conn.execute("PRAGMA analysis_limit = 400")
+            conn.execute("ANALYZE" if task == "analyze" else "PRAGMA optimize").fetchall()
+            conn.commit()
+            record["result"] = "statistics updated"
+        elif task == "checkpoint":
+            busy_flag, frames, copied = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            if frames < 0:
+                record["status"], record["result"] = "skipped", "not in WAL mode"
+            else:
+                record["result"] = f"{copied:,} of {frames:,} WAL frames copied" + (" (readers active)" if busy_flag else "")
+        elif task == "incremental_vacuum":
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                record["status"], record["result"] = "skipped", "auto_vacuum is not INCREMENTAL"
+            else:
+                before, after = incremental_vacuum(conn)
+                record["result"] = f"{format_bytes(before - after)} released"
+        else:
+            raise ValueError(f"Unknown maintenance task: {task}")
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.rollback()
+        record["status"], record["result"] = "error", str(e)
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+def append_maintenance_log(filename, records):
+    """Append maintenance records to filename as NDJSON"""
+    import json
+    with open(filename, 'a', encoding='utf-8') as f:
+        for record in records:
+            entry = dict(record, seconds=round(record["seconds"], 6),
+                         ts=time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record["ts"])))
+            f.write(json.dumps(entry) + "\n")
+
+class MaintenanceScheduler:
+    """Run maintenance tasks on a background thread with its own connection.
+
+    A task runs when its interval in schedule has passed and the session is
+    idle: the main connection has run no SQL for idle_seconds. Tasks asked
+    for with run_now() start right away. Results go to log and, when
+    log_file is set, are appended to it as NDJSON.
+    """
+
+    def __init__(self, db_path, schedule=None, idle_seconds=30, throttle=1.0, log_file=None):
+        self.db_path = db_path
+        self.schedule = dict(MAINTENANCE_SCHEDULE if schedule is None else schedule)
+        self.idle_seconds = idle_seconds
+        self.throttle = throttle
+        self.log_file = log_file
+        self.log = deque(maxlen=200)
+        self.last_run = {}
+        self.running = None
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread; a running check stops after its current table"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_now(self, task):
+        if task not in MAINTENANCE_TASKS:
+            raise ValueError(f"Unknown maintenance task: {task}")
+        self._pending.append(task)
+        self._wake.set()
+
+    def idle(self):
+        last = session_trace.last_seen.get("main")
+        return last is None or time.monotonic() - last >= self.idle_seconds
+
+    def due(self):
+        """Scheduled tasks whose interval has passed, most overdue first"""
+        now = time.monotonic()
+        overdue = [(now - self.last_run.get(task, self._started) - interval, task)
+                   for task, interval in self.schedule.items()]
+        return [task for late, task in sorted(overdue, reverse=True) if late >= 0]
+
+    def _next_task(self):
+        if self._pending:
+            return self._pending.popleft()
+        due = self.due()
+        if due and self.idle():
+            return due[0]
+        return None
+
+    def _loop(self):
+        conn = None
+        try:
+            while not self._stop.is_set():
+                requested = bool(self._pending)
+                task = self._next_task()
+                if task is None:
+                    self._wake.wait(1.0)
+                    self._wake.clear()
+                    continue
+                self.running = task
+                # Tasks asked for with run_now() check the whole file; scheduled ones go easy
+                throttle = 0.0 if requested else self.throttle
+                try:
+                    if conn is None:
+                        conn = connect_worker(self.db_path)
+                        session_trace.attach(conn, "maintenance")
+                    record = run_maintenance(conn, task, throttle, self._stop.is_set)
+                except Exception as e:
+                    # Keep the thread alive: log the failure and start over on a fresh connection
+                    record = {"ts": time.time(), "task": task, "seconds": 0.0, "status": "error",
+                              "result": f"{type(e).__name__}: {e}"}
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                self.running = None
+                self.last_run[task] = time.monotonic()
+                try:
+                    self.add_record(record)
+                except OSError as e:
+                    self.log.append({"ts": time.time(), "task": task, "seconds": 0.0, "status": "error",
+                                     "result": f"could not write {self.log_file}: {e}"})
+        finally:
+            self.running = None
+            if conn is not None:
+                conn.close()
+
+    def add_record(self, record):
+        self.log.append(record)
+        if self.log_file:
+            append_maintenance_log(self.log_file, [record])
+
+_schedulers = {}
+
+def get_scheduler(conn):
+    """Shared MaintenanceScheduler for a connection's database file (not started)"""
+    if conn not in _schedulers:
+        _schedulers[conn] = MaintenanceScheduler(database_path(conn))
+    return _schedulers[conn]
+
+def release_scheduler(conn):
+    scheduler = _schedulers.pop(conn, None)
+    if scheduler is not None:
+        scheduler.stop()
+
+def _begin(conn):
+    conn.commit()
+    conn.execute("BEGIN")
+
+def count_where(conn, table_name, where):
+    """Rows a WHERE clause matches; the dry run before a bulk change"""
+    return conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE {where}").fetchone()[0]
+
+def _run_in_transaction(conn, sql, params=(), many=False):
+    # Leaves the transaction open for the caller to commit or roll back
+    _begin(conn)
+    try:
+        cursor = conn.executemany(sql, params) if many else conn.execute(sql, params)
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return cursor.rowcount
+
+def update_where(conn, table_name, assignments, where):
+    """UPDATE ... SET assignments WHERE where in a new, still open transaction; returns the rowcount"""
+    return _run_in_transaction(conn, f"UPDATE {table_name} SET {assignments} WHERE {where}")
+
+def delete_where(conn, table_name, where):
+    """DELETE ... WHERE where in a new, still open transaction; returns the rowcount"""
+    return _run_in_transaction(conn, f"DELETE FROM {table_name} WHERE {where}")
+
+def insert_rows(conn, table_name, columns, rows):
+    """executemany INSERT in a new, still open transaction; returns the rowcount"""
+    sql = f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({','.join('?' for _ in columns)})"
+    return _run_in_transaction(conn, sql, rows, many=True)
+
+def parse_row_block(lines, columns, known_columns=None):
+    """Parse pasted CSV/TSV lines into (columns, rows).
+
+    The delimiter is sniffed from the text. A first line naming only
+    known_columns (default: columns) is used as the header, otherwise values
+    map onto columns in order. Empty fields become NULL.
+    """
+    import csv
+    lines = [line for line in lines if line.strip()]
+    if not lines:
+        return columns, []
+    try:
+        dialect = csv.Sniffer().sniff("\n".join(lines[:20]), delimiters=",\t;|")
+    except csv.Error:
+        dialect = csv.excel
+    records = list(csv.reader(lines, dialect))
+    known = {name.lower(): name for name in known_columns or columns}
+    if all(field.strip().lower() in known for field in records[0]):
+        columns = [known[field.strip().lower()] for field in records[0]]
+        records = records[1:]
+    rows = []
+    for number, record in enumerate(records, 1):
+        if len(record) != len(columns):
+            raise ValueError(f"Row {number} has {len(record)} values, expected {len(columns)} ({', '.join(columns)})")
+        rows.append([value if value != "" else None for value in record])
+    return columns, rows
+
+def _number_or_text(value):
+    if _INTEGER_TEXT.match(value):
+        return int(value)
+    if _REAL_TEXT.match(value):
+        return float(value)
+    return value
+
+class EditBuffer:
+    """Row changes queued in memory and applied together in one transaction.
+
+    Rows are addressed by a tuple of all primary key columns, or by rowid.
+    apply() groups consecutive changes of the same shape into one
+    executemany and leaves the transaction open, so the result can be
+    previewed before commit() or rollback().
+    """
+
+    def __init__(self, conn, table_name):
+        self.conn = conn
+        self.table_name = table_name
+        self.key_columns = get_catalog(conn).primary_key_columns(table_name) or ["rowid"]
+        self.key = ", ".join(self.key_columns)  # For display
+        declared = {col[1]: col[2] for col in get_catalog(conn).columns(table_name)}
+        # Key columns without a declared type compare values as stored, so typed-in numbers must be numbers
+        self._untyped = [declared.get(col, "INTEGER").strip() == "" for col in self.key_columns]
+        self.changes = []  # (op, key tuple, {column: value})
+        self.applied = False
+
+    def where(self):
+        """WHERE condition matching one row by its key"""
+        return " AND ".join(f"{col} = ?" for col in self.key_columns)
+
+    def parse_key(self, text):
+        """Key tuple from comma separated values, or None if the count is wrong.
+
+        Columns with a declared type convert the text themselves; for
+        untyped ones, numbers are passed as numbers, which is how they are
+        stored.
+        """
+        values = tuple(value.strip() for value in text.split(","))
+        if len(values) != len(self.key_columns) or not all(values):
+            return None
+        return tuple(_number_or_text(value) if untyped else value for value, untyped in zip(values, self._untyped))
+
+    def __len__(self):
+        return len(self.changes)
+
+    def insert(self, values):
+        self.changes.append(("insert", None, dict(values)))
+
+    def update(self, key, values):
+        self.changes.append(("update", tuple(key), dict(values)))
+
+    def delete(self, key):
+        self.changes.append(("delete", tuple(key), {}))
+
+    def discard(self, index):
+        del self.changes[index]
+
+    def clear(self):
+        self.changes = []
+
+    def statements(self):
+        """(sql, parameter rows) per run of same-shaped changes, in order"""
+        groups = []
+        for (op, columns), changes in itertools.groupby(
+                self.changes, key=lambda change: (change[0], tuple(change[2]))):
+            changes = list(changes)
+            if op == "insert":
+                sql = (f"INSERT INTO {self.table_name} ({','.join(columns)}) "
+                       f"VALUES ({','.join('?' for _ in columns)})")
+                params = [list(values.values()) for _, _, values in changes]
+            elif op == "update":
+                sql = (f"UPDATE {self.table_name} SET {', '.join(f'{col} = ?' for col in columns)} "
+                       f"WHERE {self.where()}")
+                params = [list(values.values()) + list(key) for _, key, values in changes]
+            else:
+                sql = f"DELETE FROM {self.table_name} WHERE {self.where()}"
+                params = [list(key) for _, key, _ in changes]
+            groups.append((sql, params))
+        return groups
+
+    def apply(self):
+        """Run every queued change in one open transaction; returns rows affected per statement"""
+        _begin(self.conn)
+        counts = []
+        try:
+            for sql, params in self.statements():
+                counts.append((sql, len(params), self.conn.executemany(sql, params).rowcount))
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        self.applied = True
+        return counts
+
+    def commit(self):
+        self.conn.commit()
+        self.applied = False
+        self.clear()
+
+    def rollback(self):
+        """Undo apply(); the queued changes are kept for another try"""
+        self.conn.rollback()
+        self.applied = False
+
+def database_path(conn):
+    """File behind the connection's main database, the URI of an in-memory
+    snapshot, or None for other in-memory databases"""
+    for row in conn.execute("PRAGMA database_list"):
+        if row[1] == "main":
+            return row[2] or getattr(conn, "uri", None)
+    return None
+
+class QueryWorker:
+    """Run one SQL statement on a background thread, on a pooled connection.
+
+    Any step can be cancelled with cancel(), and is aborted by the progress
+    handler once timeout seconds have passed. With page_size set, run() only
+    fetches the first page and keeps the cursor open so fetch() can pull
+    more rows on demand; otherwise every row (up to row_cap) is fetched.
+    """
+
+    def __init__(self, db_path, sql, params=(), timeout=QUERY_TIMEOUT, row_cap=QUERY_ROW_CAP, page_size=None):
+        self.db_path = db_path
+        self.sql = sql
+        self.params = params
+        self.timeout = timeout
+        self.row_cap = row_cap
+        self.page_size = page_size
+        self.columns = None
+        self.rows = []
+        self.rowcount = -1
+        self.exhausted = False
+        self.truncated = False
+        self.error = None
+        self.cancelled = False
+        self.timed_out = False
+        self.vm_steps = 0
+        self.started = None
+        self.finished = None
+        self._conn = None
+        self._cursor = None
+        self._thread = None
+        # Set by ResultCache.worker(): where to store the rows on close, and whether they came from it
+        self.cache = None
+        self.cache_key = None
+        self.cache_version = None
+        self.cached = False
+
+    def _progress(self):
+        self.vm_steps += PROGRESS_STEPS
+        if self.cancelled:
+            return 1
+        if self.timeout and time.monotonic() - self.started > self.timeout:
+            self.timed_out = True
+            return 1
+        return 0
+
+    def _resume(self):
+        """Re-run the query of cached rows and skip past them, to fetch more"""
+        self._conn = pool.acquire(self.db_path)
+        self._conn.set_progress_handler(self._progress, PROGRESS_STEPS)
+        self._cursor = self._conn.execute(self.sql, self.params)
+        skip = len(self.rows)
+        while skip:
+            skipped = len(self._cursor.fetchmany(min(skip, EXPORT_BATCH_SIZE)))
+            if not skipped:
+                break
+            skip -= skipped
+
+    def _fetch(self, count):
+        target = None if count is None else len(self.rows) + count
+        if self._cursor is None and not self.exhausted:
+            self._resume()
+        while not self.exhausted:
+            if self.row_cap and len(self.rows) >= self.row_cap:
+                self.truncated = self._cursor.fetchone() is not None
+                self.exhausted = True
+                break
+            if target is not None and len(self.rows) >= target:
+                break
+            batch = EXPORT_BATCH_SIZE
+            if target is not None:
+                batch = min(batch, target - len(self.rows))
+            if self.row_cap:
+                batch = min(batch, self.row_cap - len(self.rows))
+            rows = self._cursor.fetchmany(batch)
+            if not rows:
+                self.exhausted = True
+            self.rows.extend(rows)
+
+    def _step(self, action):
+        self.started = time.monotonic()
+        self.finished = None
+        try:
+            action()
+        except sqlite3.Error as e:
+            if self._conn is not None and self._conn.in_transaction:
+                self._conn.rollback()
+            self.error = e
+            self.exhausted = True
+        finally:
+            if self.exhausted:
+                self.close()
+            self.finished = time.monotonic()
+
+    def run(self):
+        def execute():
+            if self.cached:
+                return
+            self._conn = pool.acquire(self.db_path)
+            self._conn.set_progress_handler(self._progress, PROGRESS_STEPS)
+            self._cursor = self._conn.execute(self.sql, self.params)
+            if self._cursor.description is not None:
+                self.columns = [desc[0] for desc in self._cursor.description]
+                self._fetch(self.page_size)
+            else:
+                self._conn.commit()
+                self.rowcount = self._cursor.rowcount
+                self.exhausted = True
+        self._step(execute)
+
+    def fetch(self, count=None):
+        """Fetch up to count more rows, or everything left when count is None"""
+        self._step(lambda: self._fetch(count))
+
+    def start(self, action=None, *args):
+        self._thread = threading.Thread(target=action or self.run, args=args, daemon=True)
+        self._thread.start()
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def cancel(self):
+        self.cancelled = True
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.interrupt()
+            except sqlite3.ProgrammingError:
+                pass  # Already closed
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            if self._cursor is not None:
+                self._cursor.close()
+                self._cursor = None
+            pool.release(conn, self.db_path)
+        if self.cache is not None and self.columns is not None and not (self.error or self.cancelled or self.timed_out):
+            self.cache.put(self)
+            self.cache = None
+        self.exhausted = True
+
+    def is_done(self):
+        return self.finished is not None
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+def normalize_sql(sql):
+    """sql with runs of whitespace outside string literals collapsed and trailing semicolons dropped"""
+    parts = re.split(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""", sql.strip().rstrip(";").strip())
+    return "".join(part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts))
+
+def _row_bytes(row):
+    return sys.getsizeof(row) + sum(map(sys.getsizeof, row))
+
+class ResultCache:
+    """LRU cache of query results, reused until the data changes.
+
+    Entries are keyed by database, normalized SQL, parameters and row cap,
+    and stamped with data_version() of every attached database as seen by
+    the session connection. A changed stamp means another connection (or
+    the session itself) wrote something, and the entry is dropped. Partly
+    fetched results are cached too: fetching past the cached rows re-runs
+    the query. Entries are evicted least recently used first once the rows
+    take more than max_bytes.
+    """
+
+    def __init__(self, max_bytes=RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def version(self, conn):
+        return tuple(data_version(conn, schema) for schema, _ in get_catalog(conn).databases())
+
+    def worker(self, conn, sql, params=(), bypass=False, **options):
+        """QueryWorker for sql on conn's database: pre-filled on a hit, else storing its rows on close.
+
+        Only SELECT-like statements are cached; with bypass the query always
+        runs, and its fresh result replaces the cached one.
+        """
+        return self._worker(database_path(conn), sql, params, self.version(conn), bypass, options)
+
+    def related(self, worker, sql, **options):
+        """Cached worker for another query over the same data, e.g. the row count of a result"""
+        return self._worker(worker.db_path, sql, worker.params, worker.cache_version, False, options)
+
+    def _worker(self, db_path, sql, params, version, bypass, options):
+        worker = QueryWorker(db_path, sql, params, **options)
+        if not normalize_sql(sql).upper().startswith(("SELECT", "WITH", "VALUES")):
+            return worker
+        key = (db_path, normalize_sql(sql), tuple(params), worker.row_cap)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["version"] != version:
+                self._drop(key)
+                entry = None
+            if entry is not None and not bypass:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                worker.columns = entry["columns"]
+                worker.rows = list(entry["rows"])
+                worker.exhausted = entry["exhausted"]
+                worker.truncated = entry["truncated"]
+                worker.cached = True
+                worker.started = worker.finished = time.monotonic()
+            elif not bypass:
+                self.misses += 1
+        worker.cache, worker.cache_version, worker.cache_key = self, version, key
+        return worker
+
+    def put(self, worker):
+        """Store (or extend) the result of a finished worker"""
+        size = sum(map(_row_bytes, worker.rows))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(worker.cache_key)
+            self._entries[worker.cache_key] = {
+                "version": worker.cache_version, "columns": worker.columns, "rows": list(worker.rows),
+                "exhausted": worker.exhausted, "truncated": worker.truncated, "bytes": size,
+            }
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry["bytes"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+result_cache = ResultCache()
+
+# (table, column) -> how often it was filtered on this session
+predicate_log = Counter()
+
+def record_predicates(table_name, columns):
+    for column in columns:
+        predicate_log[(table_name, column)] += 1
+
+def referenced_columns(sql, column_names):
+    """Columns of the table mentioned in sql, split into (filtered, other).
+
+    This is a plain identifier match, not a SQL parser: a column counts as
+    filtered when it appears after WHERE/ON and before GROUP/ORDER/LIMIT.
+    """
+    by_lower = {name.lower(): name for name in column_names}
+    where = re.search(r"\b(?:WHERE|ON)\b(.*?)(?:\bGROUP\b|\bORDER\b|\bLIMIT\b|$)", sql, re.I | re.S)
+    filtered = []
+    for word in re.findall(r"[A-Za-z_][A-Za-z0-9_]*", where.group(1) if where else ""):
+        name = by_lower.get(word.lower())
+        if name and name not in filtered:
+            filtered.append(name)
+    other = []
+    for word in re.findall(r"[A-Za-z_][A-Za-z0-9_]*", sql):
+        name = by_lower.get(word.lower())
+        if name and name not in filtered and name not in other:
+            other.append(name)
+    return filtered, other
+
+def explain_query_plan(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN rows as (id, parent, detail)"""
+    return [(row[0], row[1], row[3]) for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def plan_warnings(plan, table_name=None):
+    """Full table scans and temp B-trees found in a query plan"""
+    warnings = []
+    for _, _, detail in plan:
+        scan = re.match(r"SCAN (\S+)", detail)
+        # A virtual table scan with constraints (e.g. FTS5 MATCH) is an index lookup
+        if scan and "USING" not in detail and not re.search(r"VIRTUAL TABLE INDEX \d+:\S", detail):
+            if table_name is None or scan.group(1).lower() == table_name.lower():
+                warnings.append(("scan", f"Full table scan: {detail}"))
+        elif "USE TEMP B-TREE" in detail:
+            warnings.append(("temp", f"Temporary B-tree: {detail}"))
+    return warnings
+
+def suggest_indexes(conn, table_name, plan, filter_columns, other_columns=()):
+    """CREATE INDEX statements worth trying for a query on table_name.
+
+    The first suggestion indexes the columns filtered by this query (plus
+    the other referenced columns, making it covering, when the query names
+    its columns). Columns filtered earlier in the session that still lack
+    an index are suggested after it, most frequent first.
+    """
+    catalog = get_catalog(conn)
+    indexed = [[col.lower() for col in idx['columns']] for idx in catalog.indexes(table_name)]
+    # An INTEGER PRIMARY KEY is the rowid itself and needs no index
+    for col in catalog.columns(table_name):
+        if col[5] and col[2].upper() == "INTEGER" and len(catalog.primary_key_columns(table_name)) == 1:
+            indexed.append([col[1].lower()])
+    
+    def has_index(columns):
+        wanted = [col.lower() for col in columns]
+        return any(cols[:len(wanted)] == wanted for cols in indexed)
+    
+    candidates = []
+    scans = [kind for kind, _ in plan_warnings(plan, table_name) if kind == "scan"]
+    if scans and filter_columns and not has_index(filter_columns):
+        candidates.append(list(filter_columns) + [col for col in other_columns if col not in filter_columns])
+    
+    logged = sorted(((count, column) for (table, column), count in predicate_log.items() if table == table_name), reverse=True)
+    for count, column in logged:
+        covered = any(columns[0] == column for columns in candidates)
+        if not covered and not has_index([column]):
+            candidates.append([column])
+    
+    schema, table = split_table_name(table_name)
+    prefix = "" if schema == "main" else f"{schema}."
+    return [f"CREATE INDEX IF NOT EXISTS {prefix}idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})"
+            for columns in candidates]
+
+def text_columns(conn, table_name):
+    """Columns declared with TEXT affinity (or no type), candidates for a full-text index"""
+    names = []
+    for col in get_catalog(conn).columns(table_name):
+        declared = (col[2] or "").upper()
+        if not declared or any(word in declared for word in ("CHAR", "CLOB", "TEXT")):
+            names.append(col[1])
+    return names
+
+def _fts_triggers(table_name, index_name, columns, key=None):
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{col}" for col in columns)
+    old = ", ".join(f"old.{col}" for col in columns)
+    watched = ", ".join(columns + ([key] if key and key not in columns else []))
+    delete = f"INSERT INTO {index_name}({index_name}, rowid, {cols}) VALUES('delete', old.rowid, {old});"
+    insert = f"INSERT INTO {index_name}(rowid, {cols}) VALUES(new.rowid, {new});"
+    return [
+        f"CREATE TRIGGER {index_name}_ai AFTER INSERT ON {table_name} BEGIN {insert} END",
+        f"CREATE TRIGGER {index_name}_ad AFTER DELETE ON {table_name} BEGIN {delete} END",
+        # Updates that leave the indexed columns alone skip the index entirely
+        f"CREATE TRIGGER {index_name}_au AFTER UPDATE OF {watched} ON {table_name} BEGIN {delete} {insert} END",
+    ]
+
+def _drop_fts(cursor, index_name):
+    for suffix in ("ai", "ad", "au"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {index_name}_{suffix}")
+    cursor.execute(f"DROP TABLE IF EXISTS {index_name}")
+
+def create_fts_index(conn, table_name, columns):
+    """Build an FTS5 index over columns of table_name, kept in sync by triggers.
+
+    The index is an external-content table named <table>_fts, so the text
+    is not stored twice. An existing index on the table is replaced.
+    Returns the number of rows indexed.
+    """
+    catalog = get_catalog(conn)
+    if split_table_name(table_name)[0] != "main":
+        raise ValueError("Full-text indexes are only supported on tables of the main database")
+    if not columns:
+        raise ValueError("Choose at least one column to index")
+    names = {name.lower(): name for name in catalog.column_names(table_name)}
+    missing = [col for col in columns if col.lower() not in names]
+    if missing:
+        raise ValueError(f"No such column: {', '.join(missing)}")
+    columns = [names[col.lower()] for col in columns]
+    try:
+        conn.execute(f"SELECT rowid FROM {table_name} LIMIT 0")
+    except sqlite3.OperationalError:
+        raise ValueError(f"{table_name} is a WITHOUT ROWID table; full-text indexes need a rowid")
+    
+    existing = catalog.full_text_index(table_name)
+    index_name = f"{table_name}_fts"
+    pk = catalog.primary_key_columns(table_name)
+    cursor = conn.cursor()
+    try:
+        _begin(conn)
+        if existing:
+            _drop_fts(cursor, existing['name'])
+        cursor.execute(f"CREATE VIRTUAL TABLE {index_name} USING fts5({', '.join(columns)}, "
+                       f"content='{table_name}', content_rowid='rowid')")
+        for sql in _fts_triggers(table_name, index_name, columns, pk[0] if len(pk) == 1 else None):
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {index_name}({index_name}) VALUES('rebuild')")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        catalog.invalidate()
+    return conn.execute(f"SELECT COUNT(*) FROM {index_name}_docsize").fetchone()[0]
+
+def drop_fts_index(conn, table_name):
+    """Drop the full-text index of table_name and its triggers; False if there was none"""
+    catalog = get_catalog(conn)
+    index = catalog.full_text_index(table_name)
+    if index is None:
+        return False
+    cursor = conn.cursor()
+    try:
+        _begin(conn)
+        _drop_fts(cursor, index['name'])
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        catalog.invalidate()
+    return True
+
+def fts_search_sql(table_name, index, query, column=None, tokens=12):
+    """Ranked MATCH query over a full-text index, as (sql, params).
+
+    The first result column is a snippet with matched terms wrapped in
+    HIGHLIGHT_START/HIGHLIGHT_END, followed by the table's own columns.
+    column restricts the match (and the snippet) to one indexed column.
+    """
+    index_name = index['name']
+    snippet_column = -1
+    if column is not None:
+        snippet_column = [col.lower() for col in index['columns']].index(column.lower())
+        query = f"{{{index['columns'][snippet_column]}}} : ({query})"
+    sql = (f"SELECT snippet({index_name}, {snippet_column}, char({ord(HIGHLIGHT_START)}), char({ord(HIGHLIGHT_END)}), '…', {tokens}) AS match, "
+           f"{table_name}.* FROM {index_name} JOIN {table_name} ON {table_name}.rowid = {index_name}.rowid "
+           f"WHERE {index_name} MATCH ? ORDER BY rank")
+    return sql, (query,)
+
+def data_version(conn, schema="main"):
+    """Token that changes whenever the content of one attached database changes.
+
+    PRAGMA data_version only moves for commits made by other connections,
+    so it is paired with total_changes to also catch writes made through conn.
+    """
+    return (conn.execute(f"PRAGMA {schema}.data_version").fetchone()[0], conn.total_changes)
+
+def estimate_row_count(conn, table_name):
+    """(approximate row count, source) from sqlite_stat1 or max(rowid), or (None, None)"""
+    try:
+        schema, table = split_table_name(table_name)
+        row = conn.execute(f"SELECT stat FROM {schema}.sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)).fetchone()
+        if row and row[0]:
+            return int(row[0].split()[0]), "sqlite_stat1"
+    except (sqlite3.Error, ValueError):
+        pass  # Never analyzed
+    try:
+        # Exact unless rows were deleted or rowids assigned by hand
+        row = conn.execute(f"SELECT max(rowid) FROM {table_name}").fetchone()
+        return row[0] or 0, "max(rowid)"
+    except sqlite3.Error:
+        return None, None  # WITHOUT ROWID table
+
+class RowCounter:
+    """Row counts per table, served from memory until the data changes.
+
+    Exact counts are cached against data_version(); estimate() answers
+    instantly from sqlite_stat1 or max(rowid), and start_count() computes the
+    exact figure on a background connection, picked up by cached() once done.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._counts = {}   # table -> (version, exact count)
+        self._pending = {}  # table -> (version, QueryWorker)
+
+    def cached(self, table_name):
+        """Exact count if it is known for the current data, else None"""
+        version = data_version(self.conn, split_table_name(table_name)[0])
+        pending = self._pending.get(table_name)
+        if pending and pending[1].is_done():
+            del self._pending[table_name]
+            started_version, worker = pending
+            if worker.error is None and not worker.cancelled and worker.rows:
+                self._counts[table_name] = (started_version, worker.rows[0][0])
+        cached = self._counts.get(table_name)
+        if cached and cached[0] == version:
+            return cached[1]
+        return None
+
+    def count(self, table_name):
+        """Exact count, computed on this connection if not cached"""
+        count = self.cached(table_name)
+        if count is None:
+            version = data_version(self.conn, split_table_name(table_name)[0])
+            count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            self._counts[table_name] = (version, count)
+        return count
+
+    def estimate(self, table_name):
+        """(approximate count, source) without scanning, or (None, None)"""
+        return estimate_row_count(self.conn, table_name)
+
+    def start_count(self, table_name):
+        """Start an exact count in the background unless one is running or cached"""
+        if table_name in self._pending or self.cached(table_name) is not None:
+            return
+        db_path = database_path(self.conn)
+        if db_path is None:
+            self.count(table_name)
+            return
+        worker = QueryWorker(db_path, f"SELECT COUNT(*) FROM {table_name}", timeout=0)
+        self._pending[table_name] = (data_version(self.conn, split_table_name(table_name)[0]), worker)
+        worker.start()
+
+    def counting(self, table_name):
+        return table_name in self._pending and not self._pending[table_name][1].is_done()
+
+    def cancel(self):
+        for _, worker in self._pending.values():
+            worker.cancel()
+        self._pending.clear()
+
+_row_counters = {}
+
+def get_row_counter(conn):
+    """Shared RowCounter for a connection"""
+    if conn not in _row_counters:
+        _row_counters[conn] = RowCounter(conn)
+    return _row_counters[conn]
+
+def release_row_counter(conn):
+    counter = _row_counters.pop(conn, None)
+    if counter is not None:
+        counter.cancel()
+
+_HASH_RANGE = 2 ** 64
+# SQLite orders values NULL < numbers < TEXT < BLOB
+_STORAGE_CLASSES = {int: (1, "INTEGER"), float: (1, "REAL"), str: (2, "TEXT"), bytes: (3, "BLOB")}
+
+class ColumnProfile:
+    """Statistics of one column, accumulated a batch of values at a time.
+
+    Null count, storage classes, min/max and value lengths are exact. The
+    number of distinct values is a K-Minimum-Values estimate (exact below
+    kmv_size values), and top() comes from a Misra-Gries summary, so every
+    reported count is at most error() below the true count. All of it takes
+    constant memory, however many rows are added.
+    """
+
+    def __init__(self, name, top_n=PROFILE_TOP_N, kmv_size=PROFILE_KMV_SIZE):
+        self.name = name
+        self.top_n = top_n
+        self.kmv_size = kmv_size
+        self.rows = 0
+        self.nulls = 0
+        self.types = Counter()
+        self.min = None     # (class rank, value), so mixed classes order like SQLite
+        self.max = None
+        self.lengths = Counter()  # Bit length of len(value) -> count, for TEXT and BLOB
+        self.length_min = None
+        self.length_max = None
+        self.length_total = 0
+        self._kmv = []      # Negated smallest hashes, as a max-heap
+        self._kmv_set = set()
+        self._counters = Counter()
+        self._capacity = top_n * 10
+        self._error = 0
+
+    def add(self, values):
+        self.rows += len(values)
+        nulls = values.count(None)
+        if nulls:
+            self.nulls += nulls
+            values = [value for value in values if value is not None]
+        if not values:
+            return
+
+        kinds = set(map(type, values))
+        if len(kinds) == 1:
+            groups = {kinds.pop(): values}
+        else:
+            groups = {}
+            for value in values:
+                groups.setdefault(type(value), []).append(value)
+        for kind, group in groups.items():
+            rank, storage = _STORAGE_CLASSES.get(kind, (3, "BLOB"))
+            self.types[storage] += len(group)
+            low, high = (rank, min(group)), (rank, max(group))
+            self.min = low if self.min is None or low < self.min else self.min
+            self.max = high if self.max is None or high > self.max else self.max
+            if rank >= 2:
+                lengths = list(map(len, group))
+                self.lengths.update(map(int.bit_length, lengths))
+                self.length_total += sum(lengths)
+                self.length_min = min(lengths) if self.length_min is None else min(self.length_min, min(lengths))
+                self.length_max = max(lengths) if self.length_max is None else max(self.length_max, max(lengths))
+
+        batch = Counter(values)
+        # K-Minimum-Values: keep the kmv_size smallest distinct hashes. Hashes
+        # of 1-tuples are well mixed even for small ints, and signed, so they
+        # range over [-2**63, 2**63)
+        hashes = set(map(hash, zip(batch)))
+        if len(self._kmv) >= self.kmv_size:
+            threshold = -self._kmv[0]
+            hashes = [h for h in hashes if h < threshold]
+        for h in hashes:
+            if h in self._kmv_set:
+                continue
+            if len(self._kmv) < self.kmv_size:
+                heapq.heappush(self._kmv, -h)
+                self._kmv_set.add(h)
+            elif h < -self._kmv[0]:
+                self._kmv_set.discard(-heapq.heapreplace(self._kmv, -h))
+                self._kmv_set.add(h)
+
+        # Misra-Gries, merged one batch at a time: cut every counter by the
+        # (capacity + 1)-th largest and drop those that reach zero
+        self._counters.update(batch)
+        if len(self._counters) > self._capacity:
+            cut = heapq.nlargest(self._capacity + 1, self._counters.values())[-1]
+            self._counters = Counter({value: count - cut for value, count in self._counters.items() if count > cut})
+            self._error += cut
+
+    def distinct(self):
+        """Number of distinct non-NULL values, estimated once there are more than kmv_size"""
+        if len(self._kmv) < self.kmv_size:
+            return len(self._kmv)
+        return min(round((self.kmv_size - 1) * _HASH_RANGE / (_HASH_RANGE // 2 - self._kmv[0])), self.rows - self.nulls)
+
+    def distinct_exact(self):
+        return len(self._kmv) < self.kmv_size
+
+    def top(self):
+        """Up to top_n (value, count) pairs of values seen more than once, most frequent first"""
+        return [(value, count) for value, count in self._counters.most_common(self.top_n) if count > 1]
+
+    def error(self):
+        """How much top() counts may fall short of the true counts"""
+        return self._error
+
+    def null_ratio(self):
+        return self.nulls / self.rows if self.rows else 0.0
+
+    def length_histogram(self):
+        """[(shortest, longest, count)] per power-of-two band of TEXT/BLOB lengths"""
+        return [((1 << bits) >> 1, (1 << bits) - 1, self.lengths[bits]) for bits in sorted(self.lengths)]
+
+    def as_dict(self):
+        def plain(bound):
+            if bound is None:
+                return None
+            value = bound[1]
+            return value.hex() if isinstance(value, bytes) else value
+        non_null = self.rows - self.nulls
+        return {
+            "column": self.name,
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "null_ratio": self.null_ratio(),
+            "types": dict(self.types),
+            "distinct": self.distinct(),
+            "distinct_exact": self.distinct_exact(),
+            "min": plain(self.min),
+            "max": plain(self.max),
+            "top": [[value.hex() if isinstance(value, bytes) else value, count] for value, count in self.top()],
+            "top_error": self.error(),
+            "length": None if self.length_min is None else {
+                "min": self.length_min,
+                "max": self.length_max,
+                "avg": self.length_total / sum(self.lengths.values()),
+                "histogram": self.length_histogram(),
+            },
+            "cardinality": self.distinct() / non_null if non_null else 0.0,
+        }
+
+def profile_table(conn, table_name, sample_rows=0, batch_size=EXPORT_BATCH_SIZE, on_progress=None, should_stop=None,
+                  total_rows=None):
+    """Profile every column of a table in one streaming pass.
+
+    With sample_rows, a uniform random sample of that many rows is profiled
+    instead: SQLite picks the rowids in a single scan of the table's
+    narrowest index, keeping only the sample in memory. The table's size is
+    then total_rows if the caller knows it, else an estimate (total_exact is
+    False, and total_rows None for an unanalyzed WITHOUT ROWID table).
+    on_progress(rows) is called per batch; should_stop() returning true
+    abandons the pass, and None is returned. Otherwise returns {table, rows,
+    total_rows, total_exact, sampled, seconds, columns: {name: ColumnProfile}}.
+    """
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    if sample_rows:
+        try:
+            cursor.execute(f"SELECT * FROM {table_name} WHERE rowid IN "
+                           f"(SELECT rowid FROM {table_name} ORDER BY random() LIMIT ?)", (sample_rows,))
+        except sqlite3.OperationalError:
+            # WITHOUT ROWID table
+            cursor.execute(f"SELECT * FROM {table_name} ORDER BY random() LIMIT ?", (sample_rows,))
+    else:
+        cursor.execute(f"SELECT * FROM {table_name}")
+    columns = {desc[0]: ColumnProfile(desc[0]) for desc in cursor.description}
+    rows = 0
+    try:
+        for batch in iter_batches(cursor, batch_size):
+            if should_stop and should_stop():
+                return None
+            for profile, values in zip(columns.values(), zip(*batch)):
+                profile.add(values)
+            rows += len(batch)
+            if on_progress:
+                on_progress(rows)
+    finally:
+        cursor.close()
+    total_exact = True
+    if not sample_rows or rows < sample_rows:
+        total_rows = rows
+    elif total_rows is None:
+        # Counting would cost another full scan, the very thing sampling avoids
+        total_rows, total_exact = estimate_row_count(conn, table_name)[0], False
+        if total_rows is not None:
+            total_rows = max(total_rows, rows)
+    return {
+        "table": table_name,
+        "rows": rows,
+        "total_rows": total_rows,
+        "total_exact": total_exact,
+        "sampled": total_rows is None or total_rows > rows,
+        "seconds": time.perf_counter() - start,
+        "columns": columns,
+    }
+
+def is_indexed(conn, table_name, column):
+    """Whether searches on column can use an index: it leads one, or is the rowid"""
+    catalog = get_catalog(conn)
+    if any(index["columns"] and index["columns"][0].lower() == column.lower() for index in catalog.indexes(table_name)):
+        return True
+    key = catalog.primary_key_columns(table_name)
+    types = {col[1].lower(): col[2].upper() for col in catalog.columns(table_name)}
+    return len(key) == 1 and key[0].lower() == column.lower() and types[column.lower()] == "INTEGER"
+
+def profile_warnings(conn, table_name, columns):
+    """Warnings for searches on unindexed high-cardinality columns, from a cached profile"""
+    profile = get_profiler(conn).cached(table_name)
+    if profile is None:
+        return []
+    warnings = []
+    for column in columns:
+        stats = next((stats for name, stats in profile["columns"].items() if name.lower() == column.lower()), None)
+        if stats is None or is_indexed(conn, table_name, column):
+            continue
+        non_null = stats.rows - stats.nulls
+        if non_null and stats.distinct() >= HIGH_CARDINALITY_RATIO * non_null and stats.distinct() > 1:
+            warnings.append(f"{column} has {'' if stats.distinct_exact() else '~'}{stats.distinct():,} distinct values "
+                            f"in {non_null:,} rows{' sampled' if profile['sampled'] else ''} and no index: "
+                            f"every search on it reads the whole table")
+    return warnings
+
+class TableProfiler:
+    """Column profiles per table, served from memory until the data changes.
+
+    Like RowCounter, results are stamped with data_version() of the table's
+    database, and start() profiles in the background on a pooled connection.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._profiles = {}  # table -> (version, profile)
+        self._running = {}   # table -> state dict shared with the worker thread
+
+    def _version(self, table_name):
+        return data_version(self.conn, split_table_name(table_name)[0])
+
+    def cached(self, table_name):
+        """Profile of the current data if there is one, else None"""
+        state = self._running.get(table_name)
+        if state and state["done"]:
+            del self._running[table_name]
+            if state["profile"] is not None:
+                self._profiles[table_name] = (state["version"], state["profile"])
+        cached = self._profiles.get(table_name)
+        if cached and cached[0] == self._version(table_name):
+            return cached[1]
+        return None
+
+    def start(self, table_name, sample_rows=0):
+        """Profile table_name in the background, unless that is already running"""
+        if table_name in self._running:
+            return
+        state = {"version": self._version(table_name), "rows": 0, "done": False, "cancelled": False,
+                 "profile": None, "error": None, "sample_rows": sample_rows}
+        self._running[table_name] = state
+        db_path = database_path(self.conn)
+        total_rows = get_row_counter(self.conn).cached(table_name) if sample_rows else None
+
+        def run():
+            conn = self.conn if db_path is None else pool.acquire(db_path)
+            try:
+                state["profile"] = profile_table(conn, table_name, sample_rows,
+                                                 on_progress=lambda rows: state.update(rows=rows),
+                                                 should_stop=lambda: state["cancelled"], total_rows=total_rows)
+            except sqlite3.Error as e:
+                state["error"] = e
+            finally:
+                if db_path is not None:
+                    pool.release(conn, db_path)
+                state["done"] = True
+        if db_path is None:
+            run()
+        else:
+            threading.Thread(target=run, daemon=True).start()
+
+    def progress(self, table_name):
+        """State of a running or just finished profile: rows, done, error, sample_rows"""
+        return self._running.get(table_name)
+
+    def cancel(self, table_name=None):
+        for name, state in list(self._running.items()):
+            if table_name is None or name == table_name:
+                state["cancelled"] = True
+                del self._running[name]
+
+_profilers = {}
+
+def get_profiler(conn):
+    """Shared TableProfiler for a connection"""
+    if conn not in _profilers:
+        _profilers[conn] = TableProfiler(conn)
+    return _profilers[conn]
+
+def release_profiler(conn):
+    profiler = _profilers.pop(conn, None)
+    if profiler is not None:
+        profiler.cancel()
+
+class TablePager:
+    """Keyset pagination over a table with a small LRU cache of pages.
+
+    Pages are addressed by the key of the row they start after (or end
+    before), never by OFFSET, so moving through a huge table costs the same
+    on the last page as on the first.
+    """
+
+    def __init__(self, conn, table_name, page_size=PAGE_SIZE, cache_size=PAGE_CACHE_SIZE):
+        self.conn = conn
+        self.table_name = table_name
+        self.page_size = page_size
+        self.cache_size = cache_size
+        self.key_columns = self._find_key_columns()
+        self.columns = []
+        self.rows = []
+        self.page_number = 1
+        self.at_start = True
+        self.at_end = True
+        self._keys = []
+        self._current = ("first", None)
+        self._cache = OrderedDict()
+        self._schema = split_table_name(table_name)[0]
+        self._version = data_version(conn, self._schema)
+        self._load(*self._current)
+
+    def _find_key_columns(self):
+        try:
+            self.conn.execute(f"SELECT rowid FROM {self.table_name} LIMIT 0")
+            return ["rowid"]
+        except sqlite3.OperationalError:
+            # WITHOUT ROWID table: page on the primary key instead
+            return get_catalog(self.conn).primary_key_columns(self.table_name)
+
+    def _query(self, op, anchor):
+        keys = ", ".join(self.key_columns)
+        key_expr = keys if len(self.key_columns) == 1 else f"({keys})"
+        marks = ", ".join("?" for _ in self.key_columns)
+        anchor_expr = marks if len(self.key_columns) == 1 else f"({marks})"
+        descending = op in ("prev", "last")
+        where = ""
+        if op == "next":
+            where = f"WHERE {key_expr} > {anchor_expr}"
+        elif op == "prev":
+            where = f"WHERE {key_expr} < {anchor_expr}"
+        order = ", ".join(f"{col} {'DESC' if descending else 'ASC'}" for col in self.key_columns)
+        sql = f"SELECT {keys}, * FROM {self.table_name} {where} ORDER BY {order} LIMIT {self.page_size + 1}"
+        
+        cursor = self.conn.execute(sql, anchor or ())
+        width = len(self.key_columns)
+        columns = [desc[0] for desc in cursor.description][width:]
+        fetched = cursor.fetchall()
+        more = len(fetched) > self.page_size
+        fetched = fetched[:self.page_size]
+        if descending:
+            fetched.reverse()
+        keys = [tuple(row[:width]) for row in fetched]
+        rows = [row[width:] for row in fetched]
+        return columns, rows, keys, more
+
+    def _load(self, op, anchor):
+        cache_key = (op, anchor)
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            page = self._cache[cache_key]
+        else:
+            page = self._query(op, anchor)
+            self._cache[cache_key] = page
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
+        columns, rows, keys, more = page
+        if not rows and op in ("next", "prev"):
+            return False  # Already at the edge, keep the current page
+        self.columns, self.rows, self._keys = columns, rows, keys
+        self._current = cache_key
+        if op == "first":
+            self.at_start, self.at_end = True, not more
+        elif op == "last":
+            self.at_start, self.at_end = not more, True
+        elif op == "next":
+            self.at_start, self.at_end = False, not more
+        else:
+            self.at_start, self.at_end = not more, False
+        return True
+
+    def refresh(self):
+        """Drop cached pages and reload the current one if the data changed"""
+        version = data_version(self.conn, self._schema)
+        if version == self._version:
+            return False
+        self._version = version
+        self._cache.clear()
+        op, anchor = self._current
+        if not self._load(op, anchor):
+            self.first()
+        return True
+
+    def state(self):
+        """Token that changes whenever the visible page changes"""
+        return (self._current, self._version)
+
+    def first(self):
+        if self._load("first", None):
+            self.page_number = 1
+
+    def last(self):
+        if self._load("last", None):
+            self.page_number = None  # Unknown without counting every row
+
+    def next(self):
+        if self.at_end or not self._keys:
+            return
+        if self._load("next", self._keys[-1]) and self.page_number:
+            self.page_number += 1
+
+    def prev(self):
+        if self.at_start or not self._keys:
+            return
+        if self._load("prev", self._keys[0]) and self.page_number:
+            self.page_number = max(self.page_number - 1, 1)
+
+    def position(self):
+        if self.at_start and self.at_end:
+            return "all rows"
+        if self.at_start:
+            return "first page"
+        if self.at_end:
+            return "last page"
+        return f"page {self.page_number}" if self.page_number else "page ?"
@@ -1,16 +1,129 @@
-import sqlite3, os, readchar, platform, shutil
+import sqlite3, os, re, platform, shutil, time, contextlib, importlib
 from rich.console import Console
-from rich.table import Table
 from rich.align import Align
 from rich.panel import Panel
+from scripts.core import (
+    IMPORT_CHUNK_SIZE, IMPORT_SAMPLE_ROWS, QUERY_TIMEOUT, QUERY_ROW_CAP, RESULT_PAGE_ROWS, DEFAULT_PROFILE,
+    EXPORT_FORMATS, COMPRESSIONS, predicate_log, get_catalog, release_catalog, is_ddl,
+    open_database, format_settings, read_import_checkpoint, bulk_import_csv, export_table, export_database,
+    database_path, QueryWorker, record_predicates, referenced_columns, explain_query_plan,
+    plan_warnings, suggest_indexes, TablePager, EditBuffer, count_where, update_where, delete_where,
+    insert_rows, parse_row_block, get_row_counter, release_row_counter, storage_report, format_bytes,
+    vacuum, incremental_vacuum, session_trace, HIGHLIGHT_START, HIGHLIGHT_END, text_columns,
+    create_fts_index, drop_fts_index, fts_search_sql, MAINTENANCE_TASKS, run_maintenance,
+    append_maintenance_log, get_scheduler, release_scheduler, BACKUP_STEP_PAGES, BACKUP_STEP_SLEEP,
+    backup_database, snapshot_database, attach_database, detach_database, pool, result_cache,
+    CSV_CONVERTERS, infer_csv_types, create_csv_table, create_indexes, PROFILE_SAMPLE_ROWS,
+    PROFILE_FULL_SCAN_ROWS, get_profiler, release_profiler, profile_warnings,
+)
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# readchar is only needed once the first screen waits for a key
+readchar = _LazyModule("readchar")
 
 console = Console()
 
+# Bumped on every clear_screen() so FrameRenderer knows its last frame is gone
+_screen_epoch = 0
+
 def clear_screen():
-    if platform.system() == "Windows":
-        os.system("cls")
-    else:
-        os.system("clear")
+    global _screen_epoch
+    # ANSI clear (or the Win32 console API) instead of forking cls/clear
+    console.clear()
+    _screen_epoch += 1
+    session_trace.mark()
+
+def sql_status():
+    """Status line with the SQL run since the screen was opened (or the last mark)"""
+    from rich.markup import escape
+    count, seconds, rows, slowest = session_trace.since_mark()
+    lookups = result_cache.hits + result_cache.misses
+    cache = f" · result cache {result_cache.hits}/{lookups} hits, {format_bytes(result_cache.bytes)}" if lookups else ""
+    if not count:
+        return f"[dim]SQL: idle{cache}[/dim]"
+    text = f"SQL: {count} statement{'s' if count != 1 else ''} · {seconds * 1000:,.1f} ms · {rows:,} rows{cache}"
+    if slowest is not None and count > 1:
+        sql = " ".join(slowest["sql"].split())
+        text += f" · slowest {slowest['seconds'] * 1000:,.1f} ms: {sql[:60]}{'…' if len(sql) > 60 else ''}"
+    return f"[dim]{escape(text)}[/dim]"
+
+def pause():
+    """Show the screen's SQL status line and wait for Enter"""
+    console.print(f"\n{sql_status()}")
+    input("Press Enter to continue...")
+
+def render_text(*renderables):
+    """Render to a string of terminal output without printing it"""
+    with console.capture() as capture:
+        for renderable in renderables:
+            console.print(renderable)
+    return capture.get()
+
+class FrameRenderer:
+    """Draws full-screen frames for a navigation loop, repainting only changed lines.
+
+    The previous frame is kept line by line; a new frame only rewrites the
+    lines that differ (cursor-addressed), so moving a highlight sends a few
+    bytes instead of the whole screen. Any clear_screen() in between, a
+    terminal resize, or a frame taller than the terminal forces a full repaint.
+    """
+
+    def __init__(self):
+        self._lines = None
+        self._epoch = None
+        self._size = None
+
+    def render(self, *parts):
+        """Show a frame made of pre-rendered strings (see render_text)"""
+        lines = "".join(parts).split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()
+        size = shutil.get_terminal_size()
+        out = console.file
+        
+        if (self._lines is None or self._epoch != _screen_epoch or size != self._size
+                or len(lines) >= size.lines or console.legacy_windows):
+            clear_screen()
+            out.write("\n".join(lines) + "\n")
+        else:
+            for i, line in enumerate(lines):
+                if i >= len(self._lines) or self._lines[i] != line:
+                    out.write(f"\x1b[{i + 1};1H{line}\x1b[0m\x1b[K")
+            for i in range(len(lines), len(self._lines)):
+                out.write(f"\x1b[{i + 1};1H\x1b[K")
+            out.write(f"\x1b[{len(lines) + 1};1H")
+        out.flush()
+        
+        self._lines = lines
+        self._epoch = _screen_epoch
+        self._size = size
+
+def menu_frame(title, options, selected):
+    """Pre-rendered vertical menu with the selected option highlighted"""
+    lines = []
+    for i, option in enumerate(options):
+        if i == selected:
+            lines.append(f"[black on #E0F7FA]> {option} <[/black on #E0F7FA]")
+        else:
+            lines.append(f"  {option}")
+    return render_text(
+        Panel(f"[bold cyan]{title}[/bold cyan]", expand=False),
+        "",
+        "\n".join(lines),
+        "\n[dim]Use arrow keys to navigate, ENTER to select, ESC to go back[/dim]",
+        sql_status(),
+    )
 
 def create_new_table(cursor, conn):
     """Interactive table creation interface"""
@@ -22,14 +135,14 @@ def create_new_table(cursor, conn):
     
     if not table_name:
         console.print("[red]Table name cannot be empty![/red]")
-        input("\nPress Enter to continue...")
+        pause()
         return
     
     # Check if table already exists
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-    if cursor.fetchone():
+    catalog = get_catalog(conn)
+    if catalog.has_table(table_name):
         console.print(f"[red]Table '{table_name}' already exists![/red]")
-        input("\nPress Enter to continue...")
+        pause()
         return
     
     # Step 2: Define columns
@@ -54,7 +167,8 @@ def create_new_table(cursor, conn):
         console.print("  [1] Add column")
         console.print("  [2] Remove last column")
         console.print("  [3] Finish and create table")
-        console.print("  [4] Cancel")
+        console.print("  [4] Create from a CSV file (column types inferred)")
+        console.print("  [5] Cancel")
         
         choice = console.input("\n[yellow]Choose option:[/yellow] ").strip()
         
@@ -66,7 +180,7 @@ def create_new_table(cursor, conn):
             col_name = console.input("\n[yellow]Column name:[/yellow] ").strip()
             if not col_name:
                 console.print("[red]Column name cannot be empty![/red]")
-                input("\nPress Enter to continue...")
+                pause()
                 continue
             
             # Column type
@@ -116,16 +230,16 @@ def create_new_table(cursor, conn):
             if columns:
                 removed = columns.pop()
                 console.print(f"[green]Removed column: {removed['name']}[/green]")
-                input("\nPress Enter to continue...")
+                pause()
             else:
                 console.print("[red]No columns to remove![/red]")
-                input("\nPress Enter to continue...")
+                pause()
                 
         elif choice == "3":
             # Create table
             if not columns:
                 console.print("[red]Table must have at least one column![/red]")
-                input("\nPress Enter to continue...")
+                pause()
                 continue
             
             # Build CREATE TABLE statement
@@ -158,54 +272,158 @@ def create_new_table(cursor, conn):
                 try:
                     cursor.execute(sql)
                     conn.commit()
+                    catalog.invalidate()
                     console.print(f"\n[bold green]✓ Table '{table_name}' created successfully![/bold green]")
                 except sqlite3.Error as e:
                     console.print(f"\n[red]Error creating table: {e}[/red]")
-                input("\nPress Enter to continue...")
+                pause()
                 return
             
         elif choice == "4":
+            create_table_from_csv(conn, table_name)
+            return
+        
+        elif choice == "5":
             # Cancel
             console.print("[yellow]Table creation cancelled.[/yellow]")
-            input("\nPress Enter to continue...")
+            pause()
             return
 
+def create_table_from_csv(conn, table_name):
+    """Create a table from a CSV file with column types inferred from a sample, then load it"""
+    from collections import Counter
+    from rich.markup import escape
+    from rich.table import Table
+    clear_screen()
+    console.print(Panel(f"[bold cyan]Create {table_name} from CSV[/bold cyan]", expand=False))
+    
+    filename = console.input("\n[yellow]Enter CSV filename:[/yellow] ").strip()
+    sample_rows = _ask_number("Rows to sample for column types", IMPORT_SAMPLE_ROWS)
+    try:
+        headers, types = infer_csv_types(filename, sample_rows or IMPORT_SAMPLE_ROWS)
+    except FileNotFoundError:
+        console.print(f"[red]File '{filename}' not found![/red]")
+        pause()
+        return
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error reading CSV: {e}[/red]")
+        pause()
+        return
+    
+    while True:
+        clear_screen()
+        console.print(Panel(f"[bold cyan]Create {table_name} from CSV[/bold cyan]", expand=False))
+        columns = Table(title=f"[bold]Columns of {filename}[/bold]")
+        columns.add_column("Column", style="cyan")
+        columns.add_column("Type", style="green")
+        for name, decltype in zip(headers, types):
+            columns.add_row(name, decltype)
+        console.print(columns)
+        console.print(f"[dim]Types inferred from the first {sample_rows or IMPORT_SAMPLE_ROWS:,} rows; "
+                      f"rows that do not fit them are rejected.[/dim]")
+        change = console.input("\n[yellow]Change a type (column=INTEGER/REAL/TEXT), empty to continue:[/yellow] ").strip()
+        if not change:
+            break
+        name, _, decltype = change.partition("=")
+        if name.strip() in headers and decltype.strip().upper() in CSV_CONVERTERS:
+            types[headers.index(name.strip())] = decltype.strip().upper()
+    
+    index_input = console.input("[yellow]Columns to index after loading (comma separated, empty for none):[/yellow] ").strip()
+    index_columns = [col.strip() for col in index_input.split(",") if col.strip()]
+    unknown = [col for col in index_columns if col not in headers]
+    if unknown:
+        console.print(f"[red]Unknown column(s): {', '.join(unknown)}[/red]")
+        pause()
+        return
+    fast_load = console.input("[yellow]Fast load (synchronous=OFF, journal_mode=MEMORY)? (y/n):[/yellow] ").strip().lower() == 'y'
+    if console.input("\n[yellow]Create the table and import? (y/n):[/yellow] ").strip().lower() != 'y':
+        console.print("[yellow]Import cancelled.[/yellow]")
+        pause()
+        return
+    
+    rejects, examples = Counter(), []
+    
+    def on_reject(row_number, column, value):
+        rejects[column or "(field count)"] += 1
+        if len(examples) < 5:
+            examples.append(f"row {row_number}: " + (f"{column} = {value!r}" if column else "wrong number of fields"))
+    
+    try:
+        create_csv_table(conn, table_name, headers, types)
+        start = time.perf_counter()
+        count = _run_csv_import(conn, table_name, filename, IMPORT_CHUNK_SIZE, fast_load,
+                                types=types, on_reject=on_reject)
+        elapsed = time.perf_counter() - start
+        console.print(f"\n[bold green]✓ Imported {count} rows in {elapsed:.2f}s "
+                      f"({count / elapsed if elapsed else 0:,.0f} rows/s)[/bold green]")
+        if index_columns:
+            with console.status("[cyan]Creating indexes...[/cyan]"):
+                create_indexes(conn, table_name, index_columns)
+            console.print(f"[green]✓ Indexed {', '.join(index_columns)}[/green]")
+    except (sqlite3.Error, OSError, ValueError) as e:
+        console.print(f"[red]Error importing CSV: {e}[/red]")
+    if rejects:
+        console.print(f"\n[yellow]Rejected {sum(rejects.values())} rows: "
+                      + ", ".join(f"{column} {n}" for column, n in rejects.most_common()) + "[/yellow]")
+        for example in examples:
+            console.print(f"[dim]  {escape(example)}[/dim]")
+    pause()
+
 def row_editing_menu(cursor, conn, table_name):
     """Handle row editing operations"""
-    options = ["Insert Row", "Edit Row", "Delete Row", "Truncate", "Back"]
+    buffer = EditBuffer(conn, table_name)
     selected = 0
     
+    renderer = FrameRenderer()
+    
     while True:
-        clear_screen()
-        console.print(Panel(f"[bold cyan]Row Editing - {table_name}[/bold cyan]", expand=False))
-        console.print()
-        
-        for i, option in enumerate(options):
-            if i == selected:
-                console.print(f"[black on #E0F7FA]> {option} <[/black on #E0F7FA]")
-            else:
-                console.print(f"  {option}")
+        options = ["Insert Row", "Edit Row", "Delete Row", "Insert Rows (paste)", "Update Where",
+                   "Delete Where", f"Staged Edits ({len(buffer)})", "Truncate", "Back"]
+        renderer.render(menu_frame(f"Row Editing - {table_name}", options, selected))
         
-        console.print("\n[dim]Use arrow keys to navigate, ENTER to select, ESC to go back[/dim]")
-        
-        key = readchar.readkey()
+        key = read_key()
         if key == readchar.key.UP:
             selected = (selected - 1) % len(options)
         elif key == readchar.key.DOWN:
             selected = (selected + 1) % len(options)
         elif key == readchar.key.ENTER:
-            if selected == 4:  # Back
-                break
+            if selected == 8:  # Back
+                if _leave_staged_edits(conn, table_name, buffer):
+                    break
             elif selected == 0:  # Insert Row
                 insert_row(cursor, conn, table_name)
             elif selected == 1:  # Edit Row
                 edit_row(cursor, conn, table_name)
             elif selected == 2:  # Delete Row
                 delete_row(cursor, conn, table_name)
-            elif selected == 3:  # Truncate
+            elif selected == 3:  # Insert Rows
+                paste_rows(conn, table_name)
+            elif selected == 4:  # Update Where
+                update_where_screen(conn, table_name)
+            elif selected == 5:  # Delete Where
+                delete_where_screen(conn, table_name)
+            elif selected == 6:  # Staged Edits
+                staged_edits(conn, table_name, buffer)
+            elif selected == 7:  # Truncate
                 truncate_table(cursor, conn, table_name)
         elif key == readchar.key.ESC:
-            break
+            if _leave_staged_edits(conn, table_name, buffer):
+                break
+
+def _leave_staged_edits(conn, table_name, buffer):
+    """Before leaving Row Editing, let the user apply or discard staged edits; False to stay"""
+    if not buffer.changes:
+        return True
+    clear_screen()
+    console.print(Panel(f"[bold cyan]Row Editing - {table_name}[/bold cyan]", expand=False))
+    console.print(f"\n[yellow]{len(buffer)} staged change(s) have not been applied.[/yellow]")
+    choice = console.input("[yellow]Review and apply them, discard them, or stay? (a/d/s) \\[s]:[/yellow] ").strip().lower()
+    if choice == 'd':
+        buffer.clear()
+        return True
+    if choice == 'a':
+        staged_edits(conn, table_name, buffer)
+    return not buffer.changes
 
 def insert_row(cursor, conn, table_name):
     """Insert a new row into the table"""
@@ -213,8 +431,7 @@ def insert_row(cursor, conn, table_name):
     console.print(Panel(f"[bold cyan]Insert Row - {table_name}[/bold cyan]", expand=False))
     
     # Get column info
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns_info = cursor.fetchall()
+    columns_info = get_catalog(conn).columns(table_name)
     
     values = []
     col_names = []
@@ -246,7 +463,7 @@ def insert_row(cursor, conn, table_name):
             values.append(None)  # Use default
         elif not value and not_null:
             console.print("[red]This field is required![/red]")
-            input("\nPress Enter to continue...")
+            pause()
             return
         else:
             values.append(value if value else None)
@@ -262,7 +479,7 @@ def insert_row(cursor, conn, table_name):
     except sqlite3.Error as e:
         console.print(f"\n[red]Error inserting row: {e}[/red]")
     
-    input("\nPress Enter to continue...")
+    pause()
 
 def edit_row(cursor, conn, table_name):
     """Edit an existing row"""
@@ -270,17 +487,13 @@ def edit_row(cursor, conn, table_name):
     console.print(Panel(f"[bold cyan]Edit Row - {table_name}[/bold cyan]", expand=False))
     
     # Get primary key column
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns_info = cursor.fetchall()
-    pk_col = None
-    for col in columns_info:
-        if col[5]:  # is_pk
-            pk_col = col[1]
-            break
+    catalog = get_catalog(conn)
+    columns_info = catalog.columns(table_name)
+    pk_col = catalog.primary_key(table_name)
     
     if not pk_col:
         console.print("[red]Table has no primary key. Cannot edit rows safely.[/red]")
-        input("\nPress Enter to continue...")
+        pause()
         return
     
     # Show recent rows
@@ -298,7 +511,7 @@ def edit_row(cursor, conn, table_name):
     
     if not row:
         console.print(f"[red]No row found with {pk_col} = {row_id}[/red]")
-        input("\nPress Enter to continue...")
+        pause()
         return
     
     console.print("\n[green]Current values:[/green]")
@@ -321,7 +534,7 @@ def edit_row(cursor, conn, table_name):
     
     if not new_values:
         console.print("[yellow]No changes made.[/yellow]")
-        input("\nPress Enter to continue...")
+        pause()
         return
     
     # Build UPDATE statement
@@ -335,7 +548,7 @@ def edit_row(cursor, conn, table_name):
     except sqlite3.Error as e:
         console.print(f"\n[red]Error updating row: {e}[/red]")
     
-    input("\nPress Enter to continue...")
+    pause()
 
 def delete_row(cursor, conn, table_name):
     """Delete a row from the table"""
@@ -343,17 +556,11 @@ def delete_row(cursor, conn, table_name):
     console.print(Panel(f"[bold cyan]Delete Row - {table_name}[/bold cyan]", expand=False))
     
     # Get primary key column
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns_info = cursor.fetchall()
-    pk_col = None
-    for col in columns_info:
-        if col[5]:
-            pk_col = col[1]
-            break
+    pk_col = get_catalog(conn).primary_key(table_name)
     
     if not pk_col:
         console.print("[red]Table has no primary key. Cannot delete rows safely.[/red]")
-        input("\nPress Enter to continue...")
+        pause()
         return
     
     # Show recent rows
@@ -377,15 +584,14 @@ def delete_row(cursor, conn, table_name):
     else:
         console.print("[yellow]Deletion cancelled.[/yellow]")
     
-    input("\nPress Enter to continue...")
+    pause()
 
 def truncate_table(cursor, conn, table_name):
     """Delete all rows from the table"""
     clear_screen()
     console.print(Panel(f"[bold red]Truncate Table - {table_name}[/bold red]", expand=False))
     
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-    row_count = cursor.fetchone()[0]
+    row_count = describe_row_count(get_row_counter(conn), table_name)
     
     console.print(f"\n[yellow]This will delete all {row_count} rows from {table_name}![/yellow]")
     confirm = console.input("[red]Type 'DELETE ALL' to confirm:[/red] ").strip()
@@ -400,57 +606,340 @@ def truncate_table(cursor, conn, table_name):
     else:
         console.print("[yellow]Truncation cancelled.[/yellow]")
     
-    input("\nPress Enter to continue...")
+    pause()
 
-def search_filter(cursor, table_name):
-    """Search and filter table data"""
+def _commit_or_rollback(conn, message):
+    """Ask whether to keep the changes of the open transaction"""
+    console.print(f"\n{message}")
+    if console.input("[yellow]Commit these changes? (y/n):[/yellow] ").strip().lower() == 'y':
+        conn.commit()
+        console.print("[bold green]✓ Changes committed![/bold green]")
+    else:
+        conn.rollback()
+        console.print("[yellow]Changes rolled back.[/yellow]")
+
+def _preview_rows(conn, table_name, where, limit=10):
+    rows = conn.execute(f"SELECT * FROM {table_name} WHERE {where} LIMIT {limit}").fetchall()
+    for row in rows:
+        console.print(f"  {row}")
+
+def paste_rows(conn, table_name):
+    """Insert many rows from a pasted CSV/TSV block in one transaction"""
     clear_screen()
-    console.print(Panel(f"[bold cyan]Search/Filter - {table_name}[/bold cyan]", expand=False))
-    
-    # Get column names
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [col[1] for col in cursor.fetchall()]
+    console.print(Panel(f"[bold cyan]Insert Rows - {table_name}[/bold cyan]", expand=False))
     
-    console.print("\n[bold]Available columns:[/bold]")
-    for col in columns:
-        console.print(f"  • {col}")
+    columns_info = get_catalog(conn).columns(table_name)
+    # Auto-increment PKs are left out unless the block has a header naming them
+    columns = [col[1] for col in columns_info if not (col[5] and col[2].upper() == "INTEGER")]
+    console.print(f"\n[dim]Columns: {', '.join(columns)}[/dim]")
+    console.print("[dim]Paste rows (comma, tab, ; or | separated; optional header line). Empty line to finish.[/dim]\n")
     
-    column = console.input("\n[yellow]Enter column name:[/yellow] ").strip()
-    query = console.input("[yellow]Enter query (e.g., LIKE '%abc%', = 'value', > 100):[/yellow] ").strip()
+    lines = []
+    while True:
+        line = input()
+        if not line.strip():
+            break
+        lines.append(line)
     
     try:
-        sql = f"SELECT * FROM {table_name} WHERE {column} {query}"
-        cursor.execute(sql)
-        rows = cursor.fetchall()
-        
+        columns, rows = parse_row_block(lines, columns, [col[1] for col in columns_info])
         if not rows:
-            console.print("\n[yellow]No matching rows found.[/yellow]")
+            console.print("[yellow]No rows to insert.[/yellow]")
         else:
-            # Create Rich table
-            rich_table = Table(title=f"[bold green]Search Results ({len(rows)} rows)[/bold green]")
-            
-            for col in columns:
-                rich_table.add_column(f"[bold cyan]{col}[/bold cyan]", style="white")
-            
-            for row in rows:
-                rich_table.add_row(*[str(cell) for cell in row])
-            
-            console.print()
-            console.print(rich_table)
+            console.print(f"\n[bold]{len(rows)} rows into ({', '.join(columns)}), first rows:[/bold]")
+            for row in rows[:5]:
+                console.print(f"  {tuple(row)}")
+            count = insert_rows(conn, table_name, columns, rows)
+            _commit_or_rollback(conn, f"[cyan]Inserted {count} rows in one transaction.[/cyan]")
+    except (ValueError, sqlite3.Error) as e:
+        console.print(f"\n[red]Error inserting rows: {e}[/red]")
+    
+    pause()
+
+def update_where_screen(conn, table_name):
+    """Update every row matching a condition, with a dry run first"""
+    clear_screen()
+    console.print(Panel(f"[bold cyan]Update Where - {table_name}[/bold cyan]", expand=False))
+    
+    console.print(f"\n[dim]Columns: {', '.join(get_catalog(conn).column_names(table_name))}[/dim]")
+    where = console.input("\n[yellow]WHERE (e.g. status = 'old' AND id > 100):[/yellow] ").strip()
+    assignments = console.input("[yellow]SET (e.g. status = 'new', retries = 0):[/yellow] ").strip()
+    if not where or not assignments:
+        console.print("[yellow]Update cancelled.[/yellow]")
+        pause()
+        return
     
+    try:
+        matched = count_where(conn, table_name, where)
+        console.print(f"\n[bold]Dry run: {matched} rows match.[/bold]")
+        _preview_rows(conn, table_name, where)
+        if matched and console.input(f"\n[yellow]Update {matched} rows? (y/n):[/yellow] ").strip().lower() == 'y':
+            count = update_where(conn, table_name, assignments, where)
+            _commit_or_rollback(conn, f"[cyan]Updated {count} rows in one transaction.[/cyan]")
+        else:
+            console.print("[yellow]Update cancelled.[/yellow]")
     except sqlite3.Error as e:
-        console.print(f"\n[red]Error executing query: {e}[/red]")
+        console.print(f"\n[red]Error updating rows: {e}[/red]")
     
-    input("\nPress Enter to continue...")
+    pause()
+
+def delete_where_screen(conn, table_name):
+    """Delete every row matching a condition, with a dry run first"""
+    clear_screen()
+    console.print(Panel(f"[bold red]Delete Where - {table_name}[/bold red]", expand=False))
+    
+    console.print(f"\n[dim]Columns: {', '.join(get_catalog(conn).column_names(table_name))}[/dim]")
+    where = console.input("\n[yellow]WHERE (e.g. created < '2020-01-01'):[/yellow] ").strip()
+    if not where:
+        console.print("[yellow]Deletion cancelled.[/yellow]")
+        pause()
+        return
+    
+    try:
+        matched = count_where(conn, table_name, where)
+        console.print(f"\n[bold]Dry run: {matched} rows match.[/bold]")
+        _preview_rows(conn, table_name, where)
+        if matched and console.input(f"\n[red]Delete {matched} rows? (y/n):[/red] ").strip().lower() == 'y':
+            count = delete_where(conn, table_name, where)
+            _commit_or_rollback(conn, f"[cyan]Deleted {count} rows in one transaction.[/cyan]")
+        else:
+            console.print("[yellow]Deletion cancelled.[/yellow]")
+    except sqlite3.Error as e:
+        console.print(f"\n[red]Error deleting rows: {e}[/red]")
+    
+    pause()
+
+def _stage_insert(conn, table_name, buffer):
+    values = {}
+    for col in get_catalog(conn).columns(table_name):
+        if col[5] and col[2].upper() == "INTEGER":
+            continue
+        value = console.input(f"[yellow]{col[1]}[/yellow] ({col[2]}): ").strip()
+        values[col[1]] = value if value else None
+    buffer.insert(values)
+
+def _stage_update(conn, table_name, buffer):
+    text = console.input(f"[yellow]{buffer.key} of the row to change:[/yellow] ").strip()
+    key = buffer.parse_key(text)
+    if key is None:
+        console.print(f"[red]Enter {len(buffer.key_columns)} value(s): {buffer.key}[/red]")
+        pause()
+        return
+    row = conn.execute(f"SELECT * FROM {table_name} WHERE {buffer.where()}", key).fetchone()
+    if row is None:
+        console.print(f"[red]No row found with ({buffer.key}) = ({text})[/red]")
+        pause()
+        return
+    console.print("[dim]Enter new values (press Enter to keep current value):[/dim]")
+    values = {}
+    for col in get_catalog(conn).columns(table_name):
+        if col[5]:
+            continue
+        value = console.input(f"[yellow]{col[1]}[/yellow] (current: {row[col[0]]}): ").strip()
+        if value:
+            values[col[1]] = value
+    if values:
+        buffer.update(key, values)
+
+def staged_edits(conn, table_name, buffer):
+    """Queue inserts, updates and deletes, then apply them all in one transaction"""
+    from rich.table import Table
+    
+    while True:
+        clear_screen()
+        console.print(Panel(f"[bold cyan]Staged Edits - {table_name}[/bold cyan]", expand=False))
+        
+        if buffer.changes:
+            staged = Table(show_header=True, header_style="bold magenta")
+            staged.add_column("#", justify="right")
+            staged.add_column("Change", style="cyan")
+            staged.add_column(buffer.key)
+            staged.add_column("Values")
+            for number, (op, key, values) in enumerate(buffer.changes[-30:], max(len(buffer) - 30, 0) + 1):
+                staged.add_row(str(number), op, "" if key is None else ", ".join(map(str, key)),
+                               ", ".join(f"{col}={value!r}" for col, value in values.items()))
+            console.print(staged)
+            if len(buffer) > 30:
+                console.print(f"[dim]{len(buffer) - 30} earlier changes not shown[/dim]")
+        else:
+            console.print("\n[dim]No changes staged.[/dim]")
+        
+        console.print("\n\\[i] insert  \\[u] update  \\[d] delete  \\[x] unstage #  \\[a] apply  \\[c] clear  \\[b] back")
+        command = console.input("[yellow]>[/yellow] ").strip().lower()
+        
+        if command == 'i':
+            _stage_insert(conn, table_name, buffer)
+        elif command == 'u':
+            _stage_update(conn, table_name, buffer)
+        elif command == 'd':
+            if len(buffer.key_columns) == 1:
+                keys = console.input(f"[yellow]{buffer.key} values to delete (comma separated):[/yellow] ")
+                rows = [key for key in keys.split(",") if key.strip()]
+            else:
+                keys = console.input(f"[yellow]Rows to delete as {buffer.key} (rows separated by ;):[/yellow] ")
+                rows = [key for key in keys.split(";") if key.strip()]
+            for text in rows:
+                key = buffer.parse_key(text)
+                if key is None:
+                    console.print(f"[red]Skipped '{text.strip()}': enter {len(buffer.key_columns)} value(s) per row[/red]")
+                    pause()
+                else:
+                    buffer.delete(key)
+        elif command == 'x':
+            number = console.input("[yellow]Change # to unstage:[/yellow] ").strip()
+            if number.isdigit() and 1 <= int(number) <= len(buffer):
+                buffer.discard(int(number) - 1)
+        elif command == 'c':
+            buffer.clear()
+        elif command == 'a' and buffer.changes:
+            try:
+                counts = buffer.apply()
+            except sqlite3.Error as e:
+                console.print(f"\n[red]Error applying changes, nothing was written: {e}[/red]")
+                pause()
+                continue
+            console.print("\n[bold]Applied in one transaction:[/bold]")
+            for sql, batch, affected in counts:
+                console.print(f"  [dim]{sql}[/dim] × {batch} → {affected} rows")
+            if console.input("\n[yellow]Commit these changes? (y/n):[/yellow] ").strip().lower() == 'y':
+                buffer.commit()
+                console.print("[bold green]✓ Changes committed![/bold green]")
+            else:
+                buffer.rollback()
+                console.print("[yellow]Changes rolled back; they are still staged.[/yellow]")
+            pause()
+        elif command in ('b', 'q', ''):
+            return
+
+# A search query starting with one of these is a SQL predicate, not full-text syntax
+_SQL_PREDICATE = re.compile(r"^\s*(?:(?:LIKE|GLOB|REGEXP|IN|IS|BETWEEN|NOT)\b|=|!=|<|>)", re.IGNORECASE)
+# Predicates an index on the column can answer without reading every row
+_INDEXABLE_PREDICATE = re.compile(r"^\s*(?:(?:IN|IS|BETWEEN)\b|==?|<(?!>)|>)", re.IGNORECASE)
+
+def search_filter(cursor, table_name):
+    """Search and filter table data"""
+    conn = cursor.connection
+    while True:
+        clear_screen()
+        console.print(Panel(f"[bold cyan]Search/Filter - {table_name}[/bold cyan]", expand=False))
+        
+        catalog = get_catalog(conn)
+        columns = catalog.column_names(table_name)
+        index = catalog.full_text_index(table_name)
+        indexed = [col.lower() for col in index['columns']] if index else []
+        
+        console.print("\n[bold]Available columns:[/bold]")
+        for col in columns:
+            console.print(f"  • {col}" + (" [green](full-text)[/green]" if col.lower() in indexed else ""))
+        
+        console.print("\n[dim]\\[f] full-text index[/dim]")
+        column = console.input("[yellow]Enter column name:[/yellow] ").strip()
+        if column.lower() == 'f' and column not in columns:
+            full_text_index_screen(conn, table_name)
+            continue
+        break
+    
+    params = ()
+    if column.lower() in indexed:
+        console.print("[dim]Full-text query, e.g. disk AND (error OR fail*), \"exact phrase\"; "
+                      "start with LIKE, =, > ... for a plain SQL predicate.[/dim]")
+        query = console.input("[yellow]Enter query:[/yellow] ").strip()
+    else:
+        query = console.input("[yellow]Enter query (e.g., LIKE '%abc%', = 'value', > 100):[/yellow] ").strip()
+    
+    full_text = column.lower() in indexed and not _SQL_PREDICATE.match(query)
+    if full_text:
+        sql, params = fts_search_sql(table_name, index, query, column)
+    else:
+        sql = f"SELECT * FROM {table_name} WHERE {column} {query}"
+        if column in columns:
+            record_predicates(table_name, [column])
+            if _INDEXABLE_PREDICATE.match(query):
+                for warning in profile_warnings(conn, table_name, [column]):
+                    console.print(f"[yellow]⚠ {warning}. Choose e to see the plan and create one.[/yellow]")
+    mode = _ask_run_mode()
+    if mode == 'e':
+        explain_screen(conn, table_name, sql, [column] if column in columns and not full_text else [], params=params)
+        return
+    
+    db_path = database_path(conn)
+    if db_path is None:
+        console.print("[red]Background queries need a database file.[/red]")
+        pause()
+        return
+    
+    worker = result_cache.worker(conn, sql, params, bypass=mode == 'f', row_cap=0, page_size=RESULT_PAGE_ROWS)
+    run_query_worker(worker, "Searching")
+    
+    if worker.cancelled:
+        console.print(f"\n[yellow]Search cancelled after {worker.elapsed():.2f}s.[/yellow]")
+    elif worker.timed_out:
+        console.print(f"\n[red]Search stopped: timeout of {worker.timeout}s reached.[/red]")
+    elif worker.error:
+        console.print(f"\n[red]Error executing query: {worker.error}[/red]")
+    elif not worker.rows:
+        worker.close()
+        console.print("\n[yellow]No matching rows found.[/yellow]")
+    else:
+        view_results(worker, "Full-Text Search Results" if full_text else "Search Results")
+        return
+    
+    pause()
+
+def full_text_index_screen(conn, table_name):
+    """Create, rebuild or drop the FTS5 index of a table"""
+    clear_screen()
+    console.print(Panel(f"[bold cyan]Full-Text Index - {table_name}[/bold cyan]", expand=False))
+    
+    index = get_catalog(conn).full_text_index(table_name)
+    candidates = text_columns(conn, table_name)
+    if index:
+        console.print(f"\n[bold]Index:[/bold] {index['name']} on {', '.join(index['columns'])}")
+    else:
+        console.print("\n[dim]No full-text index yet. Searches on indexed columns use ranked MATCH queries.[/dim]")
+    console.print("\n[bold]Text columns:[/bold]")
+    for i, col in enumerate(candidates, 1):
+        console.print(f"  \\[{i}] {col}")
+    
+    console.print("\n[dim]Column numbers to index (e.g. 1,3), 'all', 'drop' to remove the index, Enter to go back[/dim]")
+    choice = console.input("[yellow]>[/yellow] ").strip().lower()
+    if not choice:
+        return
+    
+    try:
+        if choice == 'drop':
+            if drop_fts_index(conn, table_name):
+                console.print("[green]✓ Full-text index dropped.[/green]")
+            else:
+                console.print("[yellow]There is no full-text index to drop.[/yellow]")
+        else:
+            if choice == 'all':
+                chosen = candidates
+            else:
+                numbers = [part.strip() for part in choice.split(",")]
+                if not all(number.isdigit() and 1 <= int(number) <= len(candidates) for number in numbers):
+                    console.print("[red]Invalid column selection.[/red]")
+                    pause()
+                    return
+                chosen = [candidates[int(number) - 1] for number in numbers]
+            start = time.perf_counter()
+            with console.status(f"[cyan]Indexing {', '.join(chosen)}...[/cyan]"):
+                rows = create_fts_index(conn, table_name, chosen)
+            console.print(f"[green]✓ Indexed {rows:,} rows in {time.perf_counter() - start:.2f}s. "
+                          f"Triggers keep the index in sync.[/green]")
+    except (sqlite3.Error, ValueError) as e:
+        console.print(f"[red]Error: {e}[/red]")
+    pause()
 
 def table_info(cursor, table_name):
     """Display table information"""
+    from rich.table import Table
     clear_screen()
     console.print(Panel(f"[bold cyan]Table Info - {table_name}[/bold cyan]", expand=False))
     
     # Column information
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns_info = cursor.fetchall()
+    catalog = get_catalog(cursor.connection)
+    columns_info = catalog.columns(table_name)
     
     console.print("\n[bold green]Columns:[/bold green]")
     info_table = Table()
@@ -471,64 +960,251 @@ def table_info(cursor, table_name):
     
     console.print(info_table)
     
-    # Row count
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-    row_count = cursor.fetchone()[0]
-    console.print(f"\n[bold]Row Count:[/bold] {row_count}")
-    
     # Index information
-    cursor.execute(f"PRAGMA index_list({table_name})")
-    indexes = cursor.fetchall()
+    indexes = catalog.indexes(table_name)
     
     if indexes:
         console.print("\n[bold green]Indexes:[/bold green]")
         for idx in indexes:
-            console.print(f"  • {idx[1]} (unique: {idx[2]})")
+            console.print(f"  • {idx['name']} ({', '.join(idx['columns'])}) (unique: {idx['unique']})")
     else:
         console.print("\n[dim]No indexes defined.[/dim]")
     
-    input("\nPress Enter to continue...")
+    # Row count: cached, or an instant estimate while COUNT(*) runs in the background
+    counter = get_row_counter(cursor.connection)
+    counter.start_count(table_name)
+    show_row_count(counter, table_name)
+
+def describe_row_count(counter, table_name):
+    """Row count for display: exact when known, otherwise the best estimate"""
+    count = counter.cached(table_name)
+    if count is not None:
+        return f"{count:,}"
+    estimate, source = counter.estimate(table_name)
+    if estimate is None:
+        return "unknown"
+    return f"~{estimate:,} [dim](estimate from {source})[/dim]"
+
+def show_row_count(counter, table_name):
+    """Print the row count line and keep it updated until Enter is pressed"""
+    from rich.live import Live
+    
+    def line():
+        text = f"\n[bold]Row Count:[/bold] {describe_row_count(counter, table_name)}"
+        if counter.counting(table_name):
+            text += " [dim]· counting exactly...[/dim]"
+        return text + "\n\nPress Enter to continue..."
+    
+    try:
+        shown = line()
+        with Live(shown, console=console, auto_refresh=False) as live, key_poller() as poll:
+            while True:
+                key = poll(0.2)
+                if key in (readchar.key.ENTER, "\n", readchar.key.ESC):
+                    break
+                if line() != shown:
+                    shown = line()
+                    live.update(shown, refresh=True)
+    except KeyboardInterrupt:
+        pass
+
+def _profile_value(value, width=24):
+    """Short, escaped display form of a profiled value"""
+    from rich.markup import escape
+    if isinstance(value, bytes):
+        return f"[dim]<{len(value):,} byte blob>[/dim]"
+    text = str(value)
+    return escape(text if len(text) <= width else text[:width - 1] + "…")
+
+def _profile_total(profile):
+    """' of ~N' for a sampled profile's table size, '~' unless the count is exact"""
+    if profile["total_rows"] is None:
+        return ""
+    return f" of {'' if profile['total_exact'] else '~'}{profile['total_rows']:,}"
+
+def _run_profile(conn, table_name):
+    """Ask for a sample size and profile table_name with a live indicator; False if cancelled or failed"""
+    profiler = get_profiler(conn)
+    estimate, _ = get_row_counter(conn).estimate(table_name)
+    default = PROFILE_SAMPLE_ROWS if estimate and estimate > PROFILE_FULL_SCAN_ROWS else 0
+    if estimate is not None:
+        console.print(f"\n[dim]About {estimate:,} rows.[/dim]")
+    sample_rows = _ask_number("Rows to sample (0 = every row)", default)
+    
+    profiler.start(table_name, sample_rows)
+    state = profiler.progress(table_name)
+    total = sample_rows or estimate
+    try:
+        with console.status("") as status, key_poller() as poll:
+            while not state["done"]:
+                done = f"{state['rows']:,}" + (f" of ~{total:,}" if total else "")
+                status.update(f"[cyan]Profiling {table_name}...[/cyan] {done} rows [dim](ESC to cancel)[/dim]")
+                if poll(0.1) == readchar.key.ESC:
+                    profiler.cancel(table_name)
+                    return False
+    except KeyboardInterrupt:
+        profiler.cancel(table_name)
+        return False
+    if state["error"] is not None:
+        profiler.cached(table_name)  # Collects the failed run
+        console.print(f"[red]Error profiling {table_name}: {state['error']}[/red]")
+        pause()
+        return False
+    return profiler.cached(table_name) is not None
+
+def _profile_details(profile, name):
+    """Top values and length histogram of one profiled column"""
+    from rich.table import Table
+    stats = next((stats for column, stats in profile["columns"].items() if column.lower() == name.lower()), None)
+    if stats is None:
+        console.print(f"[red]No column '{name}'.[/red]")
+        pause()
+        return
+    clear_screen()
+    console.print(Panel(f"[bold cyan]Column Profile - {profile['table']}.{stats.name}[/bold cyan]", expand=False))
+    
+    top = stats.top()
+    if top:
+        values = Table(title="[bold]Most frequent values[/bold]")
+        values.add_column("Value", style="cyan")
+        values.add_column("Count", justify="right")
+        values.add_column("Share", justify="right")
+        for value, count in top:
+            values.add_row(_profile_value(value, 60), f"{count:,}", f"{count / stats.rows:.1%}")
+        console.print(values)
+        if stats.error():
+            console.print(f"[dim]Counts are approximate: each may be up to {stats.error():,} too low.[/dim]")
+    else:
+        console.print("\n[dim]No value occurs more than once.[/dim]")
+    
+    histogram = stats.length_histogram()
+    if histogram:
+        console.print(f"\n[bold]Length[/bold] (TEXT and BLOB): min {stats.length_min:,}, max {stats.length_max:,}, "
+                      f"avg {stats.length_total / sum(stats.lengths.values()):,.1f}")
+        widest = max(count for _, _, count in histogram)
+        for shortest, longest, count in histogram:
+            label = f"{shortest}" if shortest == longest else f"{shortest}-{longest}"
+            console.print(f"  {label:>13} │{'█' * max(1, round(40 * count / widest))} {count:,}")
+    pause()
+
+def profile_screen(conn, table_name):
+    """Per-column statistics: null ratio, distinct values, min/max, top values and lengths"""
+    from rich.table import Table
+    profiler = get_profiler(conn)
+    
+    while True:
+        clear_screen()
+        console.print(Panel(f"[bold cyan]Column Profile - {table_name}[/bold cyan]", expand=False))
+        profile = profiler.cached(table_name)
+        if profile is None and not _run_profile(conn, table_name):
+            return
+        profile = profiler.cached(table_name)
+        
+        source = (f"random sample of {profile['rows']:,}{_profile_total(profile)} rows" if profile["sampled"]
+                  else f"all {profile['rows']:,} rows")
+        columns = Table(title=f"[bold]{table_name}[/bold]",
+                        caption=f"[dim]{source}, profiled in {profile['seconds']:.2f}s · "
+                                f"~ marks estimates; cached until the data changes[/dim]")
+        columns.add_column("Column", style="cyan")
+        columns.add_column("Types")
+        columns.add_column("Nulls", justify="right")
+        columns.add_column("Distinct", justify="right")
+        columns.add_column("Min")
+        columns.add_column("Max")
+        columns.add_column("Length", justify="right")
+        columns.add_column("Top values")
+        for stats in profile["columns"].values():
+            non_null = stats.rows - stats.nulls
+            types = ", ".join(f"{storage} {count / non_null:.0%}" if len(stats.types) > 1 else storage
+                              for storage, count in stats.types.most_common()) or "[dim]NULL[/dim]"
+            distinct = f"{'' if stats.distinct_exact() else '~'}{stats.distinct():,}"
+            length = (f"{stats.length_min}-{stats.length_max}" if stats.length_min is not None else "-")
+            top = ", ".join(f"{_profile_value(value, 12)} ×{count:,}" for value, count in stats.top()[:3]) or "[dim]unique[/dim]"
+            columns.add_row(stats.name, types, f"{stats.null_ratio():.1%}", distinct,
+                            "-" if stats.min is None else _profile_value(stats.min[1]),
+                            "-" if stats.max is None else _profile_value(stats.max[1]),
+                            length, top)
+        console.print(columns)
+        
+        warnings = profile_warnings(conn, table_name, list(profile["columns"]))
+        for warning in warnings:
+            console.print(f"[yellow]⚠ {warning}[/yellow]")
+        
+        console.print("\n\\[d] column details  \\[r] profile again  \\[b] back")
+        command = console.input("[yellow]>[/yellow] ").strip().lower()
+        if command == 'd':
+            name = console.input("[yellow]Column:[/yellow] ").strip()
+            if name:
+                _profile_details(profile, name)
+        elif command == 'r':
+            clear_screen()
+            console.print(Panel(f"[bold cyan]Column Profile - {table_name}[/bold cyan]", expand=False))
+            _run_profile(conn, table_name)
+        elif command in ('b', 'q', ''):
+            return
 
 def import_export_menu(cursor, conn, table_name):
     """Handle import/export operations"""
     import csv
-    import json
     
-    options = ["Import CSV", "Export CSV", "Export JSON", "Export Markdown", "Back"]
+    options = ["Import CSV", "Import Columnar (.pcol)", "Export CSV", "Export JSON", "Export Markdown",
+               "Export Columnar (.pcol)", "Back"]
     selected = 0
     
+    renderer = FrameRenderer()
+    
     while True:
-        clear_screen()
-        console.print(Panel(f"[bold cyan]Import/Export - {table_name}[/bold cyan]", expand=False))
-        console.print()
+        renderer.render(menu_frame(f"Import/Export - {table_name}", options, selected))
         
-        for i, option in enumerate(options):
-            if i == selected:
-                console.print(f"[black on #E0F7FA]> {option} <[/black on #E0F7FA]")
-            else:
-                console.print(f"  {option}")
-        
-        console.print("\n[dim]Use arrow keys to navigate, ENTER to select, ESC to go back[/dim]")
-        
-        key = readchar.readkey()
+        key = read_key()
         if key == readchar.key.UP:
             selected = (selected - 1) % len(options)
         elif key == readchar.key.DOWN:
             selected = (selected + 1) % len(options)
         elif key == readchar.key.ENTER:
-            if selected == 4:  # Back
+            if selected == 6:  # Back
                 break
             elif selected == 0:  # Import CSV
                 import_csv(cursor, conn, table_name, csv)
-            elif selected == 1:  # Export CSV
-                export_csv(cursor, table_name, csv)
-            elif selected == 2:  # Export JSON
-                export_json(cursor, table_name, json)
-            elif selected == 3:  # Export Markdown
+            elif selected == 1:  # Import Columnar
+                import_pcol(conn, table_name)
+            elif selected == 2:  # Export CSV
+                export_csv(cursor, table_name)
+            elif selected == 3:  # Export JSON
+                export_json(cursor, table_name)
+            elif selected == 4:  # Export Markdown
                 export_markdown(cursor, table_name)
+            elif selected == 5:  # Export Columnar
+                export_pcol(cursor, table_name)
         elif key == readchar.key.ESC:
             break
 
+def _run_csv_import(conn, table_name, filename, chunk_size, fast_load, resume_from=0, **options):
+    """bulk_import_csv with a progress bar; returns the number of rows imported"""
+    from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn, TimeRemainingColumn
+    start = time.perf_counter()
+    with Progress(
+        TextColumn("[cyan]Importing"),
+        BarColumn(),
+        TextColumn("{task.percentage:>5.1f}%"),
+        TextColumn("{task.fields[rows]} rows"),
+        TextColumn("{task.fields[rate]:,.0f} rows/s"),
+        TimeElapsedColumn(),
+        TimeRemainingColumn(),
+        console=console,
+    ) as progress:
+        task = progress.add_task("import", total=os.path.getsize(filename), rows=resume_from, rate=0)
+        
+        def on_progress(rows, bytes_read, total_bytes):
+            elapsed = time.perf_counter() - start
+            rate = (rows - resume_from) / elapsed if elapsed else 0
+            progress.update(task, completed=bytes_read, rows=rows, rate=rate)
+        
+        count = bulk_import_csv(conn, table_name, filename, chunk_size=chunk_size, fast_load=fast_load,
+                                resume_from=resume_from, on_progress=on_progress, **options)
+        progress.update(task, completed=os.path.getsize(filename))
+    return count
+
 def import_csv(cursor, conn, table_name, csv):
     """Import data from CSV"""
     clear_screen()
@@ -538,125 +1214,786 @@ def import_csv(cursor, conn, table_name, csv):
     
     try:
         with open(filename, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            headers = next(reader)
-            
-            # Get table columns
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            table_cols = [col[1] for col in cursor.fetchall()]
-            
-            console.print(f"\n[dim]CSV columns: {', '.join(headers)}[/dim]")
-            console.print(f"[dim]Table columns: {', '.join(table_cols)}[/dim]")
+            headers = next(csv.reader(f))
+        
+        # Get table columns
+        table_cols = get_catalog(conn).column_names(table_name)
+        
+        console.print(f"\n[dim]CSV columns: {', '.join(headers)}[/dim]")
+        console.print(f"[dim]Table columns: {', '.join(table_cols)}[/dim]")
+        
+        confirm = console.input("\n[yellow]Proceed with import? (y/n):[/yellow] ").strip().lower()
+        
+        if confirm == 'y':
+            chunk_input = console.input(f"[yellow]Rows per transaction [{IMPORT_CHUNK_SIZE}]:[/yellow] ").strip()
+            chunk_size = int(chunk_input) if chunk_input.isdigit() and int(chunk_input) > 0 else IMPORT_CHUNK_SIZE
+            fast_load = console.input("[yellow]Fast load (synchronous=OFF, journal_mode=MEMORY)? (y/n):[/yellow] ").strip().lower() == 'y'
             
-            confirm = console.input("\n[yellow]Proceed with import? (y/n):[/yellow] ").strip().lower()
+            resume_from = read_import_checkpoint(filename, table_name)
+            if resume_from:
+                resume = console.input(f"[yellow]Checkpoint found, resume after row {resume_from}? (y/n):[/yellow] ").strip().lower()
+                if resume != 'y':
+                    resume_from = 0
             
-            if confirm == 'y':
-                count = 0
-                placeholders = ",".join(["?" for _ in headers])
-                for row in reader:
-                    cursor.execute(f"INSERT INTO {table_name} ({','.join(headers)}) VALUES ({placeholders})", row)
-                    count += 1
-                
-                conn.commit()
-                console.print(f"\n[bold green]✓ Imported {count} rows successfully![/bold green]")
-            else:
-                console.print("[yellow]Import cancelled.[/yellow]")
+            start = time.perf_counter()
+            count = _run_csv_import(conn, table_name, filename, chunk_size, fast_load, resume_from)
+            elapsed = time.perf_counter() - start
+            rate = count / elapsed if elapsed else 0
+            console.print(f"\n[bold green]✓ Imported {count} rows successfully! ({rate:,.0f} rows/s)[/bold green]")
+        else:
+            console.print("[yellow]Import cancelled.[/yellow]")
     
     except FileNotFoundError:
         console.print(f"[red]File '{filename}' not found![/red]")
     except Exception as e:
         console.print(f"[red]Error importing CSV: {e}[/red]")
+        if read_import_checkpoint(filename, table_name):
+            console.print("[yellow]Rows up to the last committed chunk were kept; run the import again to resume.[/yellow]")
+    
+    pause()
+
+def _ask_compression():
+    choice = console.input("[yellow]Compression (none/gzip/zstd) \\[none]:[/yellow] ").strip().lower()
+    return choice if choice in COMPRESSIONS else "none"
+
+def _run_export(cursor, table_name, fmt, label):
+    clear_screen()
+    console.print(Panel(f"[bold cyan]Export {label} - {table_name}[/bold cyan]", expand=False))
+    
+    extension = EXPORT_FORMATS[fmt]
+    filename = console.input(f"\n[yellow]Enter output filename (without {extension}):[/yellow] ").strip()
+    if fmt == "json":
+        style = console.input("[yellow]Format ([1] JSON array, [2] NDJSON) [1]:[/yellow] ").strip()
+        if style == "2":
+            fmt = "ndjson"
+            extension = EXPORT_FORMATS[fmt]
+    # .pcol files are memory-mapped on load, so they stay uncompressed
+    compression = _ask_compression() if fmt != "pcol" else "none"
+    filename = f"{filename}{extension}{COMPRESSIONS[compression]}"
+    
+    try:
+        start = time.perf_counter()
+        with console.status(f"[cyan]Writing {filename}...[/cyan]"):
+            count = export_table(cursor, table_name, fmt, filename, compression)
+        elapsed = time.perf_counter() - start
+        console.print(f"\n[bold green]✓ Exported {count} rows to {filename}! ({elapsed:.2f}s)[/bold green]")
+    
+    except Exception as e:
+        console.print(f"[red]Error exporting {label}: {e}[/red]")
     
-    input("\nPress Enter to continue...")
+    pause()
 
-def export_csv(cursor, table_name, csv):
+def export_csv(cursor, table_name):
     """Export table to CSV"""
+    _run_export(cursor, table_name, "csv", "CSV")
+
+def export_json(cursor, table_name):
+    """Export table to JSON (array or NDJSON)"""
+    _run_export(cursor, table_name, "json", "JSON")
+
+def export_markdown(cursor, table_name):
+    """Export table to a Markdown table"""
+    _run_export(cursor, table_name, "markdown", "Markdown")
+
+def export_pcol(cursor, table_name):
+    """Export table to the typed columnar format"""
+    _run_export(cursor, table_name, "pcol", "Columnar")
+
+def import_pcol(conn, table_name):
+    """Import data from a columnar (.pcol) dump"""
+    from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
+    from scripts.columnar import read_pcol_header, load_pcol
     clear_screen()
-    console.print(Panel(f"[bold cyan]Export CSV - {table_name}[/bold cyan]", expand=False))
+    console.print(Panel(f"[bold cyan]Import Columnar - {table_name}[/bold cyan]", expand=False))
     
-    filename = console.input("\n[yellow]Enter output filename (without .csv):[/yellow] ").strip()
-    filename = f"{filename}.csv"
+    filename = console.input("\n[yellow]Enter .pcol filename:[/yellow] ").strip()
     
     try:
-        cursor.execute(f"SELECT * FROM {table_name}")
-        rows = cursor.fetchall()
+        header = read_pcol_header(filename)
+        table_cols = get_catalog(conn).column_names(table_name)
         
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = [col[1] for col in cursor.fetchall()]
+        console.print(f"\n[dim]Dump of {header['table']}: {', '.join(header['columns'])}[/dim]")
+        console.print(f"[dim]Table columns: {', '.join(table_cols)}[/dim]")
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(columns)
-            writer.writerows(rows)
-        
-        console.print(f"\n[bold green]✓ Exported {len(rows)} rows to {filename}![/bold green]")
+        confirm = console.input("\n[yellow]Proceed with import? (y/n):[/yellow] ").strip().lower()
+        if confirm == 'y':
+            fast_load = console.input("[yellow]Fast load (synchronous=OFF, journal in memory)? (y/n):[/yellow] ").strip().lower() == 'y'
+            
+            start = time.perf_counter()
+            with Progress(
+                TextColumn("[cyan]Importing"),
+                BarColumn(),
+                TextColumn("{task.percentage:>5.1f}%"),
+                TextColumn("{task.fields[rows]} rows"),
+                TimeElapsedColumn(),
+                console=console,
+            ) as progress:
+                task = progress.add_task("import", total=os.path.getsize(filename), rows=0)
+                
+                def on_progress(rows, bytes_read, total_bytes):
+                    progress.update(task, completed=bytes_read, rows=rows)
+                
+                count = load_pcol(conn, table_name, filename, fast_load=fast_load, on_progress=on_progress)
+                progress.update(task, completed=os.path.getsize(filename))
+            
+            elapsed = time.perf_counter() - start
+            rate = count / elapsed if elapsed else 0
+            console.print(f"\n[bold green]✓ Imported {count} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)[/bold green]")
+        else:
+            console.print("[yellow]Import cancelled.[/yellow]")
     
+    except FileNotFoundError:
+        console.print(f"[red]File '{filename}' not found![/red]")
     except Exception as e:
-        console.print(f"[red]Error exporting CSV: {e}[/red]")
+        console.print(f"[red]Error importing columnar dump: {e}[/red]")
     
-    input("\nPress Enter to continue...")
+    pause()
 
-def export_json(cursor, table_name, json):
-    """Export table to JSON"""
+def export_database_screen(conn):
+    """Export every table to its own file using a pool of worker processes"""
+    from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
+    from rich.table import Table
     clear_screen()
-    console.print(Panel(f"[bold cyan]Export JSON - {table_name}[/bold cyan]", expand=False))
+    console.print(Panel("[bold cyan]Export Entire Database[/bold cyan]", expand=False))
+    
+    tables = get_catalog(conn).all_tables()
+    if not tables:
+        console.print("[yellow]No tables to export.[/yellow]")
+        pause()
+        return
+    
+    out_dir = console.input("\n[yellow]Output directory \\[export]:[/yellow] ").strip() or "export"
+    fmt = console.input(f"[yellow]Format ({'/'.join(EXPORT_FORMATS)}) \\[csv]:[/yellow] ").strip().lower()
+    fmt = fmt if fmt in EXPORT_FORMATS else "csv"
+    compression = _ask_compression()
+    workers = _ask_number(f"Worker processes (0 = one per CPU, {os.cpu_count()})", 0)
+    snapshot = console.input("[yellow]Export from a consistent snapshot copy? (y/n) \\[y]:[/yellow] ").strip().lower() != 'n'
     
-    filename = console.input("\n[yellow]Enter output filename (without .json):[/yellow] ").strip()
-    filename = f"{filename}.json"
+    try:
+        start = time.perf_counter()
+        with Progress(
+            TextColumn("[cyan]Exporting"),
+            BarColumn(),
+            TextColumn("{task.completed}/{task.total} tables"),
+            TextColumn("[dim]{task.fields[last]}[/dim]"),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task("export", total=len(tables), last="")
+            
+            def on_table_done(result, done, total):
+                progress.update(task, completed=done, last=result["table"])
+            
+            results = export_database(conn, out_dir, fmt, compression, workers or None, snapshot,
+                                      tables, on_table_done)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        console.print(f"[red]Error exporting database: {e}[/red]")
+        pause()
+        return
     
+    summary = Table(title=f"{len(results)} tables → {out_dir}")
+    summary.add_column("Table", style="cyan")
+    summary.add_column("Rows", justify="right")
+    summary.add_column("MiB", justify="right")
+    summary.add_column("Seconds", justify="right")
+    summary.add_column("Rows/s", justify="right")
+    for result in sorted(results, key=lambda result: result["table"]):
+        seconds = result["seconds"]
+        summary.add_row(result["table"], str(result["rows"]), f"{result['bytes'] / (1024 * 1024):.1f}",
+                        f"{seconds:.2f}", f"{result['rows'] / seconds if seconds else 0:,.0f}")
+    console.print(summary)
+    total_rows = sum(result["rows"] for result in results)
+    console.print(f"\n[bold green]✓ Exported {total_rows} rows in {elapsed:.2f}s "
+                  f"({total_rows / elapsed if elapsed else 0:,.0f} rows/s overall)[/bold green]")
+    pause()
+
+def _run_backup(conn, target, pages, sleep):
+    """Back conn up to a file, or to a new in-memory snapshot when target is None.
+
+    Shows live progress; returns (snapshot connection or None, stats), or None on error.
+    """
+    from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
     try:
-        cursor.execute(f"SELECT * FROM {table_name}")
-        rows = cursor.fetchall()
+        with Progress(
+            TextColumn("[cyan]Backing up"),
+            BarColumn(),
+            TextColumn("{task.completed:,}/{task.total:,} pages"),
+            TextColumn("[dim]{task.fields[remaining]:,} remaining · {task.fields[rate]:.1f} MB/s[/dim]"),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task("backup", total=0, remaining=0, rate=0.0)
+            
+            def on_progress(remaining, total, rate):
+                progress.update(task, total=total, completed=total - remaining, remaining=remaining,
+                                rate=rate / (1024 * 1024))
+            
+            if target is None:
+                return snapshot_database(conn, pages, sleep, on_progress)
+            return None, backup_database(conn, target, pages, sleep, on_progress)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        console.print(f"[red]Error backing up database: {e}[/red]")
+        return None
+
+def backup_screen(conn, default_target=None):
+    """Online copy of the whole database to a file or an in-memory snapshot"""
+    clear_screen()
+    console.print(Panel("[bold cyan]Backup Database[/bold cyan]", expand=False))
+    
+    if default_target is None:
+        source = database_path(conn) or "memory.db"
+        default_target = f"{os.path.splitext(source)[0]}-{time.strftime('%Y%m%d-%H%M%S')}.db"
+    console.print("\n[dim]The live database is copied page by page; other connections can keep writing "
+                  "between steps. Enter :memory: for an in-memory snapshot to browse and query.[/dim]")
+    target = console.input(f"\n[yellow]Backup to \\[{default_target}]:[/yellow] ").strip() or default_target
+    pages = _ask_number("Pages per step", BACKUP_STEP_PAGES) or BACKUP_STEP_PAGES
+    sleep_ms = _ask_number("Pause between steps in ms", int(BACKUP_STEP_SLEEP * 1000))
+    
+    in_memory = target == ":memory:"
+    result = _run_backup(conn, None if in_memory else target, pages, sleep_ms / 1000)
+    if result is None:
+        pause()
+        return
+    snapshot, stats = result
+    rate = stats["bytes"] / stats["seconds"] if stats["seconds"] else 0
+    console.print(f"\n[bold green]✓ Copied {stats['pages']:,} pages ({format_bytes(stats['bytes'])}) "
+                  f"in {stats['seconds']:.2f}s, {rate / (1024 * 1024):.1f} MB/s over {stats['steps']} steps[/bold green]")
+    if not in_memory:
+        console.print(f"[bold]Backup:[/bold] {stats['target']}")
+        pause()
+        return
+    pause()
+    try:
+        snapshot_menu(snapshot, time.strftime("%H:%M:%S"))
+    finally:
+        release_catalog(snapshot)
+        release_row_counter(snapshot)
+        release_profiler(snapshot)
+        snapshot.close()
+
+def snapshot_menu(snapshot, taken):
+    """Browse an in-memory snapshot with the usual table screens"""
+    renderer = FrameRenderer()
+    selected = 0
+    while True:
+        tables = get_catalog(snapshot).tables()
+        options = tables + ["Save snapshot to file", "Close snapshot"]
+        selected = min(selected, len(options) - 1)
+        renderer.render(menu_frame(f"Snapshot taken {taken} (in memory)", options, selected))
         
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = [col[1] for col in cursor.fetchall()]
+        key = read_key()
+        if key == readchar.key.UP:
+            selected = (selected - 1) % len(options)
+        elif key == readchar.key.DOWN:
+            selected = (selected + 1) % len(options)
+        elif key == readchar.key.ENTER:
+            if selected == len(options) - 1:  # Close snapshot
+                break
+            elif selected == len(options) - 2:  # Save snapshot to file
+                backup_screen(snapshot, f"snapshot-{time.strftime('%Y%m%d-%H%M%S')}.db")
+            else:
+                show_table_data(snapshot.cursor(), snapshot, options[selected])
+        elif key == readchar.key.ESC:
+            break
+
+def workspace_screen(conn):
+    """Attach and detach databases for cross-database queries"""
+    from rich.table import Table
+    
+    while True:
+        clear_screen()
+        console.print(Panel("[bold cyan]Workspace[/bold cyan]", expand=False))
+        
+        catalog = get_catalog(conn)
+        databases = catalog.databases()
+        listing = Table(show_header=True, header_style="bold magenta")
+        listing.add_column("Schema", style="cyan")
+        listing.add_column("File")
+        listing.add_column("Tables", justify="right")
+        listing.add_column("Size", justify="right")
+        for schema, path in databases:
+            size = format_bytes(os.path.getsize(path)) if path and os.path.exists(path) else "-"
+            listing.add_row(schema, path or "(in memory)", str(len(catalog.tables(schema))), size)
+        console.print(listing)
+        console.print("\n[dim]Attached tables are named schema.table, e.g. in Custom SQL: "
+                      "SELECT * FROM {table} JOIN shard1.events USING (id)[/dim]")
+        
+        console.print("\n\\[a] attach  \\[d] detach  \\[b] back")
+        command = console.input("[yellow]>[/yellow] ").strip().lower()
+        try:
+            if command == 'a':
+                path = console.input("[yellow]Database file:[/yellow] ").strip()
+                if not path:
+                    continue
+                alias = console.input("[yellow]Schema name (Enter for the file name):[/yellow] ").strip() or None
+                alias = attach_database(conn, path, alias)
+                console.print(f"[green]✓ Attached as {alias}[/green]")
+                pause()
+            elif command == 'd':
+                alias = console.input("[yellow]Schema to detach:[/yellow] ").strip()
+                if alias and alias not in ("main", "temp"):
+                    detach_database(conn, alias)
+            elif command in ('b', 'q', ''):
+                return
+        except (sqlite3.Error, ValueError) as e:
+            console.print(f"[red]Error: {e}[/red]")
+            pause()
+
+def storage_screen(conn):
+    """Per-table and per-index space usage, with VACUUM actions"""
+    from rich.table import Table
+    
+    while True:
+        clear_screen()
+        console.print(Panel("[bold cyan]Storage Analytics[/bold cyan]", expand=False))
+        
+        try:
+            with console.status("[cyan]Reading page statistics...[/cyan]"):
+                report = storage_report(conn)
+        except sqlite3.Error as e:
+            console.print(f"[red]Error reading storage statistics: {e}[/red]")
+            pause()
+            return
+        
+        console.print(
+            f"\n[bold]Size:[/bold] {format_bytes(report['size'])} "
+            f"({report['page_count']:,} pages of {report['page_size']:,} bytes)"
+        )
+        console.print(
+            f"[bold]Free pages:[/bold] {report['freelist_count']:,} "
+            f"({report['freelist_ratio']:.1%}, {format_bytes(report['freelist_count'] * report['page_size'])} reclaimable) · "
+            f"[bold]auto_vacuum:[/bold] {report['auto_vacuum']}"
+        )
+        if not report["exact"]:
+            console.print("[yellow]dbstat is not available in this SQLite build; sizes are estimated from sampled rows.[/yellow]")
+        
+        objects = Table(show_header=True, header_style="bold magenta")
+        objects.add_column("Name", style="cyan")
+        objects.add_column("Type")
+        objects.add_column("Table")
+        objects.add_column("Pages", justify="right")
+        objects.add_column("Size", justify="right")
+        objects.add_column("% of file", justify="right")
+        objects.add_column("Entries", justify="right")
+        objects.add_column("Avg entry", justify="right")
+        objects.add_column("Unused", justify="right")
+        objects.add_column("Fragmented", justify="right")
+        for obj in report["objects"]:
+            unused = "-" if obj["unused"] is None else f"{obj['unused'] / obj['bytes']:.0%}" if obj["bytes"] else "0%"
+            fragmented = "-" if obj["fragmentation"] is None else f"{obj['fragmentation']:.0%}"
+            objects.add_row(obj["name"], obj["type"], obj["table"], f"{obj['pages']:,}", format_bytes(obj["bytes"]),
+                            f"{obj['share']:.1%}", f"{obj['entries']:,}", format_bytes(obj["avg_entry"]),
+                            unused, fragmented)
+        console.print(objects)
+        
+        console.print("\n\\[v] VACUUM  \\[i] VACUUM INTO file  \\[n] incremental vacuum  \\[r] refresh  \\[b] back")
+        command = console.input("[yellow]>[/yellow] ").strip().lower()
+        if command == 'v':
+            _run_vacuum(conn)
+        elif command == 'i':
+            target = console.input("[yellow]Write compacted copy to:[/yellow] ").strip()
+            if target:
+                _run_vacuum(conn, target)
+        elif command == 'n':
+            _run_incremental_vacuum(conn)
+        elif command in ('b', 'q', ''):
+            return
+
+def _since(monotonic):
+    if monotonic is None:
+        return "-"
+    seconds = time.monotonic() - monotonic
+    return f"{seconds:.0f}s ago" if seconds < 120 else f"{seconds / 60:.0f}m ago"
+
+def maintenance_screen(conn):
+    """Run checks and housekeeping now, or schedule them on a background thread"""
+    from rich.table import Table
+    from rich.markup import escape
+    
+    scheduler = get_scheduler(conn)
+    tasks = list(MAINTENANCE_TASKS)
+    colors = {"ok": "green", "problem": "red", "error": "red", "skipped": "dim", "stopped": "yellow"}
+    while True:
+        clear_screen()
+        console.print(Panel("[bold cyan]Maintenance[/bold cyan]", expand=False))
         
-        data = []
-        for row in rows:
-            data.append(dict(zip(columns, row)))
+        if scheduler.is_running():
+            state = f"[green]running[/green] · runs when idle for {scheduler.idle_seconds}s · throttle {scheduler.throttle}"
+            if scheduler.running:
+                state += f" · [cyan]now: {scheduler.running}[/cyan]"
+        else:
+            state = "[yellow]stopped[/yellow]"
+        console.print(f"\n[bold]Scheduler:[/bold] {state}")
+        
+        schedule = Table(show_header=True, header_style="bold magenta")
+        schedule.add_column("#", justify="right")
+        schedule.add_column("Task", style="cyan")
+        schedule.add_column("Every", justify="right")
+        schedule.add_column("Last run", justify="right")
+        schedule.add_column("What it does")
+        for i, task in enumerate(tasks, 1):
+            interval = scheduler.schedule.get(task)
+            every = "on request" if not interval else f"{interval // 60}m" if interval >= 60 else f"{interval}s"
+            schedule.add_row(str(i), task, every, _since(scheduler.last_run.get(task)), MAINTENANCE_TASKS[task])
+        console.print(schedule)
+        
+        if scheduler.log:
+            runs = Table(title="[bold]Recent runs[/bold]", show_header=True, header_style="bold magenta")
+            runs.add_column("Time")
+            runs.add_column("Task", style="cyan")
+            runs.add_column("Status")
+            runs.add_column("Duration", justify="right")
+            runs.add_column("Result")
+            for record in list(scheduler.log)[-10:]:
+                color = colors.get(record["status"], "white")
+                runs.add_row(time.strftime("%H:%M:%S", time.localtime(record["ts"])), record["task"],
+                             f"[{color}]{record['status']}[/{color}]", f"{record['seconds']:.3f}s",
+                             escape(record["result"]))
+            console.print(runs)
+        
+        console.print(f"\n\\[1-{len(tasks)}] run now  \\[s] {'stop' if scheduler.is_running() else 'start'} scheduler  "
+                      "\\[e] edit schedule  \\[w] write log  \\[r] refresh  \\[b] back")
+        command = console.input("[yellow]>[/yellow] ").strip().lower()
+        if command.isdigit() and 1 <= int(command) <= len(tasks):
+            task = tasks[int(command) - 1]
+            if scheduler.is_running():
+                scheduler.run_now(task)
+                time.sleep(0.2)
+            else:
+                with console.status(f"[cyan]Running {task}...[/cyan]"):
+                    scheduler.add_record(run_maintenance(conn, task))
+        elif command == 's':
+            if scheduler.is_running():
+                with console.status("[cyan]Stopping the scheduler...[/cyan]"):
+                    scheduler.stop()
+            elif scheduler.db_path is None:
+                console.print("[red]The scheduler needs a database file.[/red]")
+                pause()
+            else:
+                scheduler.start()
+        elif command == 'e':
+            number = console.input(f"[yellow]Task number (1-{len(tasks)}):[/yellow] ").strip()
+            if not number.isdigit() or not 1 <= int(number) <= len(tasks):
+                continue
+            task = tasks[int(number) - 1]
+            minutes = console.input(f"[yellow]Run {task} every how many minutes (0 = only on request):[/yellow] ").strip()
+            try:
+                interval = int(float(minutes) * 60)
+            except ValueError:
+                continue
+            if interval > 0:
+                scheduler.schedule[task] = interval
+            else:
+                scheduler.schedule.pop(task, None)
+        elif command == 'w':
+            target = console.input("[yellow]Append the log to file \\[maintenance.log]:[/yellow] ").strip() or "maintenance.log"
+            try:
+                append_maintenance_log(target, list(scheduler.log))
+                console.print(f"[green]✓ Wrote {len(scheduler.log)} runs to {target}[/green]")
+            except OSError as e:
+                console.print(f"[red]Error writing log: {e}[/red]")
+            pause()
+        elif command in ('b', 'q', ''):
+            return
+
+def _run_vacuum(conn, into=None):
+    label = f"VACUUM INTO {into}" if into else "VACUUM"
+    start = time.perf_counter()
+    try:
+        with console.status("") as status:
+            def on_progress(steps, written):
+                progress = f", {format_bytes(written)} written" if written is not None else ""
+                status.update(f"[cyan]{label}...[/cyan] {time.perf_counter() - start:.1f}s, {steps:,} VM steps{progress}")
+            on_progress(0, None)
+            before, after = vacuum(conn, into, on_progress)
+    except (sqlite3.Error, ValueError) as e:
+        console.print(f"\n[red]Error running {label}: {e}[/red]")
+        pause()
+        return
+    elapsed = time.perf_counter() - start
+    what = f"database → {into}" if into else "database"
+    console.print(f"\n[bold green]✓ {label} finished in {elapsed:.2f}s[/bold green]")
+    console.print(f"[bold]{what}:[/bold] {format_bytes(before)} → {format_bytes(after)} "
+                  f"({format_bytes(before - after)} smaller)" if after <= before else
+                  f"[bold]{what}:[/bold] {format_bytes(before)} → {format_bytes(after)}")
+    pause()
+
+def _run_incremental_vacuum(conn):
+    from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
+    try:
+        with Progress(
+            TextColumn("[cyan]incremental_vacuum"),
+            BarColumn(),
+            TextColumn("{task.completed:,} pages freed"),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task("vacuum", total=None)
+            
+            def on_progress(freed, total):
+                progress.update(task, completed=freed, total=total)
+            
+            before, after = incremental_vacuum(conn, on_progress=on_progress)
+    except (sqlite3.Error, ValueError) as e:
+        console.print(f"\n[red]Error: {e}[/red]")
+        pause()
+        return
+    console.print(f"\n[bold green]✓ {format_bytes(before)} → {format_bytes(after)} "
+                  f"({format_bytes(before - after)} released)[/bold green]")
+    pause()
+
+@contextlib.contextmanager
+def key_poller():
+    """Yield poll(timeout) that returns a pressed key or None without blocking.
+
+    The terminal is switched to cbreak mode for the duration so single keys
+    (ESC in particular) arrive without waiting for Enter.
+    """
+    if platform.system() == "Windows":
+        import msvcrt
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        def poll(timeout):
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if msvcrt.kbhit():
+                    return readchar.readkey()
+                time.sleep(0.01)
+            return None
         
-        console.print(f"\n[bold green]✓ Exported {len(rows)} rows to {filename}![/bold green]")
+        yield poll
+        return
     
-    except Exception as e:
-        console.print(f"[red]Error exporting JSON: {e}[/red]")
+    import select, sys, termios, tty
+    if not sys.stdin.isatty():
+        yield lambda timeout: time.sleep(timeout)
+        return
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    pending = []
+    
+    def poll(timeout):
+        # Read the fd directly: readchar flushes unread input when it
+        # switches terminal modes, which would drop keys select() just saw
+        if not pending:
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                return None
+            data = os.read(fd, 64).decode(errors="ignore")
+            pending.extend(re.findall(r"\x1b\[[0-9;]*[~A-Za-z]|\x1bO.|\x1b|.", data, re.S))
+        return pending.pop(0) if pending else None
     
-    input("\nPress Enter to continue...")
+    try:
+        tty.setcbreak(fd)
+        yield poll
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
 
-def export_markdown(cursor, table_name):
-    """Export table to Markdown using Rich Table"""
-    clear_screen()
-    console.print(Panel(f"[bold cyan]Export Markdown - {table_name}[/bold cyan]", expand=False))
-    
-    filename = console.input("\n[yellow]Enter output filename (without .md):[/yellow] ").strip()
-    filename = f"{filename}.md"
+def read_key():
+    """Block until a key is pressed; a lone ESC returns at once"""
+    with key_poller() as poll:
+        while True:
+            key = poll(0.5)
+            if key is not None:
+                return key
+
+def run_query_worker(worker, label="Running query", action=None, *args):
+    """Start a worker step and show a live indicator until it finishes or ESC cancels it"""
+    worker.start(action, *args)
+    try:
+        with console.status("") as status, key_poller() as poll:
+            while not worker.is_done():
+                status.update(
+                    f"[cyan]{label}...[/cyan] {worker.elapsed():.1f}s, "
+                    f"{worker.vm_steps:,} VM steps, {len(worker.rows):,} rows "
+                    f"[dim](ESC to cancel)[/dim]"
+                )
+                if poll(0.1) == readchar.key.ESC:
+                    worker.cancel()
+    except KeyboardInterrupt:
+        worker.cancel()
+    worker.join()
+
+def _cell_markup(cell):
+    """Cell text as Rich markup; full-text matches are shown in reverse video"""
+    from rich.markup import escape
+    text = escape(str(cell))
+    if HIGHLIGHT_START in text:
+        return text.replace(HIGHLIGHT_START, "[reverse]").replace(HIGHLIGHT_END, "[/reverse]")
+    return text
+
+def view_results(worker, title):
+    """Scroll through a lazily fetched result set.
+
+    Rows are fetched from the worker's open cursor only when scrolling
+    reaches them, only the rows on screen are formatted, and the total row
+    count is computed by a second worker in the background.
+    """
+    from rich.table import Table
+
+    counter = None
+    if not worker.exhausted:
+        count_sql = f"SELECT COUNT(*) FROM ({worker.sql.rstrip().rstrip(';')})"
+        if worker.cache is not None:
+            counter = worker.cache.related(worker, count_sql, timeout=0)
+        else:
+            counter = QueryWorker(worker.db_path, count_sql, worker.params, timeout=0)
+        if not counter.cached:
+            counter.start()
+    offset = 0
+    renderer = FrameRenderer()
     
     try:
-        cursor.execute(f"SELECT * FROM {table_name}")
-        rows = cursor.fetchall()
+        with key_poller() as poll:
+            while True:
+                term_width, term_height = shutil.get_terminal_size()
+                visible = max(term_height - 10, 5)
+                
+                # Pull in the next screenful (plus one ahead) only when needed
+                if offset + visible > len(worker.rows) and not worker.exhausted:
+                    run_query_worker(worker, "Fetching rows", worker.fetch, offset + 2 * visible - len(worker.rows))
+                offset = max(min(offset, len(worker.rows) - visible), 0)
+                page = worker.rows[offset:offset + visible]
+                
+                if worker.exhausted and not worker.error:
+                    total = f"{len(worker.rows):,}{'+' if worker.truncated else ''}"
+                elif counter is not None and counter.is_done():
+                    total = f"{counter.rows[0][0]:,}" if counter.rows else "?"
+                else:
+                    total = "counting..."
+                
+                rich_table = Table(
+                    title=f"[bold green]{title}[/bold green]" + (" [dim](cached)[/dim]" if worker.cached else ""),
+                    caption=f"[dim]rows {offset + 1 if page else 0}-{offset + len(page)} of {total}[/dim]"
+                )
+                for col in worker.columns:
+                    rich_table.add_column(f"[bold cyan]{col}[/bold cyan]", style="white")
+                for row in page:
+                    rich_table.add_row(*[_cell_markup(cell) for cell in row])
+                
+                notice = ""
+                if worker.cancelled or worker.timed_out:
+                    notice = "[yellow]Fetching was stopped; showing the rows fetched so far.[/yellow]"
+                elif worker.error:
+                    notice = f"[red]SQL Error: {worker.error}[/red]"
+                elif worker.truncated:
+                    notice = f"[yellow]Stopped after {worker.row_cap} rows (row cap).[/yellow]"
+                renderer.render(render_text(
+                    rich_table,
+                    notice,
+                    "[dim]↑/↓ scroll, PgUp/PgDn page, Home/End jump, ESC or ENTER to go back[/dim]"
+                ))
+                
+                # Wait for a key, redrawing once when the background count lands
+                counting = counter is not None and not counter.is_done()
+                key = None
+                while key is None:
+                    key = poll(0.25)
+                    if key is None and counting and counter.is_done():
+                        break
+                
+                if key is None:
+                    continue
+                elif key == readchar.key.DOWN:
+                    offset += 1
+                elif key == readchar.key.UP:
+                    offset = max(offset - 1, 0)
+                elif key == readchar.key.PAGE_DOWN:
+                    offset += visible
+                elif key == readchar.key.PAGE_UP:
+                    offset = max(offset - visible, 0)
+                elif key == readchar.key.HOME:
+                    offset = 0
+                elif key == readchar.key.END:
+                    if not worker.exhausted:
+                        run_query_worker(worker, "Fetching rows", worker.fetch)
+                    offset = len(worker.rows)
+                elif key in (readchar.key.ESC, readchar.key.ENTER):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if counter is not None:
+            counter.cancel()
+        worker.close()
+
+def _ask_number(prompt, default):
+    value = console.input(f"[yellow]{prompt} [{default}]:[/yellow] ").strip()
+    return int(value) if value.isdigit() else default
+
+def plan_tree(plan, title):
+    """Rich Tree of a query plan, with scans and temp B-trees highlighted"""
+    from rich.tree import Tree
+    tree = Tree(title)
+    nodes = {0: tree}
+    for node_id, parent, detail in plan:
+        if detail.startswith("SCAN ") and "USING" not in detail:
+            label = f"[bold red]{detail}[/bold red]  [red](full table scan)[/red]"
+        elif "USE TEMP B-TREE" in detail:
+            label = f"[bold yellow]{detail}[/bold yellow]  [yellow](temp B-tree)[/yellow]"
+        elif detail.startswith("SEARCH"):
+            label = f"[green]{detail}[/green]"
+        else:
+            label = detail
+        nodes[node_id] = nodes.get(parent, tree).add(label)
+    return tree
+
+def explain_screen(conn, table_name, sql, filter_columns, other_columns=(), params=()):
+    """Show the query plan with warnings and offer to create suggested indexes"""
+    while True:
+        clear_screen()
+        console.print(Panel(f"[bold cyan]Query Plan - {table_name}[/bold cyan]", expand=False))
+        console.print(f"\n[dim]{sql}[/dim]\n")
         
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = [col[1] for col in cursor.fetchall()]
+        try:
+            plan = explain_query_plan(conn, sql, params)
+        except sqlite3.Error as e:
+            console.print(f"[red]Cannot explain query: {e}[/red]")
+            pause()
+            return
         
-        # Build markdown table
-        md_lines = [f"# Table: {table_name}\n"]
-        md_lines.append("| " + " | ".join(columns) + " |")
-        md_lines.append("| " + " | ".join(["---" for _ in columns]) + " |")
+        console.print(plan_tree(plan, "[bold]QUERY PLAN[/bold]"))
         
-        for row in rows:
-            md_lines.append("| " + " | ".join([str(cell) for cell in row]) + " |")
+        warnings = plan_warnings(plan)
+        if warnings:
+            console.print()
+            for kind, message in warnings:
+                color = "red" if kind == "scan" else "yellow"
+                console.print(f"[{color}]⚠ {message}[/{color}]")
+        else:
+            console.print("\n[green]✓ No full table scans or temp B-trees.[/green]")
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("\n".join(md_lines))
+        filtered = [(column, count) for (table, column), count in predicate_log.most_common() if table == table_name]
+        if filtered:
+            console.print("\n[bold]Filtered this session:[/bold] " + ", ".join(f"{column} ({count}x)" for column, count in filtered))
         
-        console.print(f"\n[bold green]✓ Exported {len(rows)} rows to {filename}![/bold green]")
-    
-    except Exception as e:
-        console.print(f"[red]Error exporting Markdown: {e}[/red]")
-    
-    input("\nPress Enter to continue...")
+        suggestions = suggest_indexes(conn, table_name, plan, filter_columns, other_columns)
+        if not suggestions:
+            pause()
+            return
+        
+        console.print("\n[bold green]Suggested indexes:[/bold green]")
+        for i, suggestion in enumerate(suggestions, 1):
+            console.print(f"  [{i}] {suggestion}")
+        
+        choice = console.input("\n[yellow]Create index number (Enter to go back):[/yellow] ").strip()
+        if not choice.isdigit() or not 1 <= int(choice) <= len(suggestions):
+            return
+        
+        try:
+            with console.status("[cyan]Creating index and running ANALYZE...[/cyan]"):
+                conn.execute(suggestions[int(choice) - 1])
+                conn.execute(f"ANALYZE {table_name}")
+                conn.commit()
+            get_catalog(conn).invalidate()
+        except sqlite3.Error as e:
+            console.print(f"[red]Error creating index: {e}[/red]")
+            pause()
+
+def _ask_run_mode():
+    """'r' to run (through the result cache), 'f' to run fresh, 'e' to explain"""
+    mode = console.input("[yellow]Run, run fresh (skip result cache) or explain? (r/f/e) \\[r]:[/yellow] ").strip().lower()
+    return mode if mode in ('f', 'e') else 'r'
 
 def execute_custom_sql(cursor, conn, table_name):
     """Execute custom SQL query on the table"""
@@ -670,79 +2007,88 @@ def execute_custom_sql(cursor, conn, table_name):
     
     if not query:
         console.print("[red]Query cannot be empty![/red]")
-        input("\nPress Enter to continue...")
+        pause()
         return
     
     # Replace {table} placeholder
     query = query.replace("{table}", table_name)
     
-    try:
-        cursor.execute(query)
-        
-        # Check if it's a SELECT query
-        if query.strip().upper().startswith("SELECT"):
-            rows = cursor.fetchall()
-            
-            if not rows:
-                console.print("\n[yellow]Query returned no results.[/yellow]")
-            else:
-                # Get column names from cursor description
-                columns = [desc[0] for desc in cursor.description]
-                
-                # Create Rich table
-                rich_table = Table(title=f"[bold green]Query Results ({len(rows)} rows)[/bold green]")
-                
-                for col in columns:
-                    rich_table.add_column(f"[bold cyan]{col}[/bold cyan]", style="white")
-                
-                for row in rows:
-                    rich_table.add_row(*[str(cell) for cell in row])
-                
-                console.print()
-                console.print(rich_table)
-        else:
-            # For non-SELECT queries (INSERT, UPDATE, DELETE)
-            conn.commit()
-            console.print(f"\n[bold green]✓ Query executed successfully! Rows affected: {cursor.rowcount}[/bold green]")
+    filtered, other = referenced_columns(query, get_catalog(conn).column_names(table_name))
+    record_predicates(table_name, filtered)
+    mode = _ask_run_mode()
+    if mode == 'e':
+        explain_screen(conn, table_name, query, filtered, [] if "*" in query else other)
+        return
     
-    except sqlite3.Error as e:
-        console.print(f"\n[red]SQL Error: {e}[/red]")
+    timeout = _ask_number("Timeout in seconds, 0 for none", QUERY_TIMEOUT)
+    row_cap = _ask_number("Maximum rows to fetch, 0 for all", QUERY_ROW_CAP)
+    
+    db_path = database_path(conn)
+    if db_path is None:
+        console.print("[red]Background queries need a database file.[/red]")
+        pause()
+        return
+    
+    worker = result_cache.worker(conn, query, bypass=mode == 'f', timeout=timeout, row_cap=row_cap,
+                                 page_size=RESULT_PAGE_ROWS)
+    run_query_worker(worker)
+    
+    if worker.cancelled:
+        console.print(f"\n[yellow]Query cancelled after {worker.elapsed():.2f}s.[/yellow]")
+    elif worker.timed_out:
+        console.print(f"\n[red]Query stopped: timeout of {timeout}s reached.[/red]")
+    elif worker.error:
+        console.print(f"\n[red]SQL Error: {worker.error}[/red]")
+    elif worker.columns is not None:
+        if not worker.rows:
+            worker.close()
+            console.print("\n[yellow]Query returned no results.[/yellow]")
+        else:
+            view_results(worker, "Query Results")
+            return
+    else:
+        # For non-SELECT queries (INSERT, UPDATE, DELETE)
+        if is_ddl(query):
+            get_catalog(conn).invalidate()
+        console.print(f"\n[bold green]✓ Query executed successfully! Rows affected: {worker.rowcount}[/bold green]")
     
-    input("\nPress Enter to continue...")
+    pause()
 
 def show_table_data(cursor, conn, table_name):
-    """Display first 20 rows of the selected table with buttons"""
-    buttons = ["Row Editing", "Search/Filter", "Table Info", "Import/Export", "Custom SQL"]
+    """Page through the selected table with action buttons"""
+    from rich.table import Table
+    buttons = ["Row Editing", "Search/Filter", "Table Info", "Import/Export", "Custom SQL", "Profile"]
     selected = 0
+    pager = TablePager(conn, table_name)
+    renderer = FrameRenderer()
+    table_text = None
+    table_state = None
     
     while True:
-        clear_screen()
-        term_width, term_height = shutil.get_terminal_size()
-        
-        # Fetch table data
-        cursor.execute(f"SELECT * FROM {table_name} LIMIT 20")
-        rows = cursor.fetchall()
-        
-        # Get column names
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        # Create Rich table
-        rich_table = Table(title=f"[bold #CC22BB]Table: {table_name}[/bold #CC22BB]")
+        # Only re-query when the data actually changed
+        pager.refresh()
         
-        # Add columns with color
-        for col in columns:
-            rich_table.add_column(f"[bold cyan]{col}[/bold cyan]", style="white")
-        
-        # Add rows
-        for row in rows:
-            rich_table.add_row(*[str(cell) for cell in row])
-        
-        # Print table
-        console.print(rich_table)
-        console.print()
+        # Only rebuild the table when the page (or terminal size) changed,
+        # not when the button highlight moves
+        state = (pager.state(), shutil.get_terminal_size())
+        if state != table_state:
+            rich_table = Table(
+                title=f"[bold #CC22BB]Table: {table_name}[/bold #CC22BB]",
+                caption=f"[dim]{pager.position()}[/dim]"
+            )
+            
+            # Add columns with color
+            for col in pager.columns:
+                rich_table.add_column(f"[bold cyan]{col}[/bold cyan]", style="white")
+            
+            # Add rows
+            for row in pager.rows:
+                rich_table.add_row(*[str(cell) for cell in row])
+            
+            table_text = render_text(rich_table, "")
+            table_state = state
         
-        # Print buttons
+        # Buttons
         button_lines = []
         for i, button in enumerate(buttons):
             if i == selected:
@@ -750,14 +2096,27 @@ def show_table_data(cursor, conn, table_name):
             else:
                 button_lines.append(f"  {button}  ")
         
-        console.print("  ".join(button_lines))
-        console.print("\n[dim]Use arrow keys to navigate, ENTER to select, ESC to go back[/dim]")
+        renderer.render(table_text, render_text(
+            "  ".join(button_lines),
+            "\n[dim]Use arrow keys to navigate, PgUp/PgDn/Home/End to page, ENTER to select, ESC to go back[/dim]",
+            sql_status()
+        ))
+        # The next status line shows what the next key (page turn, screen) ran
+        session_trace.mark()
         
-        key = readchar.readkey()
+        key = read_key()
         if key == readchar.key.LEFT:
             selected = (selected - 1) % len(buttons)
         elif key == readchar.key.RIGHT:
             selected = (selected + 1) % len(buttons)
+        elif key == readchar.key.PAGE_DOWN:
+            pager.next()
+        elif key == readchar.key.PAGE_UP:
+            pager.prev()
+        elif key == readchar.key.HOME:
+            pager.first()
+        elif key == readchar.key.END:
+            pager.last()
         elif key == readchar.key.ENTER:
             if selected == 0:  # Row Editing
                 row_editing_menu(cursor, conn, table_name)
@@ -769,19 +2128,29 @@ def show_table_data(cursor, conn, table_name):
                 import_export_menu(cursor, conn, table_name)
             elif selected == 4:  # Custom SQL
                 execute_custom_sql(cursor, conn, table_name)
+            elif selected == 5:  # Profile
+                profile_screen(conn, table_name)
         elif key == readchar.key.ESC or key in [readchar.key.CTRL_C]:
             break
 
-def main_loop(database_name):
+def main_loop(database_name, profile=DEFAULT_PROFILE, startup=None, maintenance=False, attach=()):
+    """Interactive session; startup, if given, collects (label, perf_counter) marks.
+
+    With maintenance set, the background maintenance scheduler starts with
+    the session. attach lists (path, alias or None) of databases to ATTACH
+    to the session as a workspace.
+    """
     did_it_log = False
-    current_dir = os.getcwd()
-    db_path = os.path.join(current_dir, f"{database_name}.db")
     
     try:
-        conn = sqlite3.connect(db_path)
+        conn, settings = open_database(database_name, profile)
         cursor = conn.cursor()
+        for path, alias in attach:
+            attach_database(conn, path, alias)
         did_it_log = True
-    except sqlite3.Error as e:
+        if startup is not None:
+            startup.append(("open database", time.perf_counter()))
+    except (sqlite3.Error, ValueError) as e:
         print(f"Database did NOT load: {e}")
         return
 
@@ -793,30 +2162,46 @@ def main_loop(database_name):
   )(   )(_) )) _ < \  / 
  (__) (____/(____/  \/  
  """
+        painted = False
+        renderer = FrameRenderer()
+        if maintenance and database_path(conn) is not None:
+            get_scheduler(conn).start()
+        console.set_alt_screen(True)
 
         while True:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = [row[0] for row in cursor.fetchall()]
+            catalog = get_catalog(conn)
+            groups = [(schema, path, catalog.tables(schema)) for schema, path in catalog.databases()]
 
-            # Menu options: "CREATE NEW TABLE" + existing tables
-            options = ["CREATE NEW TABLE"] + tables
+            # Menu options: database-wide actions + existing tables, grouped by database in a workspace
+            actions = ["CREATE NEW TABLE", "EXPORT DATABASE", "BACKUP DATABASE", "STORAGE ANALYTICS", "MAINTENANCE",
+                       "WORKSPACE"]
+            options = list(actions)
+            headers = {}
+            for schema, path, tables in groups:
+                if len(groups) > 1:
+                    label = os.path.basename(path) if path else "in memory"
+                    headers.setdefault(len(options), []).append(f"\n[dim]── {schema} · {label} ──[/dim]")
+                options.extend(tables)
             selected = 0
 
             while True:
-                clear_screen()
                 term_width, term_height = shutil.get_terminal_size()
 
                 # Build menu text
                 menu_lines = [
                     f"[#ed2e1c]{ascii_art}[/#ed2e1c]\n",
-                    f"Connected to [#CC22BB on black]{database_name}.db[/#CC22BB on black]\n"
+                    f"Connected to [#CC22BB on black]{database_name}.db[/#CC22BB on black]",
+                    f"[dim]profile {profile} · {format_settings(settings)}[/dim]\n"
                 ]
                 for i, option in enumerate(options):
+                    menu_lines.extend(headers.get(i, []))
                     if i == selected:
                         # Highlight selected option
                         menu_lines.append(f"[black on #E0F7FA]> {option} <[/black on #E0F7FA]")
                     else:
                         menu_lines.append(option)
+                menu_lines.extend(headers.get(len(options), []))
+                menu_lines.append(f"\n{sql_status()}")
 
                 menu_text = "\n".join(menu_lines)
 
@@ -825,9 +2210,15 @@ def main_loop(database_name):
                 padded_menu = "\n" * vertical_padding + menu_text
 
                 # Center horizontally using Rich Align
-                console.print(Align.center(padded_menu))
+                renderer.render(render_text(Align.center(padded_menu)))
+                if startup is not None and not painted:
+                    startup.append(("first paint", time.perf_counter()))
+                    painted = True
 
-                key = readchar.readkey()
+                try:
+                    key = read_key()
+                except KeyboardInterrupt:
+                    key = readchar.key.CTRL_C  # Ctrl+C arrives as SIGINT
                 if key == readchar.key.UP:
                     selected = (selected - 1) % len(options)
                 elif key == readchar.key.DOWN:
@@ -837,13 +2228,29 @@ def main_loop(database_name):
                         # CREATE NEW TABLE selected
                         create_new_table(cursor, conn)
                         break  # Refresh the menu to show new table
+                    elif selected == 1:
+                        export_database_screen(conn)
+                    elif selected == 2:
+                        backup_screen(conn)
+                    elif selected == 3:
+                        storage_screen(conn)
+                    elif selected == 4:
+                        maintenance_screen(conn)
+                    elif selected == 5:
+                        workspace_screen(conn)
+                        break  # Refresh the menu with the attached databases
                     else:
                         # A table was selected
                         table_name = options[selected]
                         show_table_data(cursor, conn, table_name)
                 elif key in [readchar.key.CTRL_C, readchar.key.CTRL_X, readchar.key.CTRL_Z]:
-                    clear_screen()
+                    console.set_alt_screen(False)
                     console.print("Exiting...")
+                    release_catalog(conn)
+                    release_row_counter(conn)
+                    release_profiler(conn)
+                    release_scheduler(conn)
+                    pool.clear()
                     conn.close()
                     return
 